@@ -0,0 +1,132 @@
+# app/data/hunt_cache.py
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.data.schema import HuntRecord
+from app.services.journal import Journal
+from app.services.paths import hunt_cache_path
+
+# Subir si cambia el formato de las filas o las reglas de normalize_json
+_CACHE_VERSION = 2
+
+# Campos tipados de HuntRecord que se guardan (path va como clave)
+_FIELDS = (
+    "session_start", "session_end", "duration_sec", "xp_gain", "raw_xp_gain",
+    "supplies", "loot", "balance", "vocation", "mode", "vocation_duo", "zona",
+    "level_bucket", "has_all_meta", "ignore_duo_balance", "balance_real",
+)
+_DATETIME_FIELDS = ("session_start", "session_end")
+
+
+def _dt_to_str(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+def _str_to_dt(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except Exception:
+        return None
+
+def _record_to_row(record: HuntRecord) -> List[Any]:
+    row = []
+    for name in _FIELDS:
+        val = getattr(record, name)
+        if name in _DATETIME_FIELDS:
+            val = _dt_to_str(val)
+        row.append(val)
+    return row
+
+def _row_to_record(path: str, row: List[Any]) -> HuntRecord:
+    values = dict(zip(_FIELDS, row))
+    for name in _DATETIME_FIELDS:
+        values[name] = _str_to_dt(values[name])
+    return HuntRecord(path=path, **values)
+
+
+class HuntCache:
+    """
+    Caché en disco de HuntRecord normalizados, indexada por path y validada
+    con (tamaño, mtime_ns). Snapshot + diario (journal.Journal): guardar solo
+    escribe las entradas que cambiaron.
+
+    release() suelta las entradas y deja la caché "descargada": get() no acierta
+    nunca y put()/forget() solo se anotan para el diario. Es lo que usa
+    LibraryState entre refrescos: lo que se parsea tiene firma nueva y no puede
+    estar en la caché, así que no hace falta leerla. Si al guardar toca compactar,
+    se relee entera, se escribe el snapshot y se vuelve a soltar.
+    """
+    def __init__(self, path: str | None = None):
+        self.path = path or hunt_cache_path()
+        self._entries: Dict[str, List[Any]] = {}
+        self._loaded = False
+        self._size = 0   # entradas al soltarla (para decidir cuándo compactar descargada)
+        self._journal = Journal(self.path, _CACHE_VERSION, ("entries",))
+
+    @classmethod
+    def load(cls, path: str | None = None) -> "HuntCache":
+        cache = cls(path)
+        cache._read()
+        return cache
+
+    def _read(self) -> None:
+        # caché ausente, corrupta o de otra versión -> vacía, se reconstruye sola
+        tables = self._journal.load()
+        self._entries = tables["entries"] if tables is not None else {}
+        self._loaded = True
+
+    def release(self) -> None:
+        """Suelta las entradas de memoria; lo anotado después se guarda igual."""
+        if self._loaded:
+            self._size = len(self._entries)
+            self._entries = {}
+            self._loaded = False
+
+    def get(self, path: str, size: int, mtime_ns: int) -> Optional[HuntRecord]:
+        """Devuelve el HuntRecord cacheado si la firma (tamaño, mtime) coincide."""
+        entry = self._entries.get(path)
+        if not entry or len(entry) != 3:
+            return None
+        c_size, c_mtime, row = entry
+        if c_size != size or c_mtime != mtime_ns or len(row) != len(_FIELDS):
+            return None
+        try:
+            return _row_to_record(path, row)
+        except Exception:
+            return None
+
+    def put(self, record: HuntRecord, size: int, mtime_ns: int) -> None:
+        entry = [size, mtime_ns, _record_to_row(record)]
+        if self._loaded:
+            self._entries[record.path] = entry
+        self._journal.record("entries", record.path, entry)
+
+    def forget(self, path: str) -> None:
+        """Quita la entrada de un fichero borrado (también con la caché descargada)."""
+        if self._loaded and self._entries.pop(path, None) is None:
+            return
+        self._journal.record("entries", path, None)
+
+    def prune(self, keep_paths: Iterable[str]) -> None:
+        """Elimina entradas de ficheros que ya no existen en la biblioteca (solo cargada)."""
+        keep = set(keep_paths)
+        for p in [p for p in self._entries if p not in keep]:
+            self.forget(p)
+
+    def save(self) -> bool:
+        """Añade los cambios al diario (compacta el snapshot cuando toca)."""
+        if not self._journal.dirty:
+            return True
+        if self._loaded:
+            return self._journal.save({"entries": self._entries})
+        done = self._journal.append(self._size)
+        if done is not None:
+            return done
+        self._read()
+        try:
+            return self._journal.save({"entries": self._entries})
+        finally:
+            self.release()
@@ -0,0 +1,132 @@
+# app/data/hunt_index.py
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Iterator, Mapping, Optional, Set
+
+if TYPE_CHECKING:
+    from app.data.hunt_store import HuntStore
+
+# Columnas categóricas indexadas (mismas que CODE_COLUMNS de HuntStore)
+INDEXED_COLUMNS = ("vocation", "mode", "vocation_duo", "zona", "level_bucket")
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Posiciones de los bits a 1 de 'mask', en orden creciente."""
+    if not mask:
+        return
+    bits = bin(mask)[:1:-1]   # bit 0 primero
+    i = bits.find("1")
+    while i >= 0:
+        yield i
+        i = bits.find("1", i + 1)
+
+
+class HuntIndex:
+    """
+    Índice de bitsets sobre un HuntStore: para cada columna categórica y cada
+    código, un int de Python cuyo bit i indica que la fila i tiene ese valor;
+    además 'complete' (has_all_meta) y 'all'. Filtrar es un AND de enteros,
+    contar es int.bit_count() y "qué opciones quedan" es un AND por valor.
+    Lo mantiene el propio HuntStore en append/set/remove.
+    """
+    def __init__(self, store: "HuntStore"):
+        self._store = store
+        self.bits: Dict[str, Dict[int, int]] = {name: {} for name in INDEXED_COLUMNS}
+        self.complete = 0
+        self.all = 0
+
+    @classmethod
+    def build(cls, store: "HuntStore") -> "HuntIndex":
+        """Construcción en bloque (un bytearray por valor, sin ints intermedios)."""
+        from app.data.hunt_store import FLAG_ALL_META
+
+        idx = cls(store)
+        n = len(store)
+        nbytes = (n + 7) // 8
+
+        def to_int(buf: bytearray) -> int:
+            return int.from_bytes(buf, "little")
+
+        for name in INDEXED_COLUMNS:
+            bufs: Dict[int, bytearray] = {}
+            for row, code in enumerate(store.columns[name]):
+                buf = bufs.get(code)
+                if buf is None:
+                    buf = bufs[code] = bytearray(nbytes)
+                buf[row >> 3] |= 1 << (row & 7)
+            idx.bits[name] = {code: to_int(buf) for code, buf in bufs.items()}
+
+        complete = bytearray(nbytes)
+        for row, f in enumerate(store.columns["flags"]):
+            if f & FLAG_ALL_META:
+                complete[row >> 3] |= 1 << (row & 7)
+        idx.complete = to_int(complete)
+        idx.all = (1 << n) - 1
+        return idx
+
+    # ---------- mantenimiento (lo llama HuntStore) ----------
+    def add_row(self, row: int, codes: Mapping[str, int], complete: bool) -> None:
+        bit = 1 << row
+        for name in INDEXED_COLUMNS:
+            col = self.bits[name]
+            code = codes[name]
+            col[code] = col.get(code, 0) | bit
+        if complete:
+            self.complete |= bit
+        self.all |= bit
+
+    def discard_row(self, row: int, codes: Mapping[str, int], complete: bool) -> None:
+        bit = 1 << row
+        for name in INDEXED_COLUMNS:
+            col = self.bits[name]
+            code = codes[name]
+            rest = col.get(code, 0) & ~bit
+            if rest:
+                col[code] = rest
+            else:
+                col.pop(code, None)
+        if complete:
+            self.complete &= ~bit
+        self.all &= ~bit
+
+    # ---------- consultas ----------
+    def mask(self, complete_only: bool = False, **filters: Optional[str]) -> int:
+        """
+        Filas que cumplen todos los filtros (igualdad por valor). Un filtro
+        vacío, None o "All" no filtra; un valor desconocido da 0.
+        """
+        m = self.complete if complete_only else self.all
+        for name, value in filters.items():
+            if not value or value == "All":
+                continue
+            code = self._store.codebooks[name].code_of(value)
+            if code < 0:
+                return 0
+            m &= self.bits[name].get(code, 0)
+            if not m:
+                return 0
+        return m
+
+    def count(self, mask: int) -> int:
+        return mask.bit_count()
+
+    def counts(self, name: str, mask: Optional[int] = None) -> Dict[str, int]:
+        """Nº de filas por valor de 'name' dentro de 'mask' (sin valores vacíos)."""
+        book = self._store.codebooks[name]
+        out: Dict[str, int] = {}
+        for code, bits in self.bits[name].items():
+            value = book.decode(code)
+            if not value:
+                continue
+            n = (bits & mask).bit_count() if mask is not None else bits.bit_count()
+            if n:
+                out[value] = n
+        return out
+
+    def available(self, name: str, mask: int) -> Set[str]:
+        """Valores de 'name' que aún tienen alguna fila dentro de 'mask'."""
+        book = self._store.codebooks[name]
+        return {
+            value for code, bits in self.bits[name].items()
+            if bits & mask and (value := book.decode(code))
+        }
@@ -0,0 +1,303 @@
+# app/data/hunt_store.py
+from __future__ import annotations
+
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from app.data.hunt_index import HuntIndex
+from app.data.schema import HuntRecord, load_source_raw
+
+# Columnas numéricas (int64) y categóricas (códigos uint16; 0 = None)
+INT_COLUMNS = ("duration_sec", "xp_gain", "raw_xp_gain", "supplies", "loot", "balance", "balance_real")
+CODE_COLUMNS = ("vocation", "mode", "vocation_duo", "zona", "level_bucket")
+
+# Bits de la columna 'flags'
+FLAG_ALL_META = 1
+FLAG_IGNORE_DUO_BALANCE = 2
+FLAG_HAS_RAW_XP = 4       # máscara de nulos de raw_xp_gain
+FLAG_HAS_START = 8
+FLAG_HAS_END = 16
+FLAG_HAS_BALANCE_REAL = 32  # máscara de nulos de balance_real
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _dt_to_sec(value: Optional[datetime]) -> int:
+    return int((value - _EPOCH).total_seconds()) if value is not None else 0
+
+def _sec_to_dt(value: int) -> datetime:
+    return _EPOCH + timedelta(seconds=value)
+
+
+class Codebook:
+    """Traduce valores categóricos (str | None) a códigos enteros pequeños."""
+    __slots__ = ("values", "_codes")
+
+    def __init__(self):
+        self.values: List[Optional[str]] = [None]
+        self._codes: Dict[Optional[str], int] = {None: 0}
+
+    def encode(self, value: Optional[str]) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self._codes[value] = code
+        return code
+
+    def code_of(self, value: Optional[str]) -> int:
+        """Código de un valor sin registrarlo (-1 si no aparece nunca)."""
+        return self._codes.get(value, -1)
+
+    def decode(self, code: int) -> Optional[str]:
+        return self.values[code]
+
+
+class HuntStore:
+    """
+    Almacén columnar de hunts: cada campo de HuntRecord vive en un array
+    tipado (array.array) en vez de en un objeto por hunt. Las categorías
+    (vocación, modo, zona, nivel) se guardan como códigos de un Codebook.
+
+    Iterar o indexar devuelve HuntView (vistas ligeras con la misma API de
+    atributos que HuntRecord). Las vistas son efímeras: remove() mueve la
+    última fila al hueco, así que no conviene guardarlas.
+
+    'index' (HuntIndex, bitsets por valor) se construye la primera vez que
+    se pide y desde entonces se mantiene en cada append/set/remove.
+    """
+    def __init__(self, records: Iterable[HuntRecord] = ()):
+        self.paths: List[str] = []
+        self.columns: Dict[str, array] = {name: array("q") for name in INT_COLUMNS}
+        self.columns["session_start"] = array("q")
+        self.columns["session_end"] = array("q")
+        for name in CODE_COLUMNS:
+            self.columns[name] = array("H")
+        self.columns["flags"] = array("B")
+        self.codebooks: Dict[str, Codebook] = {name: Codebook() for name in CODE_COLUMNS}
+        self._index: Dict[str, int] = {}
+        self._bitsets: Optional[HuntIndex] = None
+        for r in records:
+            self.append(r)
+
+    # ---------- tamaño / acceso ----------
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __iter__(self) -> Iterator["HuntView"]:
+        for i in range(len(self.paths)):
+            yield HuntView(self, i)
+
+    def __getitem__(self, row: int) -> "HuntView":
+        if row < 0:
+            row += len(self.paths)
+        if not 0 <= row < len(self.paths):
+            raise IndexError(row)
+        return HuntView(self, row)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._index
+
+    @property
+    def index(self) -> HuntIndex:
+        if self._bitsets is None:
+            self._bitsets = HuntIndex.build(self)
+        return self._bitsets
+
+    def _index_add(self, row: int) -> None:
+        if self._bitsets is not None:
+            cols = self.columns
+            self._bitsets.add_row(row, {n: cols[n][row] for n in CODE_COLUMNS},
+                                  bool(cols["flags"][row] & FLAG_ALL_META))
+
+    def _index_discard(self, row: int) -> None:
+        if self._bitsets is not None:
+            cols = self.columns
+            self._bitsets.discard_row(row, {n: cols[n][row] for n in CODE_COLUMNS},
+                                      bool(cols["flags"][row] & FLAG_ALL_META))
+
+    def row_of(self, path: str) -> int:
+        """Fila de un path (-1 si no está)."""
+        return self._index.get(path, -1)
+
+    def value(self, name: str, row: int):
+        """Valor de una columna en una fila, decodificando categorías."""
+        if name in self.codebooks:
+            return self.codebooks[name].decode(self.columns[name][row])
+        return self.columns[name][row]
+
+    def record(self, row: int) -> HuntRecord:
+        """Materializa la fila como HuntRecord (p. ej. para devolverla en un diff)."""
+        return HuntView(self, row).to_record()
+
+    # ---------- escritura ----------
+    def _encode(self, r: HuntRecord) -> Dict[str, int]:
+        flags = 0
+        if r.has_all_meta:
+            flags |= FLAG_ALL_META
+        if r.ignore_duo_balance:
+            flags |= FLAG_IGNORE_DUO_BALANCE
+        if r.raw_xp_gain is not None:
+            flags |= FLAG_HAS_RAW_XP
+        if r.session_start is not None:
+            flags |= FLAG_HAS_START
+        if r.session_end is not None:
+            flags |= FLAG_HAS_END
+        if r.balance_real is not None:
+            flags |= FLAG_HAS_BALANCE_REAL
+        vals = {
+            "duration_sec": int(r.duration_sec or 0),
+            "xp_gain": int(r.xp_gain or 0),
+            "raw_xp_gain": int(r.raw_xp_gain or 0),
+            "supplies": int(r.supplies or 0),
+            "loot": int(r.loot or 0),
+            "balance": int(r.balance or 0),
+            "balance_real": int(r.balance_real or 0),
+            "session_start": _dt_to_sec(r.session_start),
+            "session_end": _dt_to_sec(r.session_end),
+            "flags": flags,
+        }
+        for name in CODE_COLUMNS:
+            vals[name] = self.codebooks[name].encode(getattr(r, name))
+        return vals
+
+    def append(self, record: HuntRecord) -> int:
+        """Añade (o sustituye si el path ya existe). Devuelve la fila."""
+        row = self._index.get(record.path)
+        if row is not None:
+            self.set(row, record)
+            return row
+        for name, val in self._encode(record).items():
+            self.columns[name].append(val)
+        row = len(self.paths)
+        self.paths.append(record.path)
+        self._index[record.path] = row
+        self._index_add(row)
+        return row
+
+    def set(self, row: int, record: HuntRecord) -> None:
+        """Sobrescribe la fila 'row' con el contenido de 'record'."""
+        old_path = self.paths[row]
+        if old_path != record.path:
+            del self._index[old_path]
+            self._index[record.path] = row
+            self.paths[row] = record.path
+        self._index_discard(row)
+        for name, val in self._encode(record).items():
+            self.columns[name][row] = val
+        self._index_add(row)
+
+    def remove(self, path: str) -> Optional[HuntRecord]:
+        """
+        Quita el hunt de 'path' (swap con la última fila, O(1)).
+        Devuelve el HuntRecord eliminado o None si no estaba.
+        """
+        row = self._index.pop(path, None)
+        if row is None:
+            return None
+        removed = self.record(row)
+        last = len(self.paths) - 1
+        self._index_discard(row)
+        if row != last:
+            self._index_discard(last)
+            for col in self.columns.values():
+                col[row] = col[last]
+            moved = self.paths[last]
+            self.paths[row] = moved
+            self._index[moved] = row
+            self._index_add(row)
+        for col in self.columns.values():
+            col.pop()
+        self.paths.pop()
+        return removed
+
+    # ---------- consultas ----------
+    def distinct(self, name: str, complete_only: bool = False, **filters: Optional[str]) -> Set[str]:
+        """
+        Valores distintos (no vacíos) de una columna categórica.
+        - complete_only: solo hunts con todos los metadatos (has_all_meta).
+        - filters: igualdad sobre otras columnas categóricas, p. ej. vocation="Knight".
+          Un filtro vacío, None o "All" no filtra.
+        """
+        idx = self.index
+        return idx.available(name, idx.mask(complete_only, **filters))
+
+
+def _int_prop(name: str):
+    return property(lambda self: self._store.columns[name][self._row])
+
+def _code_prop(name: str):
+    return property(lambda self: self._store.codebooks[name].decode(self._store.columns[name][self._row]))
+
+def _flag_prop(bit: int):
+    return property(lambda self: bool(self._store.columns["flags"][self._row] & bit))
+
+def _dt_prop(name: str, bit: int):
+    def get(self):
+        if not self._store.columns["flags"][self._row] & bit:
+            return None
+        return _sec_to_dt(self._store.columns[name][self._row])
+    return property(get)
+
+
+class HuntView:
+    """Vista de solo lectura sobre una fila de HuntStore con la API de HuntRecord."""
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: HuntStore, row: int):
+        self._store = store
+        self._row = row
+
+    path = property(lambda self: self._store.paths[self._row])
+    duration_sec = _int_prop("duration_sec")
+    xp_gain = _int_prop("xp_gain")
+    supplies = _int_prop("supplies")
+    loot = _int_prop("loot")
+    balance = _int_prop("balance")
+    vocation = _code_prop("vocation")
+    mode = _code_prop("mode")
+    vocation_duo = _code_prop("vocation_duo")
+    zona = _code_prop("zona")
+    level_bucket = _code_prop("level_bucket")
+    has_all_meta = _flag_prop(FLAG_ALL_META)
+    ignore_duo_balance = _flag_prop(FLAG_IGNORE_DUO_BALANCE)
+    session_start = _dt_prop("session_start", FLAG_HAS_START)
+    session_end = _dt_prop("session_end", FLAG_HAS_END)
+
+    @property
+    def raw_xp_gain(self) -> Optional[int]:
+        if not self._store.columns["flags"][self._row] & FLAG_HAS_RAW_XP:
+            return None
+        return self._store.columns["raw_xp_gain"][self._row]
+
+    @property
+    def balance_real(self) -> Optional[int]:
+        if not self._store.columns["flags"][self._row] & FLAG_HAS_BALANCE_REAL:
+            return None
+        return self._store.columns["balance_real"][self._row]
+
+    @property
+    def source_raw(self) -> dict:
+        return load_source_raw(self.path)
+
+    def to_record(self) -> HuntRecord:
+        return HuntRecord(
+            path=self.path,
+            session_start=self.session_start,
+            session_end=self.session_end,
+            duration_sec=self.duration_sec,
+            xp_gain=self.xp_gain,
+            raw_xp_gain=self.raw_xp_gain,
+            supplies=self.supplies,
+            loot=self.loot,
+            balance=self.balance,
+            vocation=self.vocation,
+            mode=self.mode,
+            vocation_duo=self.vocation_duo,
+            zona=self.zona,
+            level_bucket=self.level_bucket,
+            has_all_meta=self.has_all_meta,
+            ignore_duo_balance=self.ignore_duo_balance,
+            balance_real=self.balance_real,
+        )
@@ -0,0 +1,156 @@
+# app/data/library_state.py
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.data.hunt_cache import HuntCache
+from app.data.hunt_store import HuntStore
+from app.data.loader import scan_library, load_records
+from app.data.schema import HuntRecord
+from app.services import library_generation
+
+
+@dataclass
+class LibraryDiff:
+    added: List[HuntRecord] = field(default_factory=list)
+    changed: List[Tuple[HuntRecord, HuntRecord]] = field(default_factory=list)  # (antes, después)
+    removed: List[HuntRecord] = field(default_factory=list)
+    failed: List[Tuple[str, str]] = field(default_factory=list)  # (path, error)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+class LibraryState:
+    """
+    Estado en memoria de la biblioteca: guarda la última foto del listado
+    (path -> tamaño, mtime_ns) y los hunts cargados en un HuntStore columnar.
+    refresh() compara el listado actual con esa foto y solo parsea los
+    ficheros nuevos o modificados; los borrados se descartan.
+
+    La caché de hunts se lee entera solo en la primera carga; después se
+    conserva descargada (HuntCache.release) y cada refresco añade al diario
+    únicamente las entradas de los ficheros que cambiaron.
+    """
+    def __init__(self, workers: int = 0):
+        self.workers = workers
+        self.store = HuntStore()
+        self._snapshot: Dict[str, Tuple[int, int]] = {}
+        self._failed: Dict[str, str] = {}
+        self._cache: Optional[HuntCache] = None
+
+    @property
+    def hunts(self) -> HuntStore:
+        return self.store
+
+    @property
+    def failed(self) -> List[Tuple[str, str]]:
+        return list(self._failed.items())
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def refresh(self) -> LibraryDiff:
+        diff = LibraryDiff()
+        listing, stat_failed = scan_library()
+        diff.failed.extend(stat_failed)
+
+        removed = [p for p in self._snapshot if p not in listing]
+        dirty = {p: sig for p, sig in listing.items() if self._snapshot.get(p) != sig}
+
+        if not removed and not dirty:
+            return diff
+
+        cache = self._hunt_cache()
+        self._apply(diff, removed, dirty, cache)
+
+        self._snapshot = listing
+        cache.prune(listing)   # primera carga: entradas de ficheros que ya no están
+        self._keep_cache(cache)
+        if diff:
+            library_generation.bump()
+        return diff
+
+    def refresh_paths(self, paths: Iterable[str]) -> LibraryDiff:
+        """
+        Como refresh(), pero solo para 'paths' (p. ej. lo que acaba de importar el
+        vigilante del origen): stat de esos ficheros, sin listar la biblioteca.
+        """
+        diff = LibraryDiff()
+        removed: List[str] = []
+        dirty: Dict[str, Tuple[int, int]] = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                if path in self._snapshot:
+                    removed.append(path)
+                continue
+            except OSError as e:
+                diff.failed.append((path, str(e)))
+                continue
+            sig = (st.st_size, st.st_mtime_ns)
+            if self._snapshot.get(path) != sig:
+                dirty[path] = sig
+
+        if not removed and not dirty:
+            return diff
+
+        cache = self._hunt_cache()
+        self._apply(diff, removed, dirty, cache)
+        for path in removed:
+            self._snapshot.pop(path, None)
+        self._snapshot.update(dirty)
+        self._keep_cache(cache)
+        if diff:
+            library_generation.bump()
+        return diff
+
+    def _hunt_cache(self) -> HuntCache:
+        # Entera solo la primera vez: luego lo que se parsea tiene firma nueva
+        # (no está en la caché) y basta con anotar los cambios
+        return self._cache if self._cache is not None else HuntCache.load()
+
+    def _keep_cache(self, cache: HuntCache) -> None:
+        cache.save()
+        cache.release()
+        self._cache = cache
+
+    def _apply(
+        self,
+        diff: LibraryDiff,
+        removed: List[str],
+        dirty: Dict[str, Tuple[int, int]],
+        cache: HuntCache,
+    ) -> None:
+        for path in removed:
+            self._failed.pop(path, None)
+            cache.forget(path)
+            old = self.store.remove(path)
+            if old is not None:
+                diff.removed.append(old)
+
+        if dirty:
+            result = load_records(dirty, cache, workers=self.workers)
+            loaded = {r.path: r for r in result.hunts}
+            for path in dirty:
+                new = loaded.get(path)
+                if new is None:
+                    # fallo de lectura: si antes era válido, deja de estarlo
+                    old = self.store.remove(path)
+                    if old is not None:
+                        diff.removed.append(old)
+                    continue
+                self._failed.pop(path, None)
+                row = self.store.row_of(path)
+                if row < 0:
+                    self.store.append(new)
+                    diff.added.append(new)
+                else:
+                    diff.changed.append((self.store.record(row), new))
+                    self.store.set(row, new)
+            for path, err in result.failed:
+                self._failed[path] = err
+            diff.failed.extend(result.failed)
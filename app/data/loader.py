@@ -1,18 +1,80 @@
 # app/data/loader.py
 import os
 import json
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
 from app.data.normalizer import normalize_json
+from app.data.hunt_cache import HuntCache
 from app.services.paths import library_dir
 
 # nombre del fichero auxiliar que NO es un hunt válido
 _IGNORE_FILENAME = "_dataset_seen_hashes.json"
 
-def load_hunts_from_library() -> List:
-    hunts = []
+# Lote de paths por tarea del pool (amortiza el coste de IPC/pickle)
+_CHUNK_SIZE = 256
+
+
+class LoadResult(NamedTuple):
+    hunts: List
+    failed: List[Tuple[str, str]]  # (path, error)
+
+
+def _parse_file(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return normalize_json(path, data)
+
+def _parse_chunk(paths: List[str]) -> List[Tuple[str, Optional[object], Optional[str]]]:
+    """Tarea del worker: parsea un lote y devuelve (path, record | None, error | None)."""
+    out = []
+    for path in paths:
+        try:
+            out.append((path, _parse_file(path), None))
+        except Exception as e:
+            out.append((path, None, str(e)))
+    return out
+
+def load_hunt_files(paths: List[str], workers: int = 0, chunk_size: int = _CHUNK_SIZE) -> LoadResult:
+    """
+    Parsea y normaliza una lista de ficheros, en el mismo orden recibido.
+    - workers <= 1: secuencial en este proceso.
+    - workers > 1: ProcessPoolExecutor, repartiendo lotes de 'chunk_size' paths.
+    Los ficheros que fallan se devuelven en LoadResult.failed (no se imprimen).
+    """
+    hunts: List = []
+    failed: List[Tuple[str, str]] = []
+    if not paths:
+        return LoadResult(hunts, failed)
+
+    chunk_size = max(1, int(chunk_size))
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+
+    def collect(results):
+        for chunk in results:
+            for path, record, err in chunk:
+                if record is None:
+                    failed.append((path, err or ""))
+                else:
+                    hunts.append(record)
+
+    if workers <= 1 or len(chunks) < 2:
+        collect(_parse_chunk(c) for c in chunks)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            # map conserva el orden de los lotes
+            collect(pool.map(_parse_chunk, chunks))
+    return LoadResult(hunts, failed)
+
+def scan_library() -> Tuple[Dict[str, Tuple[int, int]], List[Tuple[str, str]]]:
+    """
+    Lista los JSON de la biblioteca con su firma: {path: (tamaño, mtime_ns)}.
+    Devuelve también los ficheros cuyo stat falló.
+    """
+    listing: Dict[str, Tuple[int, int]] = {}
+    failed: List[Tuple[str, str]] = []
     lib = library_dir()
     if not os.path.isdir(lib):
-        return hunts
+        return listing, failed
 
     for entry in os.scandir(lib):
         if not entry.is_file() or not entry.name.lower().endswith(".json"):
@@ -20,12 +82,45 @@ def load_hunts_from_library() -> List:
         # ignorar el registro local de hashes del dataset
         if entry.name == _IGNORE_FILENAME:
             continue
-
-        path = entry.path
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            hunts.append(normalize_json(path, data))
-        except Exception as e:
-            print(f"Error leyendo {path}: {e}")
-    return hunts
+            st = entry.stat()
+        except OSError as e:
+            failed.append((entry.path, str(e)))
+            continue
+        listing[entry.path] = (st.st_size, st.st_mtime_ns)
+    return listing, failed
+
+def load_records(listing: Dict[str, Tuple[int, int]], cache: HuntCache, workers: int = 0) -> LoadResult:
+    """
+    Devuelve los HuntRecord de 'listing' (mismo orden): los que tienen firma
+    válida en la caché se restauran de ella y el resto se parsea y se cachea.
+    """
+    slots = [cache.get(path, size, mtime_ns) for path, (size, mtime_ns) in listing.items()]
+    misses = [p for p, rec in zip(listing, slots) if rec is None]
+    parsed = load_hunt_files(misses, workers=workers)
+    for record in parsed.hunts:
+        size, mtime_ns = listing[record.path]
+        cache.put(record, size, mtime_ns)
+
+    by_path = {r.path: r for r in parsed.hunts}
+    hunts = []
+    for path, rec in zip(listing, slots):
+        if rec is None:
+            rec = by_path.get(path)
+            if rec is None:
+                continue
+        hunts.append(rec)
+    return LoadResult(hunts, parsed.failed)
+
+def load_library(workers: int = 0) -> LoadResult:
+    """
+    Carga los hunts de la biblioteca. Solo se parsean los ficheros nuevos o
+    modificados (tamaño/mtime distintos); el resto sale de la caché persistente.
+    Con workers > 1 los ficheros a parsear se reparten en un pool de procesos.
+    """
+    listing, failed = scan_library()
+    cache = HuntCache.load()
+    result = load_records(listing, cache, workers=workers)
+    cache.prune(listing)
+    cache.save()
+    return LoadResult(result.hunts, failed + result.failed)
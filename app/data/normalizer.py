@@ -30,6 +30,18 @@ def parse_optional_int(value) -> Optional[int]:
     except Exception:
         return None
 
+def parse_balance_real(value) -> Optional[int]:
+    """
+    'Balance Real' tal como lo escribe el usuario: se ignoran separadores
+    (puntos, comas, espacios). Vacío o ilegible = None (no informado).
+    """
+    if value is None or str(value).strip() == "":
+        return None
+    try:
+        return int(re.sub(r"[^\d-]", "", str(value)))
+    except Exception:
+        return None
+
 def parse_duration_to_sec(duration_str: Optional[str]) -> int:
     if not duration_str or not isinstance(duration_str, str):
         return 0
@@ -55,7 +67,7 @@ def normalize_json(path: str, data: dict) -> HuntRecord:
     loot = parse_int(data.get("Loot"))
 
     # Nuevo: Balance Real opcional
-    balance_real = parse_optional_int(data.get("Balance Real"))
+    balance_real = parse_balance_real(data.get("Balance Real"))
     # Si no hay Balance Real, usa Balance (o loot - supplies como fallback)
     balance_std = parse_int(data.get("Balance")) if "Balance" in data else (loot - supplies)
     balance = balance_real if balance_real is not None else balance_std
@@ -112,6 +124,6 @@ def normalize_json(path: str, data: dict) -> HuntRecord:
         zona=zona,
         level_bucket=level_bucket,
         has_all_meta=has_all_meta,
-        source_raw=data,
         ignore_duo_balance=ignore_duo_balance,   # ← NUEVO
+        balance_real=balance_real,
     )
\ No newline at end of file
@@ -1,8 +1,14 @@
+import json
+import os
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
 from typing import Optional
 from datetime import datetime
 
+# Nº máximo de JSON originales (source_raw) que se mantienen en memoria
+_SOURCE_RAW_LRU = 64
+
 class Vocation(str, Enum):
     KNIGHT = "Knight"
     PALADIN = "Paladin"
@@ -14,7 +20,7 @@ class Mode(str, Enum):
     SOLO = "Solo"
     DUO = "Duo"
 
-@dataclass
+@dataclass(slots=True)
 class HuntRecord:
     path: str
     session_start: datetime
@@ -31,8 +37,16 @@ class HuntRecord:
     zona: Optional[str]
     level_bucket: Optional[str]  # nuevo: "301-350", etc.
     has_all_meta: bool
-    source_raw: dict
-    ignore_duo_balance: bool = False 
+    ignore_duo_balance: bool = False
+    balance_real: Optional[int] = None  # 'Balance Real' (solo Duo); None = no informado
+
+    @property
+    def source_raw(self) -> dict:
+        """
+        JSON original del hunt. No se guarda en el registro: se relee del disco
+        bajo demanda (con LRU acotado). Tratarlo como solo lectura.
+        """
+        return load_source_raw(self.path)
 
 @dataclass
 class AggregatedZone:
@@ -54,3 +68,25 @@ class AggregatedZone:
     loot_per_h_max: float = 0.0
     balance_per_h_min: float = 0.0
     balance_per_h_max: float = 0.0
+    # Percentiles (p10/p50/p90) por hunt de XP/h y Balance/h
+    xp_gain_per_h_p10: float = 0.0
+    xp_gain_per_h_p50: float = 0.0
+    xp_gain_per_h_p90: float = 0.0
+    balance_per_h_p10: float = 0.0
+    balance_per_h_p50: float = 0.0
+    balance_per_h_p90: float = 0.0
+
+
+@lru_cache(maxsize=_SOURCE_RAW_LRU)
+def _read_source_raw(path: str, mtime_ns: int) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data if isinstance(data, dict) else {}
+
+def load_source_raw(path: str) -> dict:
+    """Lee el JSON original de un hunt; {} si no se puede leer."""
+    try:
+        # el mtime en la clave invalida la entrada si el fichero se reescribe
+        return _read_source_raw(path, os.stat(path).st_mtime_ns)
+    except Exception:
+        return {}
@@ -5,6 +5,8 @@ import os
 import shutil
 from typing import Dict, Any
 
+from app.services import library_generation
+
 def _load_json(path: str) -> Dict[str, Any] | None:
     try:
         with open(path, "r", encoding="utf-8") as f:
@@ -13,6 +15,9 @@ def _load_json(path: str) -> Dict[str, Any] | None:
         return None
 
 def _atomic_write_json(path: str, data: Dict[str, Any]) -> bool:
+    # Nunca se escribe sobre 'path' in situ: tmp + os.replace crea un inodo nuevo,
+    # así que si la hunt se importó como hardlink al fichero del juego, el enlace
+    # se rompe aquí y el original de la carpeta de origen queda intacto.
     tmp = f"{path}.tmp"
     try:
         with open(tmp, "w", encoding="utf-8") as f:
@@ -33,6 +38,7 @@ def write_meta_to_json(path: str, updates: Dict[str, Any]) -> bool:
     Espera claves con los nombres que usas en PendingDialog:
       - "Vocation", "Mode", "Vocation duo", "Zona", "Level",
         "Balance Real", "Ignore Duo Balance"
+    La escritura es atómica y rompe un posible hardlink con la carpeta de origen.
     """
     if not path or not os.path.isfile(path):
         return False
@@ -57,4 +63,7 @@ def write_meta_to_json(path: str, updates: Dict[str, Any]) -> bool:
     for key in ["Vocation", "Mode", "Vocation duo", "Zona", "Level", "Balance Real", "Ignore Duo Balance"]:
         set_if_present(key)
 
-    return _atomic_write_json(path, data)
+    ok = _atomic_write_json(path, data)
+    if ok:
+        library_generation.bump()
+    return ok
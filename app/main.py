@@ -1,5 +1,6 @@
 import sys
 import os
+import multiprocessing
 from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QFontDatabase
 from app.services.paths import asset_path
@@ -58,4 +59,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # necesario para el pool de procesos del loader en el .exe (PyInstaller)
+    multiprocessing.freeze_support()
     main()
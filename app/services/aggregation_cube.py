@@ -0,0 +1,299 @@
+# app/services/aggregation_cube.py
+"""
+Cubo de agregación precalculado: para cada celda (vocación, modo, nivel)
+guarda, por zona, las sumas parciales y resúmenes de tamaño fijo de los ratios
+por hora (min/máx y sketch KLL de percentiles).
+Se construye una vez al cargar la biblioteca y luego se actualiza hunt a hunt;
+cada cambio de filtros es un lookup + merge O(zonas) en vez de recorrer todas
+las hunts.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.data.schema import HuntRecord, AggregatedZone
+from app.data.hunt_store import HuntStore
+from app.services.aggregator import STATS_HILO, _Row, _iter_rows, _iter_store, _include_balance, _hours
+from app.services.quantiles import RunningStats
+
+if TYPE_CHECKING:
+    from app.data.library_state import LibraryDiff
+
+# Valor "todos" (mismo literal que usa FiltersPanel)
+ALL = "All"
+
+CellKey = Tuple[str, str, str]  # (vocation, mode, level_bucket | ALL)
+
+
+# Métricas por hora con min/máx (nombre en el acumulador -> campo de AggregatedZone)
+_RATES = ("xp", "raw", "sup", "loot", "bal_std", "bal_duo")
+_SUMS = ("hunts", "sec", "xp", "sup", "loot", "raw", "raw_sec",
+         "bal_std", "bal_std_sec", "bal_duo", "bal_duo_sec")
+
+
+# Ratios de los que además se publican percentiles (sketch KLL)
+_PCT_RATES = ("xp", "bal_std", "bal_duo")
+
+
+def _rate_stats(with_sketch: bool = True) -> Dict[str, RunningStats]:
+    return {m: RunningStats(with_sketch=with_sketch and m in _PCT_RATES) for m in _RATES}
+
+
+class ZoneAcc:
+    """
+    Acumulador de una zona dentro de una celda. El balance se guarda con las
+    dos variantes de la regla Duo: 'duo' (filtro Mode == "Duo") y 'std' (resto).
+
+    Las sumas son enteras (exactas al sumar y restar). Los ratios por hora van
+    en RunningStats: min/máx en O(1) y, para XP/h y Balance/h, un sketch KLL,
+    así que la memoria por zona no crece con el número de hunts. Ni el min/máx
+    ni el sketch admiten borrados: remove() resta las sumas y deja la zona
+    'stale', y el cubo recalcula sus ratios desde el HuntStore (solo las filas
+    de esa celda y zona) la próxima vez que se consulta.
+    """
+    __slots__ = ("first", "stale", "rates") + _SUMS
+
+    def __init__(self, first: int):
+        self.first = first           # orden de primera aparición (desempate al ordenar)
+        self.stale = False
+        for name in _SUMS:
+            setattr(self, name, 0)
+        self.rates = _rate_stats()
+
+    def _update_sums(self, sign, dur, xp, raw, sup, loot, bal, h_mode, has_real, ignore_flag) -> None:
+        self.hunts += sign
+        self.sec += sign * dur
+        self.xp += sign * xp
+        self.sup += sign * sup
+        self.loot += sign * loot
+        if raw is not None:
+            self.raw += sign * raw
+            self.raw_sec += sign * dur
+        if _include_balance(None, h_mode, has_real, ignore_flag):
+            self.bal_std += sign * bal
+            self.bal_std_sec += sign * dur
+        if _include_balance("Duo", h_mode, has_real, ignore_flag):
+            self.bal_duo += sign * bal
+            self.bal_duo_sec += sign * dur
+
+    def add_rates(self, dur, xp, raw, sup, loot, bal, h_mode, has_real, ignore_flag) -> None:
+        hrs = _hours(dur)
+        if hrs <= 0:
+            return
+        rates = self.rates
+        rates["xp"].add(xp / hrs)
+        rates["sup"].add(sup / hrs)
+        rates["loot"].add(loot / hrs)
+        if raw is not None:
+            rates["raw"].add(raw / hrs)
+        if _include_balance(None, h_mode, has_real, ignore_flag):
+            rates["bal_std"].add(bal / hrs)
+        if _include_balance("Duo", h_mode, has_real, ignore_flag):
+            rates["bal_duo"].add(bal / hrs)
+
+    def add(self, seq, dur, xp, raw, sup, loot, bal, h_mode, has_real, ignore_flag) -> None:
+        self.first = min(self.first, seq)
+        self._update_sums(1, dur, xp, raw, sup, loot, bal, h_mode, has_real, ignore_flag)
+        if not self.stale:   # si no, el recálculo ya lo incluirá
+            self.add_rates(dur, xp, raw, sup, loot, bal, h_mode, has_real, ignore_flag)
+
+    def remove(self, dur, xp, raw, sup, loot, bal, h_mode, has_real, ignore_flag) -> None:
+        self._update_sums(-1, dur, xp, raw, sup, loot, bal, h_mode, has_real, ignore_flag)
+        self.stale = True
+
+
+class _Merged:
+    """Suma de varios ZoneAcc de la misma zona (solo lo que necesita la fila)."""
+    __slots__ = ("first", "rates") + _SUMS
+
+    def __init__(self, first: int, percentiles: bool = True):
+        self.first = first
+        for name in _SUMS:
+            setattr(self, name, 0)
+        self.rates = _rate_stats(with_sketch=percentiles)
+
+    def merge(self, acc: ZoneAcc) -> None:
+        self.first = min(self.first, acc.first)
+        for name in _SUMS:
+            setattr(self, name, getattr(self, name) + getattr(acc, name))
+        for m, stats in self.rates.items():
+            stats.merge(acc.rates[m])
+
+    def to_row(self, zona: str, duo_rule: bool) -> AggregatedZone:
+        hrs_total = _hours(self.sec)
+        hrs_raw = _hours(self.raw_sec)
+        if duo_rule:
+            bal_sum, bal_sec, bal = self.bal_duo, self.bal_duo_sec, self.rates["bal_duo"]
+        else:
+            bal_sum, bal_sec, bal = self.bal_std, self.bal_std_sec, self.rates["bal_std"]
+        hrs_bal = _hours(bal_sec)
+        xp = self.rates["xp"]
+        xp_min, xp_max = xp.minmax()
+        raw_min, raw_max = self.rates["raw"].minmax()
+        sup_min, sup_max = self.rates["sup"].minmax()
+        loot_min, loot_max = self.rates["loot"].minmax()
+        bal_min, bal_max = bal.minmax()
+        xp_p10, xp_p50, xp_p90 = xp.percentiles()
+        bal_p10, bal_p50, bal_p90 = bal.percentiles()
+
+        return AggregatedZone(
+            zona=zona,
+            hunts=self.hunts,
+            hours_total=hrs_total,
+            xp_gain_per_h=(self.xp / hrs_total) if hrs_total > 0 else 0.0,
+            raw_xp_gain_per_h=(self.raw / hrs_raw) if hrs_raw > 0 else 0.0,
+            supplies_per_h=(self.sup / hrs_total) if hrs_total > 0 else 0.0,
+            loot_per_h=(self.loot / hrs_total) if hrs_total > 0 else 0.0,
+            balance_per_h=(bal_sum / hrs_bal) if hrs_bal > 0 else 0.0,
+            xp_gain_per_h_min=xp_min, xp_gain_per_h_max=xp_max,
+            raw_xp_gain_per_h_min=raw_min, raw_xp_gain_per_h_max=raw_max,
+            supplies_per_h_min=sup_min, supplies_per_h_max=sup_max,
+            loot_per_h_min=loot_min, loot_per_h_max=loot_max,
+            balance_per_h_min=bal_min, balance_per_h_max=bal_max,
+            xp_gain_per_h_p10=xp_p10, xp_gain_per_h_p50=xp_p50, xp_gain_per_h_p90=xp_p90,
+            balance_per_h_p10=bal_p10, balance_per_h_p50=bal_p50, balance_per_h_p90=bal_p90,
+        )
+
+
+class AggregationCube:
+    """
+    Celdas (vocación, modo, nivel) -> {zona: ZoneAcc}, con el roll-up de nivel "All".
+    Se construye una vez con build() y después se mantiene con add/remove/replace
+    (o apply(diff) tras LibraryState.refresh()), en tiempo proporcional al cambio.
+
+    store: los hunts que resume el cubo, de donde se recalculan las zonas 'stale'.
+    Si es la biblioteca (build(store)), quien la modifica es el llamador, antes de
+    apply(); si el cubo se crea sin store (o desde registros sueltos), lleva uno
+    propio y add/remove/replace lo actualizan.
+    """
+
+    def __init__(self, store: Optional[HuntStore] = None):
+        self.cells: Dict[CellKey, Dict[str, ZoneAcc]] = {}
+        self._seq = 0   # contador de llegada (orden de primera aparición)
+        self._owns_store = store is None
+        self.store = store if store is not None else HuntStore()
+
+    @classmethod
+    def build(cls, hunts: Iterable[HuntRecord] | HuntStore) -> "AggregationCube":
+        if not isinstance(hunts, HuntStore):
+            cube = cls()
+            for hunt in hunts:
+                cube.add(hunt)
+            return cube
+        cube = cls(hunts)
+        for row in _iter_rows(hunts, None, None, None):
+            cube._add_row(row)
+        return cube
+
+    # ---------- mantenimiento incremental ----------
+    def _add_row(self, row: _Row) -> None:
+        zona, dur, xp, raw, sup, loot, bal, h_mode, has_real, ignore_flag, voc, lvl = row
+        seq = self._seq
+        self._seq += 1
+        for key in ((voc, h_mode, lvl), (voc, h_mode, ALL)):
+            zones = self.cells.setdefault(key, {})
+            acc = zones.get(zona)
+            if acc is None:
+                acc = zones[zona] = ZoneAcc(seq)
+            acc.add(seq, dur, xp, raw, sup, loot, bal, h_mode, has_real, ignore_flag)
+
+    def _remove_row(self, row: _Row) -> None:
+        zona, dur, xp, raw, sup, loot, bal, h_mode, has_real, ignore_flag, voc, lvl = row
+        for key in ((voc, h_mode, lvl), (voc, h_mode, ALL)):
+            zones = self.cells.get(key)
+            acc = zones.get(zona) if zones else None
+            if acc is None:
+                continue
+            acc.remove(dur, xp, raw, sup, loot, bal, h_mode, has_real, ignore_flag)
+            # zona/celda vacía -> fuera (así values() no ofrece opciones sin hunts)
+            if acc.hunts <= 0:
+                del zones[zona]
+                if not zones:
+                    del self.cells[key]
+
+    def add(self, hunt: HuntRecord) -> None:
+        if self._owns_store:
+            self.store.append(hunt)
+        for row in _iter_rows((hunt,), None, None, None):
+            self._add_row(row)
+
+    def remove(self, hunt: HuntRecord) -> None:
+        """Quita un hunt añadido antes (mismos valores que cuando se añadió)."""
+        if self._owns_store:
+            self.store.remove(hunt.path)
+        for row in _iter_rows((hunt,), None, None, None):
+            self._remove_row(row)
+
+    def replace(self, old: HuntRecord, new: HuntRecord) -> None:
+        self.remove(old)
+        self.add(new)
+
+    def apply(self, diff: "LibraryDiff") -> None:
+        """Aplica el resultado de LibraryState.refresh()."""
+        for old in diff.removed:
+            self.remove(old)
+        for old, new in diff.changed:
+            self.replace(old, new)
+        for new in diff.added:
+            self.add(new)
+
+    # ---------- consultas ----------
+    def _fresh(self, key: CellKey, zona: str, acc: ZoneAcc) -> ZoneAcc:
+        """Recalcula los ratios de una zona 'stale' desde el store (bitsets de la celda y la zona)."""
+        if acc.stale:
+            voc, mode, level = key
+            acc.rates = _rate_stats()
+            for row in _iter_store(self.store, voc, mode, level, zona=zona):
+                acc.add_rates(*row[1:10])
+            acc.stale = False
+        return acc
+
+    def _matching(
+        self, vocation: Optional[str], mode: Optional[str], level_filter: Optional[str],
+    ) -> List[Tuple[CellKey, Dict[str, ZoneAcc]]]:
+        level = level_filter if level_filter and level_filter != ALL else ALL
+        return [
+            (key, zones) for key, zones in self.cells.items()
+            if key[2] == level and (not vocation or key[0] == vocation) and (not mode or key[1] == mode)
+        ]
+
+    def rows(
+        self,
+        vocation: Optional[str],
+        mode: Optional[str],
+        level_filter: Optional[str] = None,
+        stats: str = STATS_HILO,
+    ) -> List[AggregatedZone]:
+        """Mismo resultado que aggregate_by_zone(hunts, vocation, mode, level_filter, stats=stats)."""
+        pct = stats == STATS_HILO
+        merged: Dict[str, _Merged] = {}
+        for key, zones in self._matching(vocation, mode, level_filter):
+            for zona, acc in zones.items():
+                m = merged.get(zona)
+                if m is None:
+                    m = merged[zona] = _Merged(acc.first, pct)
+                m.merge(self._fresh(key, zona, acc))
+
+        duo_rule = mode == "Duo"
+        ordered = sorted(merged.items(), key=lambda kv: kv[1].first)
+        rows = [m.to_row(zona, duo_rule) for zona, m in ordered]
+        rows.sort(key=lambda r: r.balance_per_h, reverse=True)
+        return rows
+
+    def values(self, field: str, vocation: Optional[str] = None, mode: Optional[str] = None) -> Set[str]:
+        """
+        Opciones disponibles ("vocation", "mode" o "level_bucket") entre las
+        hunts completas que cumplen los filtros dados ("All"/vacío = sin filtro).
+        """
+        pos = {"vocation": 0, "mode": 1, "level_bucket": 2}[field]
+        out: Set[str] = set()
+        for key in self.cells:
+            voc, m, lvl = key
+            if lvl == ALL:
+                continue
+            if vocation and vocation != ALL and voc != vocation:
+                continue
+            if mode and mode != ALL and m != mode:
+                continue
+            out.add(key[pos])
+        return out
@@ -1,32 +1,50 @@
 # app/services/aggregator.py
-from collections import defaultdict
-from typing import Iterable, List, Optional
+from collections import OrderedDict, defaultdict
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
 from app.data.schema import HuntRecord, AggregatedZone
+from app.data.hunt_index import iter_bits
+from app.data.hunt_store import HuntStore, FLAG_IGNORE_DUO_BALANCE, FLAG_HAS_RAW_XP, FLAG_HAS_BALANCE_REAL
+from app.services.aggregator_numpy import HAS_NUMPY, aggregate_store_numpy
+from app.services.quantiles import RunningStats
+from app.services import library_generation
+
+# Motores disponibles para aggregate_by_zone ("auto" = numpy si está instalado)
+ENGINES = ("python", "numpy", "auto")
+
+# Estadísticas a calcular: "basic" (medias + min/máx) o "hilo" (además percentiles)
+STATS_BASIC = "basic"
+STATS_HILO = "hilo"
+
+_RESULT_CACHE_SIZE = 32
+
+# Fila mínima que necesita la agregación:
+# (zona, duration_sec, xp_gain, raw_xp_gain | None, supplies, loot, balance,
+#  mode, tiene Balance Real, ignore_duo_balance, vocation, level_bucket)
+_Row = Tuple[str, int, int, Optional[int], int, int, int, Optional[str], bool, bool, Optional[str], Optional[str]]
 
 def _hours(sec: int) -> float:
     return sec / 3600.0 if sec else 0.0
 
 def _has_real_balance(h: HuntRecord) -> bool:
+    """True si el registro tiene un 'Balance Real' informado."""
+    return getattr(h, "balance_real", None) is not None
+
+def _include_balance(filter_mode: Optional[str], h_mode: Optional[str], has_real: bool, ignore_flag: bool) -> bool:
     """
-    True si el registro tiene un 'Balance Real' presente.
-    Intentamos varias variantes por compatibilidad con el loader.
+    ----- REGLA DE BALANCE -----
+    Si el filtro Mode == "Duo": SOLO computan hunts con Balance Real y SIN "Ignorar Balance".
+    En otros modos: mantenemos tu comportamiento previo (excluir Duo ignoradas).
     """
-    for attr in ("balance_real", "balance_real_value", "has_real_balance"):
-        v = getattr(h, attr, None)
-        if v is None:
-            continue
-        s = str(v).strip()
-        if s != "":
-            return True
-    return False
+    if filter_mode == "Duo":
+        return has_real and not ignore_flag
+    return not (h_mode == "Duo" and ignore_flag)
 
-def aggregate_by_zone(
+def _iter_records(
     hunts: Iterable[HuntRecord],
     vocation: Optional[str],
     mode: Optional[str],
-    level_filter: Optional[str] = None,  # "All" o un bucket
-) -> List[AggregatedZone]:
-    filtered: List[HuntRecord] = []
+    level_filter: Optional[str],
+) -> Iterator[_Row]:
     for h in hunts:
         if not h.has_all_meta or not h.zona:
             continue
@@ -37,7 +55,156 @@ def aggregate_by_zone(
         if level_filter and level_filter != "All":
             if h.level_bucket != level_filter:
                 continue
-        filtered.append(h)
+        yield (h.zona, h.duration_sec, h.xp_gain, h.raw_xp_gain, h.supplies, h.loot,
+               h.balance, h.mode, _has_real_balance(h), bool(getattr(h, "ignore_duo_balance", False)),
+               h.vocation, h.level_bucket)
+
+def _iter_store(
+    store: HuntStore,
+    vocation: Optional[str],
+    mode: Optional[str],
+    level_filter: Optional[str],
+    zona: Optional[str] = None,
+) -> Iterator[_Row]:
+    """Igual que _iter_records, pero el filtro es un AND de bitsets (HuntIndex); zona: solo esa."""
+    cols = store.columns
+    books = store.codebooks
+    if vocation == "All" or mode == "All":
+        return  # "All" solo es comodín para el nivel (igual que _iter_records)
+    mask = store.index.mask(complete_only=True, vocation=vocation, mode=mode, level_bucket=level_filter,
+                            zona=zona)
+
+    zona_c, voc_col, mode_col, lvl_col = cols["zona"], cols["vocation"], cols["mode"], cols["level_bucket"]
+    flags = cols["flags"]
+    dur, xp, raw = cols["duration_sec"], cols["xp_gain"], cols["raw_xp_gain"]
+    sup, loot, bal = cols["supplies"], cols["loot"], cols["balance"]
+    zonas, modes = books["zona"].values, books["mode"].values
+    vocs, lvls = books["vocation"].values, books["level_bucket"].values
+
+    for i in iter_bits(mask):
+        if not zona_c[i]:
+            continue
+        f = flags[i]
+        yield (zonas[zona_c[i]], dur[i], xp[i], raw[i] if f & FLAG_HAS_RAW_XP else None,
+               sup[i], loot[i], bal[i], modes[mode_col[i]], bool(f & FLAG_HAS_BALANCE_REAL),
+               bool(f & FLAG_IGNORE_DUO_BALANCE),
+               vocs[voc_col[i]], lvls[lvl_col[i]])
+
+def _iter_rows(
+    hunts: Iterable[HuntRecord] | HuntStore,
+    vocation: Optional[str],
+    mode: Optional[str],
+    level_filter: Optional[str],
+) -> Iterator[_Row]:
+    if isinstance(hunts, HuntStore):
+        return _iter_store(hunts, vocation, mode, level_filter)
+    return _iter_records(hunts, vocation, mode, level_filter)
+
+class ResultCache:
+    """
+    LRU de resultados de agregación. La clave es (generación de la biblioteca,
+    vocation, mode, level_filter, stats): cuando la biblioteca cambia
+    (library_generation.bump) las entradas viejas dejan de coincidir y se descartan.
+    Un resultado "hilo" sirve también para una petición "basic".
+    """
+    def __init__(self, maxsize: int = _RESULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[tuple, List[AggregatedZone]]" = OrderedDict()
+        self._generation = library_generation.current()
+
+    @staticmethod
+    def _key(vocation: Optional[str], mode: Optional[str], level_filter: Optional[str], stats: str) -> tuple:
+        # None, "" y "All" significan lo mismo (sin filtro)
+        level = level_filter if level_filter and level_filter != "All" else None
+        return (vocation or None, mode or None, level, stats)
+
+    def _sync_generation(self) -> None:
+        gen = library_generation.current()
+        if gen != self._generation:
+            self._data.clear()
+            self._generation = gen
+
+    def get(self, vocation, mode, level_filter, stats: str = STATS_HILO) -> Optional[List[AggregatedZone]]:
+        self._sync_generation()
+        candidates = [stats] if stats == STATS_HILO else [stats, STATS_HILO]
+        for st in candidates:
+            key = self._key(vocation, mode, level_filter, st)
+            rows = self._data.get(key)
+            if rows is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return list(rows)
+        self.misses += 1
+        return None
+
+    def put(self, vocation, mode, level_filter, stats: str, rows: List[AggregatedZone]) -> None:
+        self._sync_generation()
+        self._data[self._key(vocation, mode, level_filter, stats)] = list(rows)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get_or_compute(
+        self,
+        vocation: Optional[str],
+        mode: Optional[str],
+        level_filter: Optional[str],
+        stats: str,
+        compute: Callable[[], List[AggregatedZone]],
+    ) -> List[AggregatedZone]:
+        rows = self.get(vocation, mode, level_filter, stats)
+        if rows is None:
+            rows = compute()
+            self.put(vocation, mode, level_filter, stats, rows)
+        return rows
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def info(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "generation": self._generation,
+        }
+
+# Caché compartida para resultados sobre la biblioteca cargada
+RESULT_CACHE = ResultCache()
+
+def aggregate_by_zone(
+    hunts: Iterable[HuntRecord] | HuntStore,
+    vocation: Optional[str],
+    mode: Optional[str],
+    level_filter: Optional[str] = None,  # "All" o un bucket
+    engine: str = "python",
+    stats: str = STATS_HILO,
+    cached: bool = False,
+) -> List[AggregatedZone]:
+    """
+    Medias y min/máx por zona de las hunts que pasan el filtro.
+    engine: "python" (bucle puro), "numpy" (vectorizado) o "auto".
+    stats: STATS_HILO calcula también los percentiles; STATS_BASIC los deja a 0.
+    cached: usar RESULT_CACHE (solo si 'hunts' es la biblioteca cargada).
+    """
+    if cached:
+        return RESULT_CACHE.get_or_compute(
+            vocation, mode, level_filter, stats,
+            lambda: aggregate_by_zone(hunts, vocation, mode, level_filter, engine=engine, stats=stats),
+        )
+    if engine == "auto":
+        engine = "numpy" if HAS_NUMPY else "python"
+    if engine == "numpy":
+        store = hunts if isinstance(hunts, HuntStore) else HuntStore(hunts)
+        return aggregate_store_numpy(store, vocation, mode, level_filter,
+                                     percentiles=stats == STATS_HILO)
+    if engine != "python":
+        raise ValueError(f"motor de agregación desconocido: {engine}")
+    sketch = stats == STATS_HILO
+
+    filtered = _iter_rows(hunts, vocation, mode, level_filter)
 
     bucket = defaultdict(lambda: {
         "hunts": 0,
@@ -49,53 +216,47 @@ def aggregate_by_zone(
         "sup_sum": 0,
         "loot_sum": 0,
         "bal_sum": 0,         # ← numerador SOLO de hunts que cuentan para balance
-        "xp_list": [],
-        "raw_list": [],
-        "sup_list": [],
-        "loot_list": [],
-        "bal_list": [],       # ← lista para min/máx SOLO de hunts que cuentan para balance
+        # min/máx en O(1); XP/h y Balance/h además con sketch de percentiles
+        "xp_stats": RunningStats(with_sketch=sketch),
+        "raw_stats": RunningStats(),
+        "sup_stats": RunningStats(),
+        "loot_stats": RunningStats(),
+        "bal_stats": RunningStats(with_sketch=sketch),  # ← SOLO hunts que cuentan para balance
     })
 
-    for h in filtered:
-        hrs = _hours(h.duration_sec)
-        b = bucket[h.zona]
+    for zona, dur, xp, raw, sup, loot, bal, h_mode, has_real, ignore_flag, _voc, _lvl in filtered:
+        hrs = _hours(dur)
+        b = bucket[zona]
 
         b["hunts"] += 1
-        b["sec_sum"] += h.duration_sec
-        b["xp_sum"]  += h.xp_gain
-        b["sup_sum"] += h.supplies
-        b["loot_sum"]+= h.loot
-
-        # ----- REGLA DE BALANCE -----
-        # Si el filtro Mode == "Duo": SOLO computan hunts con Balance Real y SIN "Ignorar Balance".
-        # En otros modos: mantenemos tu comportamiento previo (excluir Duo ignoradas).
-        ignore_flag = bool(getattr(h, "ignore_duo_balance", False))
-        if mode == "Duo":
-            include_balance = _has_real_balance(h) and not ignore_flag
-        else:
-            include_balance = not (h.mode == "Duo" and ignore_flag)
+        b["sec_sum"] += dur
+        b["xp_sum"]  += xp
+        b["sup_sum"] += sup
+        b["loot_sum"]+= loot
+
+        include_balance = _include_balance(mode, h_mode, has_real, ignore_flag)
 
         if include_balance:
-            b["bal_sum"] += h.balance
+            b["bal_sum"] += bal
 
-        # Listas por hora (para medias simples y min/máx)
+        # Ratios por hora (min/máx y percentiles)
         if hrs > 0:
-            b["xp_list"].append(h.xp_gain / hrs)
-            b["sup_list"].append(h.supplies / hrs)
-            b["loot_list"].append(h.loot / hrs)
+            b["xp_stats"].add(xp / hrs)
+            b["sup_stats"].add(sup / hrs)
+            b["loot_stats"].add(loot / hrs)
             if include_balance:
-                b["bal_list"].append(h.balance / hrs)
+                b["bal_stats"].add(bal / hrs)
 
         # RAW (si está presente, acumulamos y calculamos por horas de los que lo tienen)
-        if h.raw_xp_gain is not None:
-            b["raw_sum"] += h.raw_xp_gain
-            b["raw_sec_sum"] += h.duration_sec
+        if raw is not None:
+            b["raw_sum"] += raw
+            b["raw_sec_sum"] += dur
             if hrs > 0:
-                b["raw_list"].append(h.raw_xp_gain / hrs)
+                b["raw_stats"].add(raw / hrs)
 
         # Denominador específico de Balance (solo hunts que cuentan para balance)
         if include_balance:
-            b["bal_sec_sum"] += h.duration_sec
+            b["bal_sec_sum"] += dur
 
     rows = []
     for zona, b in bucket.items():
@@ -109,13 +270,14 @@ def aggregate_by_zone(
         bal_h = (b["bal_sum"] / hrs_bal)   if hrs_bal   > 0 else 0.0  # ← usa denominador de balance
         raw_h = (b["raw_sum"] / hrs_raw)   if hrs_raw   > 0 else 0.0
 
-        # min/max
-        def _minmax(lst): return (min(lst), max(lst)) if lst else (0.0, 0.0)
-        xp_min, xp_max = _minmax(b["xp_list"])
-        raw_min, raw_max = _minmax(b["raw_list"])
-        sup_min, sup_max = _minmax(b["sup_list"])
-        loot_min, loot_max = _minmax(b["loot_list"])
-        bal_min, bal_max = _minmax(b["bal_list"])
+        # min/max y percentiles
+        xp_min, xp_max = b["xp_stats"].minmax()
+        raw_min, raw_max = b["raw_stats"].minmax()
+        sup_min, sup_max = b["sup_stats"].minmax()
+        loot_min, loot_max = b["loot_stats"].minmax()
+        bal_min, bal_max = b["bal_stats"].minmax()
+        xp_p10, xp_p50, xp_p90 = b["xp_stats"].percentiles()
+        bal_p10, bal_p50, bal_p90 = b["bal_stats"].percentiles()
 
         rows.append(AggregatedZone(
             zona=zona,
@@ -131,6 +293,8 @@ def aggregate_by_zone(
             supplies_per_h_min=sup_min, supplies_per_h_max=sup_max,
             loot_per_h_min=loot_min,   loot_per_h_max=loot_max,
             balance_per_h_min=bal_min, balance_per_h_max=bal_max,
+            xp_gain_per_h_p10=xp_p10, xp_gain_per_h_p50=xp_p50, xp_gain_per_h_p90=xp_p90,
+            balance_per_h_p10=bal_p10, balance_per_h_p50=bal_p50, balance_per_h_p90=bal_p90,
         ))
 
     rows.sort(key=lambda r: r.balance_per_h, reverse=True)
@@ -0,0 +1,182 @@
+# app/services/aggregator_numpy.py
+"""
+Motor vectorizado (NumPy) de aggregate_by_zone.
+Misma salida que el motor Python: mismas filas AggregatedZone, mismo orden
+y mismas reglas de balance (Duo / Balance Real / Ignore Duo Balance).
+Los percentiles se calculan exactos (el motor Python usa un sketch KLL, que
+coincide mientras la zona tiene <= 128 hunts).
+NumPy es opcional: si no está instalado, HAS_NUMPY = False.
+"""
+from __future__ import annotations
+
+from typing import List, Optional
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:  # dependencia opcional
+    np = None
+    HAS_NUMPY = False
+
+from app.data.schema import AggregatedZone
+from app.data.hunt_store import (
+    HuntStore, FLAG_ALL_META, FLAG_IGNORE_DUO_BALANCE, FLAG_HAS_RAW_XP, FLAG_HAS_BALANCE_REAL,
+)
+from app.services.quantiles import PERCENTILES
+
+
+def _col(store: HuntStore, name: str):
+    """Vista NumPy sin copia sobre una columna array.array del store."""
+    arr = store.columns[name]
+    dtype = {"q": np.int64, "H": np.uint16, "B": np.uint8}[arr.typecode]
+    return np.frombuffer(arr, dtype=dtype) if len(arr) else np.zeros(0, dtype=dtype)
+
+def _group_sum(values, starts):
+    return np.add.reduceat(values, starts) if len(values) else values
+
+def _group_minmax(rates, valid, starts):
+    """Min/max por grupo solo de las filas válidas; (0.0, 0.0) si el grupo no tiene ninguna."""
+    lo = np.minimum.reduceat(np.where(valid, rates, np.inf), starts)
+    hi = np.maximum.reduceat(np.where(valid, rates, -np.inf), starts)
+    return np.where(np.isfinite(lo), lo, 0.0), np.where(np.isfinite(hi), hi, 0.0)
+
+def _group_quantiles(rates, valid, group_ids, counts_all, qs):
+    """
+    Percentiles exactos por grupo (misma definición que quantiles.quantile_sorted);
+    0.0 en grupos sin filas válidas.
+    """
+    sel = np.flatnonzero(valid)
+    g = group_ids[sel]
+    v = rates[sel]
+    order = np.lexsort((v, g))
+    g, v = g[order], v[order]
+    counts = np.bincount(g, minlength=len(counts_all))
+    starts = np.r_[0, np.cumsum(counts)[:-1]]
+    out = []
+    for q in qs:
+        if not len(v):
+            out.append(np.zeros(len(counts)))
+            continue
+        idx = np.maximum(np.ceil(q * counts).astype(np.int64) - 1, 0)
+        pick = v[np.minimum(starts + idx, len(v) - 1)]
+        out.append(np.where(counts > 0, pick, 0.0))
+    return out
+
+def aggregate_store_numpy(
+    store: HuntStore,
+    vocation: Optional[str],
+    mode: Optional[str],
+    level_filter: Optional[str] = None,
+    percentiles: bool = True,
+) -> List[AggregatedZone]:
+    if not HAS_NUMPY:
+        raise ImportError("numpy no está instalado")
+    books = store.codebooks
+
+    # ---- máscara de filtro ----
+    flags = _col(store, "flags")
+    zona = _col(store, "zona")
+    mask = ((flags & FLAG_ALL_META) != 0) & (zona != 0)
+    for name, value in (("vocation", vocation), ("mode", mode), ("level_bucket", level_filter)):
+        if not value or (name == "level_bucket" and value == "All"):
+            continue
+        code = books[name].code_of(value)
+        if code < 0:
+            return []
+        mask &= _col(store, name) == code
+
+    idx = np.flatnonzero(mask)
+    if not len(idx):
+        return []
+
+    # ---- agrupar por zona conservando el orden de primera aparición ----
+    z = zona[idx]
+    order = np.argsort(z, kind="stable")
+    idx = idx[order]
+    zs = z[order]
+    starts = np.flatnonzero(np.r_[True, zs[1:] != zs[:-1]])
+    zone_codes = zs[starts]
+    first_seen = idx[starts]            # índice original de la primera hunt de cada zona
+
+    f = flags[idx]
+    dur = _col(store, "duration_sec")[idx]
+    xp = _col(store, "xp_gain")[idx]
+    raw = _col(store, "raw_xp_gain")[idx]
+    sup = _col(store, "supplies")[idx]
+    loot = _col(store, "loot")[idx]
+    bal = _col(store, "balance")[idx]
+    h_mode = _col(store, "mode")[idx]
+
+    has_raw = (f & FLAG_HAS_RAW_XP) != 0
+    ignore = (f & FLAG_IGNORE_DUO_BALANCE) != 0
+    has_real = (f & FLAG_HAS_BALANCE_REAL) != 0
+
+    # ----- REGLA DE BALANCE (igual que el motor Python) -----
+    if mode == "Duo":
+        include_balance = has_real & ~ignore
+    else:
+        duo_code = books["mode"].code_of("Duo")
+        include_balance = ~((h_mode == duo_code) & ignore)
+
+    zero = np.zeros_like(dur)
+    counts = np.diff(np.r_[starts, len(idx)])
+    sec_sum = _group_sum(dur, starts)
+    xp_sum = _group_sum(xp, starts)
+    sup_sum = _group_sum(sup, starts)
+    loot_sum = _group_sum(loot, starts)
+    bal_sum = _group_sum(np.where(include_balance, bal, zero), starts)
+    bal_sec_sum = _group_sum(np.where(include_balance, dur, zero), starts)
+    raw_sum = _group_sum(np.where(has_raw, raw, zero), starts)
+    raw_sec_sum = _group_sum(np.where(has_raw, dur, zero), starts)
+
+    # ---- ratios por hunt para min/máx ----
+    hrs = dur / 3600.0
+    pos = hrs > 0
+    safe_hrs = np.where(pos, hrs, 1.0)
+    xp_min, xp_max = _group_minmax(xp / safe_hrs, pos, starts)
+    sup_min, sup_max = _group_minmax(sup / safe_hrs, pos, starts)
+    loot_min, loot_max = _group_minmax(loot / safe_hrs, pos, starts)
+    raw_min, raw_max = _group_minmax(raw / safe_hrs, pos & has_raw, starts)
+    bal_min, bal_max = _group_minmax(bal / safe_hrs, pos & include_balance, starts)
+    if percentiles:
+        group_ids = np.repeat(np.arange(len(starts)), counts)
+        xp_p10, xp_p50, xp_p90 = _group_quantiles(xp / safe_hrs, pos, group_ids, counts, PERCENTILES)
+        bal_p10, bal_p50, bal_p90 = _group_quantiles(bal / safe_hrs, pos & include_balance, group_ids, counts, PERCENTILES)
+    else:
+        xp_p10 = xp_p50 = xp_p90 = bal_p10 = bal_p50 = bal_p90 = np.zeros(len(starts))
+
+    def per_h(total, secs):
+        hours = secs / 3600.0
+        return np.where(hours > 0, total / np.where(hours > 0, hours, 1.0), 0.0)
+
+    hours_total = sec_sum / 3600.0
+    xp_h = per_h(xp_sum, sec_sum)
+    sup_h = per_h(sup_sum, sec_sum)
+    loot_h = per_h(loot_sum, sec_sum)
+    bal_h = per_h(bal_sum, bal_sec_sum)
+    raw_h = per_h(raw_sum, raw_sec_sum)
+
+    rows = []
+    for g in np.argsort(first_seen, kind="stable").tolist():
+        rows.append(AggregatedZone(
+            zona=books["zona"].decode(int(zone_codes[g])),
+            hunts=int(counts[g]),
+            hours_total=float(hours_total[g]),
+            xp_gain_per_h=float(xp_h[g]),
+            raw_xp_gain_per_h=float(raw_h[g]),
+            supplies_per_h=float(sup_h[g]),
+            loot_per_h=float(loot_h[g]),
+            balance_per_h=float(bal_h[g]),
+            xp_gain_per_h_min=float(xp_min[g]),  xp_gain_per_h_max=float(xp_max[g]),
+            raw_xp_gain_per_h_min=float(raw_min[g]), raw_xp_gain_per_h_max=float(raw_max[g]),
+            supplies_per_h_min=float(sup_min[g]), supplies_per_h_max=float(sup_max[g]),
+            loot_per_h_min=float(loot_min[g]),   loot_per_h_max=float(loot_max[g]),
+            balance_per_h_min=float(bal_min[g]), balance_per_h_max=float(bal_max[g]),
+            xp_gain_per_h_p10=float(xp_p10[g]), xp_gain_per_h_p50=float(xp_p50[g]),
+            xp_gain_per_h_p90=float(xp_p90[g]),
+            balance_per_h_p10=float(bal_p10[g]), balance_per_h_p50=float(bal_p50[g]),
+            balance_per_h_p90=float(bal_p90[g]),
+        ))
+
+    rows.sort(key=lambda r: r.balance_per_h, reverse=True)
+    return rows
@@ -5,7 +5,13 @@ CONFIG_FILE = os.path.expanduser("~/.tibia_analyzer/config.json")
 
 DEFAULT_CONFIG = {
     "source_folder": "",
-    "language": "es"  # "es" o "en"
+    "language": "es",  # "es" o "en"
+    "load_workers": 0,  # >1 = parseo de la biblioteca en paralelo (procesos)
+    "hash_workers": 0,  # hilos para hashear en sync/descarga (0 = automático)
+    "import_strategy": "auto",  # "auto" | "reflink" | "hardlink" | "copy"
+    "watch_source": False,  # importar automáticamente lo nuevo de la carpeta de origen
+    "download_workers": 8,  # descargas simultáneas del dataset (conexiones keep-alive)
+    "dataset_bundle": True  # instalación nueva: bajar el bundle .tar.gz si el MANIFEST lo anuncia
 }
 
 def load_config():
@@ -21,3 +27,10 @@ def save_config(cfg: dict):
     os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
     with open(CONFIG_FILE, "w", encoding="utf-8") as f:
         json.dump(cfg, f, indent=2, ensure_ascii=False)
+
+def get_int(cfg: dict, key: str, default: int = 0) -> int:
+    """Lee un entero de la config tolerando valores vacíos o mal formados."""
+    try:
+        return int(cfg.get(key, default) or default)
+    except (TypeError, ValueError, AttributeError):
+        return default
@@ -0,0 +1,242 @@
+# app/services/dataset_bundle.py
+"""
+Paquete (bundle) del dataset público: un .tar.gz con by-hash/<sha256>.json,
+anunciado en el MANIFEST con su propio sha256 y tamaño:
+
+    {"entries": [...], "bundles": [{"path": "bundles/dataset-<n>.tar.gz",
+                                    "sha256": "...", "size": 123, "count": n}]}
+
+Una instalación nueva lo baja en una sola petición y lo extrae en streaming
+(tarfile en modo "r|*": sin buscar en el fichero, así que se procesa según
+llega); los deltas pequeños siguen bajando fichero a fichero. Se usa tar y no
+zip porque el índice del zip está al final y obliga a tenerlo entero antes
+de extraer nada.
+
+Publicar (mantenedores), sobre la copia local de datasets/json:
+    python -m app.services.dataset_bundle build datasets/json
+Benchmark instalación nueva, por ficheros vs bundle (servidor local):
+    python -m app.services.dataset_bundle bench --make 2000 --latency 20
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import tarfile
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+BUNDLE_DIR = "bundles"
+# Un hunt es un JSON pequeño: un miembro enorme es basura (o un ataque), no se lee
+_MAX_MEMBER_BYTES = 64 * 1024 * 1024
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BundleError(Exception):
+    pass
+
+
+def bundles_in(manifest: Any) -> List[Dict[str, Any]]:
+    """Descriptores de bundle válidos del MANIFEST (vacío si es el formato lista de siempre)."""
+    if not isinstance(manifest, dict):
+        return []
+    found = []
+    for b in manifest.get("bundles") or []:
+        if not isinstance(b, dict):
+            continue
+        path = str(b.get("path") or "").strip()
+        sha = str(b.get("sha256") or "").strip().lower()
+        if not path or not _SHA256_RE.match(sha) or not path.endswith((".tar", ".tar.gz", ".tgz")):
+            continue
+        try:
+            size = int(b.get("size") or 0)
+            count = int(b.get("count") or 0)
+        except (TypeError, ValueError):
+            continue
+        found.append({"path": path, "sha256": sha, "size": size, "count": count})
+    return found
+
+
+# ---------------------------------------------------------------------------
+# Lectura en streaming
+# ---------------------------------------------------------------------------
+class _HashingReader(io.RawIOBase):
+    """Envuelve la respuesta HTTP: sha256 y bytes de todo lo que pasa por read()."""
+    def __init__(self, raw: IO[bytes], on_bytes=None):
+        self._raw = raw
+        self._on_bytes = on_bytes
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buf) -> int:
+        data = self._raw.read(len(buf))
+        n = len(data)
+        buf[:n] = data
+        if n:
+            self.sha256.update(data)
+            self.size += n
+            if self._on_bytes is not None:
+                self._on_bytes(n)
+        return n
+
+    def drain(self) -> None:
+        # tarfile deja sin leer el relleno final: también cuenta para el sha256
+        while self.read(64 * 1024):
+            pass
+
+
+def iter_bundle(stream: IO[bytes], descriptor: Dict[str, Any], on_bytes=None) -> Iterator[Tuple[str, bytes]]:
+    """
+    Extrae en streaming y va dando (path_miembro, bytes) de cada .json.
+    Al agotarse comprueba tamaño y sha256 del bundle entero: si no cuadran lanza
+    BundleError, y el llamador debe descartar lo que haya recibido.
+    """
+    reader = _HashingReader(stream, on_bytes)
+    try:
+        with tarfile.open(fileobj=io.BufferedReader(reader, 256 * 1024), mode="r|*") as tar:
+            for member in tar:
+                if not member.isfile() or not member.name.endswith(".json"):
+                    continue
+                if member.size > _MAX_MEMBER_BYTES:
+                    raise BundleError(f"miembro demasiado grande: {member.name}")
+                f = tar.extractfile(member)
+                if f is None:
+                    continue
+                yield member.name.removeprefix("./"), f.read()
+    except tarfile.TarError as e:
+        raise BundleError(f"bundle corrupto: {e}") from e
+    reader.drain()
+    if descriptor.get("size") and reader.size != descriptor["size"]:
+        raise BundleError(f"tamaño {reader.size} != {descriptor['size']}")
+    if reader.sha256.hexdigest() != descriptor["sha256"]:
+        raise BundleError("sha256 del bundle no coincide")
+
+
+# ---------------------------------------------------------------------------
+# Construcción (lado del que publica)
+# ---------------------------------------------------------------------------
+def build_bundle(dataset_dir: str) -> Dict[str, Any]:
+    """
+    Empaqueta by-hash/*.json de las entradas del MANIFEST en bundles/dataset-<n>.tar.gz
+    (reproducible: orden fijo, mtime/uid a 0) y reescribe el MANIFEST con el
+    descriptor. Un MANIFEST en formato lista pasa a {"entries": [...]} sin tocar las entradas.
+    """
+    from app.services.dataset_fetch import _normalize_entries
+
+    manifest_path = os.path.join(dataset_dir, "MANIFEST.json")
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if isinstance(manifest, dict):
+        entries = manifest.get("entries") or manifest.get("files") or []
+        old = [b["path"] for b in bundles_in(manifest)]
+    else:
+        entries, old = manifest, []
+
+    members = []
+    seen = set()
+    for e in _normalize_entries(entries):
+        path = e["path"]
+        if path in seen or not os.path.isfile(os.path.join(dataset_dir, path)):
+            continue
+        seen.add(path)
+        members.append(path)
+
+    os.makedirs(os.path.join(dataset_dir, BUNDLE_DIR), exist_ok=True)
+    rel = f"{BUNDLE_DIR}/dataset-{len(members)}.tar.gz"
+    out = os.path.join(dataset_dir, rel)
+    tmp = f"{out}.tmp"
+    with open(tmp, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as gz, \
+            tarfile.open(fileobj=gz, mode="w|") as tar:
+        for path in members:
+            with open(os.path.join(dataset_dir, path), "rb") as f:
+                blob = f.read()
+            info = tarfile.TarInfo(path)
+            info.size = len(blob)
+            info.mode = 0o644
+            tar.addfile(info, io.BytesIO(blob))
+    os.replace(tmp, out)
+
+    sha = hashlib.sha256()
+    with open(out, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+    descriptor = {"path": rel, "sha256": sha.hexdigest(), "size": os.path.getsize(out), "count": len(members)}
+
+    new_manifest = dict(manifest) if isinstance(manifest, dict) else {"entries": entries}
+    new_manifest["bundles"] = [descriptor]
+    tmp = f"{manifest_path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(new_manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, manifest_path)
+
+    for path in old:
+        if path != rel:
+            try:
+                os.remove(os.path.join(dataset_dir, path))
+            except OSError:
+                pass
+    return descriptor
+
+
+# ---------------------------------------------------------------------------
+# CLI: build / bench
+# ---------------------------------------------------------------------------
+def _bench(args) -> None:
+    import shutil
+    import tempfile
+    import time
+
+    from app.services import http_pool
+    from app.services.dataset_fetch import download_dataset_to_library
+
+    root = tempfile.mkdtemp(prefix="bundle_bench_")
+    try:
+        http_pool.make_dataset_tree(root, args.make, args.size)
+        desc = build_bundle(os.path.join(root, "datasets", "json"))
+        server, base = http_pool.serve_directory(root, args.latency)
+        base += "/datasets/json"
+        print(f"{args.make} ficheros, bundle {desc['size'] / 1e6:.2f} MB, latencia {args.latency:g} ms")
+        for label, use_bundle in (("por ficheros", False), ("bundle", True)):
+            # instalación nueva en cada pasada: datos de usuario en un directorio temporal
+            home = tempfile.mkdtemp(prefix="bundle_home_", dir=root)
+            os.environ["XDG_DATA_HOME"] = os.environ["LOCALAPPDATA"] = home
+            _reset_library_dir()
+            t0 = time.perf_counter()
+            res = download_dataset_to_library(base_url=base, use_bundle=use_bundle)
+            dt = time.perf_counter() - t0
+            print(f"{label:>12}: {dt:7.2f} s  copiados={res.copied} errores={res.errors}")
+        server.shutdown()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def _reset_library_dir() -> None:
+    from app.services import paths
+    paths._LIB_DIR_CACHE = None
+
+
+def _main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Bundle .tar.gz del dataset público")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="empaqueta datasets/json y actualiza el MANIFEST")
+    b.add_argument("dataset_dir")
+    t = sub.add_parser("bench", help="instalación nueva: por ficheros vs bundle")
+    t.add_argument("--make", type=int, default=2000, help="nº de ficheros del dataset sintético")
+    t.add_argument("--size", type=int, default=1200, help="bytes por fichero")
+    t.add_argument("--latency", type=float, default=20.0, help="latencia simulada por petición (ms)")
+    args = ap.parse_args(argv)
+    if args.cmd == "build":
+        print(json.dumps(build_bundle(args.dataset_dir), indent=2))
+    else:
+        _bench(args)
+
+
+if __name__ == "__main__":
+    _main()
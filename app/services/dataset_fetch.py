@@ -1,16 +1,18 @@
 # app/services/dataset_fetch.py
 from __future__ import annotations
+import hashlib
 import json
 import os
 import re
-import tempfile
-import hashlib
-from typing import Dict, Tuple, List, Any, Set
-from urllib.request import urlopen, Request
-from urllib.error import URLError, HTTPError
+import shutil
+import time
+from typing import Dict, Tuple, List, Any, NamedTuple, Optional
 
-from app.services.paths import library_dir
-from app.services.library_sync import _same_json, _next_free_name
+from app.services.paths import library_dir, dataset_manifest_cache_path, dataset_staging_dir
+from app.services.library_index import Digests, LibraryIndex, json_fingerprint
+from app.services.library_sync import _next_free_name
+from app.services.jobs import JobControl
+from app.services import dataset_bundle, http_pool, library_generation
 
 # --- Config del repo remoto ---
 _GH_OWNER  = "WizGery"
@@ -18,96 +20,162 @@ _GH_REPO   = "tibia-analyzer"
 _GH_BRANCH = "main"
 
 _BASE_RAW     = f"https://raw.githubusercontent.com/{_GH_OWNER}/{_GH_REPO}/{_GH_BRANCH}/datasets/json"
-_URL_MANIFEST = f"{_BASE_RAW}/MANIFEST.json"
-
-# --- Archivo local de registro (se sincroniza con lo que haya físicamente) ---
-def _seen_hashes_path() -> str:
-    # Lo guardamos dentro de la propia biblioteca JSON del usuario
-    return os.path.join(library_dir(), "_dataset_seen_hashes.json")
 
+_MANIFEST_CACHE_VERSION = 1
 
-# =========================
-# Utilidades locales
-# =========================
-def _http_get_text(url: str, timeout: int = 20) -> str:
-    req = Request(url, headers={"User-Agent": "TibiaAnalyzer/1.0"})
-    with urlopen(req, timeout=timeout) as resp:
-        charset = resp.headers.get_content_charset() or "utf-8"
-        return resp.read().decode(charset, errors="replace")
+# El bundle compensa si faltan al menos tantos ficheros y esta fracción de los que trae
+# (con pocos, bajar el paquete entero cuesta más que las peticiones sueltas)
+_BUNDLE_MIN_FILES = 50
+_BUNDLE_MIN_RATIO = 0.25
 
 
-def _http_get_bytes(url: str, timeout: int = 30) -> bytes:
-    req = Request(url, headers={"User-Agent": "TibiaAnalyzer/1.0"})
-    with urlopen(req, timeout=timeout) as resp:
-        return resp.read()
+class ManifestCheck(NamedTuple):
+    manifest: Any
+    changed: bool        # False = 304 (se usó la copia local)
+    new_entries: int     # entradas del manifest posteriores a la última sincronización completa (solo para la UI)
+    synced: bool = False # el manifest es el mismo (304 o mismo sha1) que el de la última sincronización completa
 
 
-def _compute_sha256(path: str) -> str:
-    """Devuelve el sha256 (hex) de un archivo local."""
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
-    return h.hexdigest()
+class DownloadResult(NamedTuple):
+    copied: int
+    identical: int
+    errors: int                # incluye los rechazados
+    up_to_date: bool = False   # manifest sin cambios desde la última sincronización: no se descargó nada
+    rejected: int = 0          # no cuadraban con el sha256/size del MANIFEST (no se escribieron)
 
 
-def _scan_library_hashes() -> Set[str]:
+# =========================
+# MANIFEST (copia local + peticiones condicionales)
+# =========================
+def _load_manifest_cache() -> Dict[str, Any]:
     """
-    Calcula los sha256 de todos los .json presentes en la biblioteca.
-    Esto refleja exactamente lo que HAY en disco ahora mismo.
+    {"version", "url", "etag", "last_modified", "manifest_id", "manifest",
+     "checked_at", "synced_id", "synced_count", "synced_at"}
+    manifest_id = sha1 del MANIFEST tal cual llegó (no depende de que el servidor mande validadores).
     """
-    lib = library_dir()
-    os.makedirs(lib, exist_ok=True)
-    hashes: Set[str] = set()
     try:
-        for entry in os.scandir(lib):
-            if not entry.is_file():
-                continue
-            if not entry.name.lower().endswith(".json"):
-                continue
-            try:
-                sha = _compute_sha256(entry.path)
-                hashes.add(sha.lower())
-            except Exception:
-                # si no podemos leer uno, lo ignoramos sin romper el flujo
-                pass
+        with open(dataset_manifest_cache_path(), "r", encoding="utf-8") as f:
+            data = json.load(f)
     except Exception:
-        pass
-    return hashes
+        return {}
+    if not isinstance(data, dict) or data.get("version") != _MANIFEST_CACHE_VERSION:
+        return {}
+    return data
 
 
-def _load_seen_hashes() -> Set[str]:
-    """Lee el archivo local si existe (lista de sha en JSON)."""
-    p = _seen_hashes_path()
+def _save_manifest_cache(state: Dict[str, Any]) -> bool:
+    """Escritura atómica (tmp + os.replace)."""
+    path = dataset_manifest_cache_path()
+    tmp = f"{path}.tmp"
     try:
-        with open(p, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if isinstance(data, list):
-            return set(str(x).lower() for x in data)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({**state, "version": _MANIFEST_CACHE_VERSION},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+        return True
     except Exception:
-        pass
-    return set()
+        try:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        except Exception:
+            pass
+        return False
 
 
-def _save_seen_hashes(seen: Set[str]) -> None:
-    """Guarda el set de sha en disco (ordenado para diffs limpios)."""
-    p = _seen_hashes_path()
+def _new_entries(state: Dict[str, Any], count: int) -> int:
+    # El MANIFEST solo crece: lo nuevo es lo que hay de más respecto a la última sync completa
+    if not state.get("synced_id"):
+        return count
+    if state.get("synced_id") == state.get("manifest_id"):
+        return 0
+    return max(0, count - int(state.get("synced_count") or 0))
+
+
+def check_manifest(base_url: str = _BASE_RAW, pool: Optional[http_pool.HttpPool] = None) -> ManifestCheck:
+    """
+    GET condicional del MANIFEST (If-None-Match / If-Modified-Since con lo guardado).
+    304 -> se reutiliza la copia local sin descargar ni parsear nada nuevo.
+    200 -> se guarda el manifest con su ETag y Last-Modified.
+    Lanza excepción si hay fallo de red, status inesperado o JSON inválido.
+    """
+    url = f"{base_url}/MANIFEST.json"
+    state = _load_manifest_cache()
+    cached = state.get("url") == url and "manifest" in state
+
+    headers: Dict[str, str] = {}
+    if cached:
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+
+    own = pool is None
+    pool = pool or http_pool.HttpPool()
     try:
-        with open(p, "w", encoding="utf-8") as f:
-            json.dump(sorted(seen), f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
+        resp = pool.request(url, headers)
+    finally:
+        if own:
+            pool.close()
+
+    if resp.status == 304 and cached:
+        changed = False
+    elif resp.status == 200:
+        manifest = json.loads(resp.body.decode("utf-8", errors="replace"))
+        if state.get("url") != url:
+            # otro origen: la sincronización anterior no cuenta
+            state = {}
+        state.update(
+            url=url,
+            etag=resp.headers.get("etag", ""),
+            last_modified=resp.headers.get("last-modified", ""),
+            manifest_id=hashlib.sha1(resp.body).hexdigest(),
+            manifest=manifest,
+        )
+        changed = True
+    else:
+        raise http_pool.HttpStatusError(url, resp.status, resp.reason)
 
+    manifest = state["manifest"]
+    count = len(_normalize_entries(manifest))
+    state["checked_at"] = time.time()
+    state["new_entries"] = _new_entries(state, count)
+    _save_manifest_cache(state)
+    synced = bool(state.get("synced_id")) and state.get("synced_id") == state.get("manifest_id")
+    return ManifestCheck(manifest, changed, state["new_entries"], synced)
 
-# =========================
-# MANIFEST
-# =========================
-def fetch_manifest() -> Any:
-    text = _http_get_text(_URL_MANIFEST)
-    return json.loads(text)
+
+def fetch_manifest(base_url: str = _BASE_RAW, pool: Optional[http_pool.HttpPool] = None) -> Any:
+    return check_manifest(base_url, pool).manifest
+
+
+def _mark_synced() -> None:
+    """La pasada terminó entera y sin errores con el manifest guardado."""
+    state = _load_manifest_cache()
+    if "manifest" not in state:
+        return
+    state.update(
+        synced_id=state.get("manifest_id"),
+        synced_count=len(_normalize_entries(state["manifest"])),
+        synced_at=time.time(),
+        new_entries=0,
+    )
+    _save_manifest_cache(state)
 
 
-def _normalize_entries(manifest: Any) -> List[Dict[str, str]]:
+def dataset_status() -> Dict[str, Any]:
+    """
+    Para la UI, sin red: {"checked_at", "synced_at", "new_entries"} (None si nunca se hizo).
+    """
+    state = _load_manifest_cache()
+    return {
+        "checked_at": state.get("checked_at"),
+        "synced_at": state.get("synced_at"),
+        "new_entries": state.get("new_entries"),
+    }
+
+
+def _normalize_entries(manifest: Any) -> List[Dict[str, Any]]:
     """
     Acepta varios formatos de MANIFEST:
       - {"entries":[{"path":"by-hash/<sha>.json","original_name":"..."}]}
@@ -117,6 +185,7 @@ def _normalize_entries(manifest: Any) -> List[Dict[str, str]]:
       - [["by-hash/<sha>.json","Original.json"], ...]
       - etc.
     Produce una lista de dicts: {"path": "by-hash/<sha>.json", "original_name": "<name>.json"}
+    (+ "size": int si la entrada trae un tamaño válido).
     """
     if isinstance(manifest, dict):
         entries = manifest.get("entries") or manifest.get("files") or []
@@ -143,7 +212,14 @@ def _normalize_entries(manifest: Any) -> List[Dict[str, str]]:
                     path = f"by-hash/{path}"
 
             if path:
-                norm.append({"path": path, "original_name": orig})
+                e: Dict[str, Any] = {"path": path, "original_name": orig}
+                try:
+                    size = int(it.get("size") or 0)
+                except (TypeError, ValueError):
+                    size = 0
+                if size > 0:
+                    e["size"] = size
+                norm.append(e)
             continue
 
         if isinstance(it, str):
@@ -187,115 +263,364 @@ def _extract_sha_from_path(path: str) -> str:
 
 
 # =========================
-# Descarga principal
+# Verificación (sha256 + size del MANIFEST)
 # =========================
-def download_dataset_to_library() -> Tuple[int, int, int]:
-    """
-    Devuelve (copiados, ya_identicos, errores).
+_CHUNK = 64 * 1024
 
-    Comportamiento clave:
-    - No duplica por nombre ciegamente; deduplica por HASH (sha256) comparando
-      contra lo que EXISTE en la biblioteca local ahora (escaneo real).
-    - Si borras un archivo local, su hash ya no está en el set → se descarga de nuevo.
-    - _dataset_seen_hashes.json se sincroniza con el estado físico de la carpeta.
+
+class IntegrityError(Exception):
+    """Lo recibido no cuadra con el sha256 / size del MANIFEST: se rechaza."""
+
+
+class _Verifier:
     """
-    lib = library_dir()
-    os.makedirs(lib, exist_ok=True)
+    Acumula lo recibido calculando sha256 y sha1 a la vez (una pasada, sin
+    fichero temporal). matches() lo compara con el MANIFEST.
 
-    # 1) Hashes que HAY ahora mismo en disco
-    current_hashes = _scan_library_hashes()
+    Los JSON publicados se subieron con CRLF y el MANIFEST guarda sha256/size de
+    ese original, pero .gitattributes (*.json text eol=lf) los normaliza a LF en
+    el repo y raw.githubusercontent sirve la versión LF. Por eso también se
+    acepta el contenido si, devuelto a CRLF, da exactamente ese sha256 y size.
+    """
+    def __init__(self):
+        self._sha256 = hashlib.sha256()
+        self._sha1 = hashlib.sha1()
+        self._chunks: List[bytes] = []
+        self.size = 0
+
+    def feed(self, chunk: bytes) -> None:
+        self._sha256.update(chunk)
+        self._sha1.update(chunk)
+        self._chunks.append(chunk)
+        self.size += len(chunk)
+
+    def blob(self) -> bytes:
+        if len(self._chunks) != 1:
+            self._chunks = [b"".join(self._chunks)]
+        return self._chunks[0]
+
+    def matches(self, sha256: str, size: int) -> bool:
+        if len(sha256) != 64:
+            sha256 = ""   # sin sha256 completo en el MANIFEST (p. ej. un prefijo): solo el tamaño
+        if (not sha256 or self._sha256.hexdigest() == sha256) and (not size or self.size == size):
+            return True
+        blob = self.blob()
+        if b"\r" in blob or b"\n" not in blob:
+            return False
+        crlf = blob.replace(b"\n", b"\r\n")
+        return (not size or len(crlf) == size) and \
+            (not sha256 or hashlib.sha256(crlf).hexdigest() == sha256)
+
+    def digests(self) -> Digests:
+        """(sha256, sha1, huella JSON) de los bytes tal cual quedan en disco."""
+        return self._sha256.hexdigest(), self._sha1.hexdigest(), json_fingerprint(self.blob())
+
+
+def _fetch_verified(pool: http_pool.HttpPool, url: str, sha256: str, size: int) -> Tuple[bytes, Digests]:
+    """
+    Descarga en streaming hasheando según llega. Con 'size' se corta en cuanto
+    se pasa (sin bajar el resto). Lanza IntegrityError si no cuadra.
+    """
+    v = _Verifier()
+    with pool.stream(url) as resp:
+        declared = resp.getheader("Content-Length")
+        if size and declared and declared.isdigit() and int(declared) > size:
+            raise IntegrityError(f"{url}: Content-Length {declared} > size {size}")
+        while True:
+            chunk = resp.read(_CHUNK)
+            if not chunk:
+                break
+            v.feed(chunk)
+            if size and v.size > size:
+                raise IntegrityError(f"{url}: más de {size} bytes")
+    if not v.matches(sha256, size):
+        raise IntegrityError(f"{url}: sha256/size no coinciden con el MANIFEST")
+    return v.blob(), v.digests()
+
+
+def _remember_remote(index: LibraryIndex, remote_sha256: str, sha_real: str, fp: Optional[str]) -> None:
+    """
+    Contenido aceptado que ya estaba en la biblioteca: anota su sha256 del MANIFEST
+    para que la próxima pasada lo descarte sin pedirlo.
+    """
+    if not remote_sha256:
+        return
+    name = index.name_for_sha256(sha_real) or index.name_for_fingerprint(fp)
+    if name is not None:
+        index.add_remote(remote_sha256, name)
 
-    # 2) Sincronizamos el archivo local con lo que hay realmente
-    _save_seen_hashes(current_hashes)
 
-    # 3) Manifest remoto
+def _write_atomic(path: str, blob: bytes) -> None:
+    """Una sola escritura al destino final: .part + os.replace (nunca queda un .json a medias)."""
+    tmp = f"{path}.part"
     try:
-        manifest = fetch_manifest()
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, path)
     except Exception:
-        # fallo de red o parsing
-        return (0, 0, 1)
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
 
-    entries = _normalize_entries(manifest)
 
-    copied = 0
-    identical = 0
-    errors = 0
+# =========================
+# Bundle (.tar.gz en una sola petición)
+# =========================
+def _pick_bundle(manifest: Any, missing: int) -> Optional[Dict[str, Any]]:
+    bundles = dataset_bundle.bundles_in(manifest)
+    if not bundles or missing < _BUNDLE_MIN_FILES:
+        return None
+    best = max(bundles, key=lambda b: b["count"])
+    if missing < _BUNDLE_MIN_RATIO * best["count"]:
+        return None
+    return best
+
+
+def _fetch_bundle(
+    pool: http_pool.HttpPool,
+    base_url: str,
+    descriptor: Dict[str, Any],
+    todo: Dict[str, Tuple[str, str, int]],
+    index: LibraryIndex,
+    current_hashes: set,
+    control: Optional[JobControl],
+) -> Tuple[int, int, List[str]]:
+    """
+    Baja y extrae el bundle en streaming a una carpeta temporal; solo si el sha256
+    del paquete entero cuadra pasa los ficheros nuevos a la biblioteca.
+    Devuelve (copiados, idénticos, urls_resueltas). Si algo falla no se toca la
+    biblioteca y todo 'todo' queda para la descarga fichero a fichero.
+    """
+    lib = library_dir()
+    staging = dataset_staging_dir()
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging, exist_ok=True)
 
-    for e in entries:
-        by_hash_path = e.get("path", "").strip()
-        original_name = e.get("original_name", "").strip()
-        if not by_hash_path:
-            continue
-        if not original_name.lower().endswith(".json"):
-            original_name = (original_name or "hunt") + ".json"
+    staged: Dict[str, Tuple[str, Digests]] = {}   # url -> (original_name, digests)
+    staged_hashes: set = set()
+    staged_fps: set = set()
+    identical: set = set()
 
-        sha_from_path = _extract_sha_from_path(by_hash_path)
+    def on_bytes(n: int) -> None:
+        if control is not None:
+            control.step(0, bytes=n)
 
-        # 4) Si YA tenemos este hash en nuestra biblioteca, no descargamos.
-        if sha_from_path and (sha_from_path in current_hashes):
-            identical += 1
-            continue
-
-        file_url = f"{_BASE_RAW}/{by_hash_path}"
+    if control is not None:
+        control.set_stage("bundle", len(todo))
+    try:
+        with pool.stream(f"{base_url}/{descriptor['path']}") as resp:
+            for member, blob in dataset_bundle.iter_bundle(resp, descriptor, on_bytes):
+                if control is not None and control.cancelled:
+                    raise dataset_bundle.BundleError("cancelado")
+                file_url = f"{base_url}/{member}"
+                if file_url not in todo or file_url in staged or file_url in identical:
+                    continue
+                original_name, sha_from_path, size = todo[file_url]
+                v = _Verifier()
+                v.feed(blob)
+                if not v.matches(sha_from_path, size):
+                    continue   # miembro que no cuadra con el MANIFEST: se pedirá suelto
+                digests = v.digests()
+                sha_real, _sha1, fp = digests
+                if control is not None:
+                    control.step(scanned=1)
+                # fp None (JSON ilegible) no se compara: solo cuentan los bytes
+                if sha_real in current_hashes or sha_real in staged_hashes \
+                        or (fp and (fp in staged_fps or index.name_for_fingerprint(fp) is not None)):
+                    identical.add(file_url)
+                    _remember_remote(index, sha_from_path, sha_real, fp)
+                    continue
+                with open(os.path.join(staging, f"{sha_real}.json"), "wb") as f:
+                    f.write(blob)
+                staged[file_url] = (original_name, digests)
+                staged_hashes.add(sha_real)
+                if fp:
+                    staged_fps.add(fp)
+    except Exception:
+        # red, tar corrupto, sha256/tamaño que no cuadra o cancelación: nada del bundle vale
+        shutil.rmtree(staging, ignore_errors=True)
+        return 0, 0, []
+
+    # Verificado: al volumen de la biblioteca con os.replace (misma unidad que staging)
+    copied: List[str] = []
+    for file_url, (original_name, digests) in staged.items():
+        sha_real = digests[0]
+        name = original_name
+        if os.path.exists(os.path.join(lib, name)):
+            name = _next_free_name(lib, name)
         try:
-            blob = _http_get_bytes(file_url)
-        except (URLError, HTTPError, Exception):
-            errors += 1
-            continue
+            os.replace(os.path.join(staging, f"{sha_real}.json"), os.path.join(lib, name))
+            index.add_file(name, digests=digests)
+        except OSError:
+            continue   # se reintenta suelto
+        if todo[file_url][1]:
+            index.add_remote(todo[file_url][1], name)
+        current_hashes.add(sha_real)
+        copied.append(file_url)
+        if control is not None:
+            control.step(0, downloaded=1)
+    shutil.rmtree(staging, ignore_errors=True)
+    return len(copied), len(identical), copied + list(identical)
+
+
+# =========================
+# Descarga principal
+# =========================
+def download_dataset_to_library(
+    workers: int = 0,
+    control: Optional[JobControl] = None,
+    download_workers: int = 0,
+    base_url: str = _BASE_RAW,
+    force: bool = False,
+    use_bundle: bool = True,
+) -> DownloadResult:
+    """
+    Devuelve DownloadResult(copiados, ya_identicos, errores, al_dia).
+    workers: hilos para hashear la biblioteca local (0 = automático).
+    control: progreso y cancelación entre ficheros (lo descargado se conserva).
+    download_workers: descargas simultáneas (0 = http_pool.DEFAULT_WORKERS).
+    base_url: raíz de datasets/json (para probar contra un servidor local).
+    force: recorrer el manifest aunque no haya cambiado desde la última sincronización.
+    use_bundle: si el MANIFEST anuncia un bundle y falta buena parte de lo que trae,
+      bajarlo en una sola petición (dataset_bundle) en vez de fichero a fichero.
 
-        # Guardar temporal para comparaciones por contenido y calcular sha real
+    Comportamiento clave:
+    - Lo primero es un GET condicional del MANIFEST: si responde 304 (o trae el mismo
+      contenido) y la última pasada con ese manifest terminó bien, no se toca nada más
+      (ni índice ni descargas).
+    - No duplica por nombre ciegamente; deduplica por HASH (sha256) comparando
+      contra lo que EXISTE en la biblioteca local ahora (LibraryIndex). El sha256 del
+      MANIFEST de lo ya aceptado se guarda en el índice (LibraryIndex.remote), así que
+      lo que sigue en disco se descarta sin pedirlo aunque se sirva con otros bytes.
+    - Si borras un archivo local, su hash ya no está en el índice → se descarga de
+      nuevo en la siguiente pasada completa (manifest nuevo o force=True).
+    - El índice solo rehashea los ficheros nuevos o modificados desde la última vez.
+    - Las descargas van en paralelo sobre conexiones keep-alive (http_pool); cada
+      fichero se hashea mientras llega, se rechaza si no cuadra con el sha256/size
+      del MANIFEST y se escribe una sola vez, de forma atómica (.part + os.replace).
+    - Con bundle, lo que no viniera en él (entradas posteriores) se baja suelto; si el
+      bundle falla la verificación, se baja todo suelto.
+    """
+    lib = library_dir()
+    os.makedirs(lib, exist_ok=True)
+
+    pool = http_pool.HttpPool()
+    try:
+        # 1) Manifest remoto (condicional; misma conexión que luego usan las descargas)
+        if control is not None:
+            control.set_stage("check")
         try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".json") as tf:
-                tmp_path = tf.name
-                tf.write(blob)
+            check = check_manifest(base_url, pool)
         except Exception:
-            errors += 1
-            continue
+            # fallo de red o parsing
+            return DownloadResult(0, 0, 1)
+        # 304 (o el mismo manifest byte a byte) ya sincronizado entero: nada que hacer.
+        # new_entries no sirve aquí: una entrada sustituida no cambia el recuento
+        if check.synced and not force:
+            return DownloadResult(0, 0, 0, up_to_date=True)
+
+        # 2) Hashes que HAY ahora mismo en disco (índice + refresh incremental)
+        index = LibraryIndex.load()
+        index.refresh(workers, control)
+        if control is not None and control.cancelled:
+            index.save()
+            return DownloadResult(0, 0, 0)
+        current_hashes = index.sha256_set()
+
+        entries = _normalize_entries(check.manifest)
+
+        copied = 0
+        identical = 0
+        errors = 0
+        rejected = 0
+
+        # 3) Si YA tenemos este hash en nuestra biblioteca, no descargamos.
+        todo: Dict[str, Tuple[str, str, int]] = {}   # url -> (original_name, sha_del_path, size)
+        for e in entries:
+            by_hash_path = e.get("path", "").strip()
+            original_name = e.get("original_name", "").strip()
+            if not by_hash_path:
+                continue
+            if not original_name.lower().endswith(".json"):
+                original_name = (original_name or "hunt") + ".json"
 
-        try:
-            # Calculamos el hash REAL del blob descargado
-            sha_real = ""
+            sha_from_path = _extract_sha_from_path(by_hash_path)
+            file_url = f"{base_url}/{by_hash_path}"
+            if (sha_from_path and (sha_from_path in current_hashes or index.has_remote(sha_from_path))) \
+                    or file_url in todo:
+                identical += 1
+                continue
+            todo[file_url] = (original_name, sha_from_path, int(e.get("size") or 0))
+
+        # 4) Instalación nueva (o muy atrasada): bundle en una petición
+        bundle = _pick_bundle(check.manifest, len(todo)) if use_bundle else None
+        if bundle is not None:
+            n_copied, n_identical, resolved = _fetch_bundle(
+                pool, base_url, bundle, todo, index, current_hashes, control)
+            copied += n_copied
+            identical += n_identical
+            for file_url in resolved:
+                del todo[file_url]
+            if control is not None and control.cancelled:
+                todo.clear()
+
+        # 5) Resto (o todo, sin bundle) fichero a fichero
+        if control is not None:
+            control.set_stage("download", len(todo))
+        # Cada fichero se hashea según llega y se verifica contra el MANIFEST antes de escribirlo
+        fetched = http_pool.fetch_many(
+            todo, workers=download_workers or http_pool.DEFAULT_WORKERS, pool=pool, control=control,
+            fetch=lambda p, url: _fetch_verified(p, url, todo[url][1], todo[url][2]))
+        for file_url, result, err in fetched:
+            if control is not None:
+                control.step(scanned=1)
+            if result is None:
+                errors += 1
+                if isinstance(err, IntegrityError):
+                    rejected += 1
+                continue
+            original_name, sha_from_path, _size = todo[file_url]
+            blob, digests = result
             try:
-                sha_real = _compute_sha256(tmp_path)
-            except Exception:
-                pass
+                # Hash REAL (calculado durante la descarga) + huella del JSON canónico
+                sha_real, _sha1, fp = digests
 
-            # Si por lo que sea el sha del manifest no estaba, usamos el real para deduplicar
-            key_sha = (sha_from_path or sha_real).lower()
+                # Si por lo que sea el sha del manifest no estaba, usamos el real para deduplicar
+                key_sha = (sha_from_path or sha_real).lower()
 
-            # Si (por otro motivo) ya está en la biblio tras calcular el real, evitamos duplicar
-            if key_sha and (key_sha in current_hashes):
-                identical += 1
-            else:
-                dst = os.path.join(lib, original_name)
-                if not os.path.exists(dst):
-                    # No existe el nombre: guardamos
-                    with open(dst, "wb") as f:
-                        f.write(blob)
-                    copied += 1
+                # Mismos bytes, o mismo JSON con otro formato/nombre -> ya lo tenemos
+                if key_sha in current_hashes or sha_real in current_hashes \
+                        or index.name_for_fingerprint(fp) is not None:
+                    identical += 1
+                    _remember_remote(index, sha_from_path, sha_real, fp)
                 else:
-                    # Ya existe ese nombre. ¿Contenido idéntico?
-                    if _same_json(tmp_path, dst):
-                        identical += 1
-                    else:
-                        # Contenido diferente → nuevo nombre incremental
-                        new_name = _next_free_name(lib, original_name)
-                        with open(os.path.join(lib, new_name), "wb") as f:
-                            f.write(blob)
-                        copied += 1
+                    # Nombre ocupado (por contenido distinto) → nuevo nombre incremental
+                    name = original_name
+                    if os.path.exists(os.path.join(lib, name)):
+                        name = _next_free_name(lib, name)
+                    _write_atomic(os.path.join(lib, name), blob)
+                    index.add_file(name, blob, digests)
+                    if sha_from_path:
+                        index.add_remote(sha_from_path, name)
+                    copied += 1
+                    if control is not None:
+                        control.step(0, downloaded=1, bytes=len(blob))
 
                 # Añadimos el hash del que acabamos de dejar en disco
-                if key_sha:
-                    current_hashes.add(key_sha)
+                current_hashes.add(key_sha)
 
-        except Exception:
-            errors += 1
-        finally:
-            try:
-                os.remove(tmp_path)
             except Exception:
-                pass
-
-    # 5) Guardamos el estado final (sincronizado con lo que HAY)
-    _save_seen_hashes(current_hashes)
-    return copied, identical, errors
+                errors += 1
+    finally:
+        pool.close()
+
+    # 6) Guardamos el índice con lo que HAY (incluido lo recién descargado)
+    index.save()
+    if copied:
+        library_generation.bump()
+    # Solo una pasada entera y limpia permite saltarse la siguiente con un 304
+    if not errors and not (control is not None and control.cancelled):
+        _mark_synced()
+    return DownloadResult(copied, identical, errors, rejected=rejected)
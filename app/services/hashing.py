@@ -0,0 +1,177 @@
+# app/services/hashing.py
+"""
+Servicio común de hashing de ficheros (library_sync: sha1 de origen, LibraryIndex).
+hashlib libera el GIL con bloques grandes, así que los lotes se reparten en un
+pool de hilos. Cada hilo reutiliza su propio buffer (readinto sobre un bytearray
+preasignado) en vez de crear un bytes nuevo por bloque.
+
+Benchmark:  python -m app.services.hashing --make 50000 --workers 1,2,4,8
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from app.services.jobs import JobControl
+
+Algo = Union[str, Tuple[str, ...]]
+
+_BUF_SIZE = 1024 * 1024
+_MAX_AUTO_WORKERS = 8
+_CHUNK = 64   # ficheros por tarea del pool (menos overhead por future)
+
+_local = threading.local()
+
+
+def default_workers() -> int:
+    """Hilos por defecto (config 'hash_workers' = 0): núcleos, con tope."""
+    return max(1, min(_MAX_AUTO_WORKERS, os.cpu_count() or 1))
+
+
+def _buffer() -> memoryview:
+    buf = getattr(_local, "buf", None)
+    if buf is None:
+        buf = _local.buf = memoryview(bytearray(_BUF_SIZE))
+    return buf
+
+
+def hash_file(path: str, algo: Algo = "sha256"):
+    """
+    Hash hex de un fichero, leyendo en el buffer reutilizable del hilo.
+    Con una tupla de algoritmos (p. ej. ("sha256", "sha1")) lee una sola vez
+    y devuelve una tupla de hex en el mismo orden.
+    """
+    multi = not isinstance(algo, str)
+    hs = [hashlib.new(a) for a in (algo if multi else (algo,))]
+    buf = _buffer()
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            chunk = buf[:n]
+            for h in hs:
+                h.update(chunk)
+    if multi:
+        return tuple(h.hexdigest() for h in hs)
+    return hs[0].hexdigest()
+
+
+def _safe_call(fn: Callable[[str], Any], path: str) -> Tuple[str, Any, Optional[str]]:
+    try:
+        return path, fn(path), None
+    except Exception as e:
+        return path, None, str(e)
+
+
+def _map_chunk(
+    fn: Callable[[str], Any],
+    paths: List[str],
+    control: Optional["JobControl"] = None,
+) -> List[Tuple[str, Any, Optional[str]]]:
+    # Cancelado: los lotes que quedan no se leen (sus ficheros no salen en el resultado)
+    if control is not None and control.cancelled:
+        return []
+    out = [_safe_call(fn, p) for p in paths]
+    if control is not None:
+        control.step(len(paths), hashed=len(paths))
+    return out
+
+
+def map_files(
+    fn: Callable[[str], Any],
+    paths: Iterable[str],
+    workers: int = 0,
+    control: Optional["JobControl"] = None,
+) -> Tuple[Dict[str, Any], List[Tuple[str, str]]]:
+    """
+    Aplica fn(path) a un lote de ficheros en el pool. Devuelve
+    ({path: resultado}, [(path, error)]).
+    workers: 0 = default_workers(); 1 = secuencial en el hilo actual.
+    control: progreso por lote y cancelación entre lotes (opcional).
+    """
+    paths = list(paths)
+    if workers <= 0:
+        workers = default_workers()
+    workers = min(workers, len(paths)) or 1
+
+    chunks = [paths[i:i + _CHUNK] for i in range(0, len(paths), _CHUNK)]
+    if workers == 1:
+        return _collect(r for chunk in chunks for r in _map_chunk(fn, chunk, control))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hash") as pool:
+        results = pool.map(_map_chunk, [fn] * len(chunks), chunks, [control] * len(chunks))
+        return _collect(r for chunk in results for r in chunk)
+
+
+def hash_files(
+    paths: Iterable[str],
+    algo: Algo = "sha256",
+    workers: int = 0,
+    control: Optional["JobControl"] = None,
+) -> Tuple[Dict[str, str], List[Tuple[str, str]]]:
+    """
+    Hashea un lote de ficheros. Devuelve ({path: hex}, [(path, error)])
+    (con una tupla de algoritmos, cada valor es una tupla de hex).
+    """
+    return map_files(lambda p: hash_file(p, algo), paths, workers, control)
+
+
+def _collect(results) -> Tuple[Dict[str, Any], List[Tuple[str, str]]]:
+    hashes: Dict[str, Any] = {}
+    failed: List[Tuple[str, str]] = []
+    for path, digest, err in results:
+        if digest is None:
+            failed.append((path, err or ""))
+        else:
+            hashes[path] = digest
+    return hashes, failed
+
+
+# ---------------------------------------------------------------------------
+# Benchmark: throughput según nº de hilos
+# ---------------------------------------------------------------------------
+def _make_folder(n: int, size: int) -> str:
+    import tempfile
+    folder = tempfile.mkdtemp(prefix="hash_bench_")
+    block = os.urandom(size)
+    for i in range(n):
+        with open(os.path.join(folder, f"hunt_{i:06d}.json"), "wb") as f:
+            f.write(block[i % 97:] + block[:i % 97])
+    return folder
+
+
+def _bench(argv: Optional[List[str]] = None) -> None:
+    import argparse
+    import shutil
+    import time
+
+    ap = argparse.ArgumentParser(description="Throughput de hash_files() según nº de hilos")
+    ap.add_argument("folder", nargs="?", help="carpeta con .json (si no, --make)")
+    ap.add_argument("--make", type=int, default=0, help="crear N ficheros sintéticos")
+    ap.add_argument("--size", type=int, default=4096, help="bytes por fichero sintético")
+    ap.add_argument("--workers", default="1,2,4,8", help="lista de nº de hilos")
+    ap.add_argument("--algo", default="sha256")
+    args = ap.parse_args(argv)
+
+    folder = args.folder or _make_folder(args.make or 50000, args.size)
+    paths = [e.path for e in os.scandir(folder) if e.is_file() and e.name.lower().endswith(".json")]
+    total = sum(os.path.getsize(p) for p in paths)
+    print(f"{len(paths)} ficheros, {total / 1e6:.1f} MB, {args.algo}, cpu={os.cpu_count()}")
+    try:
+        for w in (int(x) for x in args.workers.split(",")):
+            t0 = time.perf_counter()
+            hashes, failed = hash_files(paths, args.algo, workers=w)
+            dt = time.perf_counter() - t0
+            print(f"workers={w:>2}  {dt:7.2f} s  {len(paths) / dt:9.0f} fich/s  "
+                  f"{total / dt / 1e6:7.1f} MB/s  errores={len(failed)}")
+    finally:
+        if not args.folder:
+            shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    _bench()
@@ -0,0 +1,328 @@
+# app/services/http_pool.py
+"""
+Descargas HTTP concurrentes con conexiones persistentes (HTTP/1.1 keep-alive).
+
+Cada hilo del pool guarda una http.client.HTTP(S)Connection por host y la
+reutiliza para todas sus peticiones: con miles de ficheros pequeños se ahorra
+un handshake TCP+TLS por fichero, que era casi todo el tiempo de urlopen().
+fetch_many() mantiene una ventana acotada de peticiones en vuelo y entrega
+los resultados según terminan, para que el llamador los escriba sin esperar
+al resto.
+
+Benchmark (servidor local con latencia simulada):
+    python -m app.services.http_pool --make 2000 --latency 20 --workers 1,4,8,16
+"""
+from __future__ import annotations
+
+import http.client
+import threading
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+if TYPE_CHECKING:
+    from app.services.jobs import JobControl
+
+USER_AGENT = "TibiaAnalyzer/1.0"
+DEFAULT_WORKERS = 8
+_MAX_REDIRECTS = 3
+# Errores de una conexión reutilizada que el servidor ya cerró: se reintenta una vez
+_RETRY_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                 ConnectionResetError, BrokenPipeError, ConnectionAbortedError)
+
+
+class HttpStatusError(Exception):
+    def __init__(self, url: str, status: int, reason: str = ""):
+        super().__init__(f"HTTP {status} {reason} ({url})".strip())
+        self.url = url
+        self.status = status
+
+
+class HttpResponse(NamedTuple):
+    status: int
+    reason: str
+    headers: Dict[str, str]   # nombres en minúsculas
+    body: bytes
+
+
+class HttpPool:
+    """Conexiones keep-alive por (hilo, esquema, host, puerto)."""
+    def __init__(self, timeout: float = 30.0):
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all: List[http.client.HTTPConnection] = []
+
+    def _conn(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        conns: Dict[Tuple[str, str], http.client.HTTPConnection] = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        key = (scheme, netloc)
+        conn = conns.get(key)
+        if conn is None:
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = conns[key] = cls(netloc, timeout=self.timeout)
+            with self._lock:
+                self._all.append(conn)
+        return conn
+
+    def _drop(self, scheme: str, netloc: str) -> None:
+        conn = getattr(self._local, "conns", {}).pop((scheme, netloc), None)
+        if conn is not None:
+            # fuera de _all también: close() no debe tocarla y la lista no crece con los errores
+            with self._lock:
+                try:
+                    self._all.remove(conn)
+                except ValueError:
+                    pass
+            conn.close()
+
+    def get(self, url: str) -> bytes:
+        """GET completo (sigue redirecciones); lanza HttpStatusError si no es 200."""
+        resp = self.request(url)
+        if resp.status != 200:
+            raise HttpStatusError(url, resp.status, resp.reason)
+        return resp.body
+
+    def request(self, url: str, headers: Optional[Dict[str, str]] = None) -> "HttpResponse":
+        """GET con cabeceras extra (p. ej. If-None-Match); sigue redirecciones, no valida el status."""
+        for _ in range(_MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            path = parts.path or "/"
+            if parts.query:
+                path += "?" + parts.query
+            resp = self._request(parts.scheme, parts.netloc, path, headers or {})
+            location = resp.headers.get("location", "")
+            if resp.status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                continue
+            return resp
+        raise HttpStatusError(url, resp.status, "too many redirects")
+
+    @contextmanager
+    def stream(self, url: str) -> Iterator[http.client.HTTPResponse]:
+        """
+        GET sin leer el cuerpo: cede la respuesta (read() por trozos) para
+        procesarla mientras llega. Lanza HttpStatusError si no es 200.
+        Si el llamador no la lee entera, la conexión se descarta al salir.
+        """
+        for _ in range(_MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            path = parts.path or "/"
+            if parts.query:
+                path += "?" + parts.query
+            resp = self._send(parts.scheme, parts.netloc, path, {})
+            location = resp.getheader("Location", "")
+            if resp.status == 200:
+                break
+            self._finish(parts.scheme, parts.netloc, resp, read=True)
+            if resp.status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                continue
+            raise HttpStatusError(url, resp.status, resp.reason)
+        else:
+            raise HttpStatusError(url, resp.status, "too many redirects")
+        try:
+            yield resp
+        finally:
+            self._finish(parts.scheme, parts.netloc, resp, read=False)
+
+    def _send(self, scheme: str, netloc: str, path: str, extra: Dict[str, str]) -> http.client.HTTPResponse:
+        headers = {"User-Agent": USER_AGENT, "Connection": "keep-alive", **extra}
+        for attempt in (0, 1):
+            conn = self._conn(scheme, netloc)
+            try:
+                conn.request("GET", path, headers=headers)
+                return conn.getresponse()
+            except _RETRY_ERRORS:
+                self._drop(scheme, netloc)
+                if attempt:
+                    raise
+            except Exception:
+                self._drop(scheme, netloc)
+                raise
+        raise ConnectionError(f"{scheme}://{netloc}{path}")
+
+    def _finish(self, scheme: str, netloc: str, resp: http.client.HTTPResponse, read: bool) -> None:
+        # Solo una respuesta leída entera deja la conexión lista para la siguiente
+        try:
+            if read:
+                resp.read()
+        except Exception:
+            pass
+        if not resp.isclosed() or resp.will_close:
+            self._drop(scheme, netloc)
+
+    def _request(self, scheme: str, netloc: str, path: str, extra: Dict[str, str]) -> "HttpResponse":
+        resp = self._send(scheme, netloc, path, extra)
+        try:
+            body = resp.read()   # leer entero: la conexión queda libre para la siguiente
+        except Exception:
+            self._drop(scheme, netloc)
+            raise
+        if resp.will_close:
+            self._drop(scheme, netloc)
+        return HttpResponse(resp.status, resp.reason,
+                            {k.lower(): v for k, v in resp.getheaders()}, body)
+
+    def close(self) -> None:
+        with self._lock:
+            conns, self._all = self._all, []
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def fetch_many(
+    urls: Iterable[str],
+    workers: int = DEFAULT_WORKERS,
+    pool: Optional[HttpPool] = None,
+    control: Optional["JobControl"] = None,
+    fetch: Optional[Callable[[HttpPool, str], Any]] = None,
+) -> Iterator[Tuple[str, Any, Optional[Exception]]]:
+    """
+    Descarga 'urls' con 'workers' hilos y va entregando (url, resultado | None, excepción | None)
+    en orden de llegada. Como mucho 4 * workers peticiones en vuelo (memoria acotada).
+    Si control se cancela, no se lanzan más peticiones y se termina tras las que estén en curso.
+    fetch(pool, url): qué hacer con cada url (por defecto pool.get -> bytes); p. ej.
+    leer con pool.stream() y verificar mientras llega.
+    """
+    own_pool = pool is None
+    pool = pool or HttpPool()
+    workers = max(1, workers)
+    window = workers * 4
+    it = iter(urls)
+
+    fetch = fetch or HttpPool.get
+
+    def run(url: str) -> Tuple[str, Any, Optional[Exception]]:
+        try:
+            return url, fetch(pool, url), None
+        except Exception as e:
+            return url, None, e
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http") as ex:
+            in_flight: set[Future] = set()
+            exhausted = False
+            while True:
+                while not exhausted and len(in_flight) < window:
+                    if control is not None and control.cancelled:
+                        exhausted = True
+                        break
+                    url = next(it, None)
+                    if url is None:
+                        exhausted = True
+                        break
+                    in_flight.add(ex.submit(run, url))
+                if not in_flight:
+                    return
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield fut.result()
+    finally:
+        if own_pool:
+            pool.close()
+
+
+# ---------------------------------------------------------------------------
+# Benchmark: servidor http.server local que imita datasets/json
+# ---------------------------------------------------------------------------
+def make_dataset_tree(root: str, n: int, size: int = 1200) -> List[str]:
+    """Crea <root>/datasets/json/{MANIFEST.json, by-hash/<sha256>.json}; devuelve los paths."""
+    import hashlib
+    import json
+    import os
+
+    base = os.path.join(root, "datasets", "json")
+    os.makedirs(os.path.join(base, "by-hash"), exist_ok=True)
+    entries = []
+    for i in range(n):
+        blob = json.dumps({"Session start": f"2024-01-01, 00:00:{i:05d}",
+                           "pad": "x" * max(0, size - 60)}).encode()
+        sha = hashlib.sha256(blob).hexdigest()
+        with open(os.path.join(base, "by-hash", f"{sha}.json"), "wb") as f:
+            f.write(blob)
+        entries.append({"path": f"by-hash/{sha}.json", "original_name": f"Hunt_{i:06d}.json"})
+    with open(os.path.join(base, "MANIFEST.json"), "w", encoding="utf-8") as f:
+        json.dump({"entries": entries}, f)
+    return [e["path"] for e in entries]
+
+
+def serve_directory(root: str, latency_ms: float = 0.0):
+    """
+    ThreadingHTTPServer (HTTP/1.1, keep-alive) sobre 'root' en 127.0.0.1. Devuelve (server, base_url).
+    server.requests: paths pedidos, en orden de llegada (para contar peticiones en tests y bench).
+    """
+    import functools
+    import time
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(SimpleHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # cabeceras y cuerpo van en dos write(): sin esto, Nagle + ACK retardado
+        # añaden ~40 ms por petición en una conexión keep-alive
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            self.server.requests.append(self.path)
+            if latency_ms:
+                time.sleep(latency_ms / 1000.0)
+            super().do_GET()
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        requests: List[str]
+
+        def handle_error(self, request, client_address):
+            pass   # clientes que cortan a mitad (descarga rechazada por tamaño): no es un error del servidor
+
+    server = Server(("127.0.0.1", 0), functools.partial(Handler, directory=root))
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _bench(argv: Optional[List[str]] = None) -> None:
+    import argparse
+    import shutil
+    import tempfile
+    import time
+
+    ap = argparse.ArgumentParser(description="Throughput de fetch_many() contra un http.server local")
+    ap.add_argument("--make", type=int, default=2000, help="nº de ficheros del dataset sintético")
+    ap.add_argument("--size", type=int, default=1200, help="bytes por fichero")
+    ap.add_argument("--latency", type=float, default=20.0, help="latencia simulada por petición (ms)")
+    ap.add_argument("--workers", default="1,4,8,16", help="lista de nº de hilos")
+    args = ap.parse_args(argv)
+
+    root = tempfile.mkdtemp(prefix="http_bench_")
+    try:
+        paths = make_dataset_tree(root, args.make, args.size)
+        server, base = serve_directory(root, args.latency)
+        urls = [f"{base}/datasets/json/{p}" for p in paths]
+        print(f"{len(urls)} ficheros, latencia {args.latency:g} ms")
+        for w in (int(x) for x in args.workers.split(",")):
+            t0 = time.perf_counter()
+            total = errors = 0
+            for _url, body, err in fetch_many(urls, workers=w):
+                if body is None:
+                    errors += 1
+                else:
+                    total += len(body)
+            dt = time.perf_counter() - t0
+            print(f"workers={w:>2}  {dt:7.2f} s  {len(urls) / dt:8.0f} fich/s  "
+                  f"{total / dt / 1e6:6.2f} MB/s  errores={errors}")
+        server.shutdown()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    _bench()
@@ -18,6 +18,29 @@ _STRINGS_ES: Dict[str, str] = {
     "sync.msg.need_source": "Primero selecciona la carpeta de origen (Tibia).",
     "sync.msg.result": "Copiados: {copied}",
     "sync.msg.duplicates": " | Duplicados ignorados: {ignored}",
+    "sync.msg.methods": " | Método: {methods}",
+    "sync.method.auto": "Automático",
+    "sync.method.reflink": "reflink",
+    "sync.method.hardlink": "enlace duro",
+    "sync.method.copy": "copia",
+    "sync.msg.cancelled": "Sincronización cancelada.\n",
+    "sync.watch.imported": "Importados automáticamente desde el origen: {copied}",
+    "sync.watch.failed": "Error al importar automáticamente desde el origen: {err}",
+    "library.read_failed": "No se pudieron leer {n} archivo(s) de la biblioteca (p. ej. {name}: {err})",
+
+    # Trabajos en segundo plano (sync / descarga)
+    "job.stage.start": "Preparando…",
+    "job.stage.index": "Revisando la biblioteca",
+    "job.stage.scan": "Escaneando origen",
+    "job.stage.hash": "Calculando hashes",
+    "job.stage.copy": "Importando",
+    "job.stage.download": "Descargando",
+    "job.stage.check": "Comprobando el MANIFEST",
+    "job.stage.bundle": "Descargando paquete",
+    "job.progress": "Escaneados: {scanned} | Hasheados: {hashed} | Copiados: {copied} | Descargados: {downloaded} | {mb:.1f} MB",
+    "job.throughput": " ({rate:.2f} MB/s)",
+    "job.cancel": "Cancelar",
+    "job.cancelling": "Cancelando… (terminando el archivo en curso)",
 
     # Estado / contadores
     "settings.status": "Estado",
@@ -33,8 +56,10 @@ _STRINGS_ES: Dict[str, str] = {
     "settings.title": "Ajustes",
     "settings.section.language": "Idioma",
     "settings.section.source": "Origen de JSON de Tibia",
+    "settings.section.import": "Importación",
     "settings.section.library": "Biblioteca local",
     "settings.source.choose": "Elegir carpeta de origen",
+    "settings.source.watch": "Importar automáticamente las hunts nuevas del origen",
     "settings.library.choose": "Elegir carpeta de biblioteca",
     "settings.save": "Guardar",
     "settings.saved": "Ajustes guardados.",
@@ -44,6 +69,13 @@ _STRINGS_ES: Dict[str, str] = {
     "tools.dataset.download": "Descargar dataset (GitHub)",
     "tools.dataset.err": "Error al descargar:",
     "tools.dataset.result": "Descarga completada.\nCopiados: {copied}\nIdénticos ya existentes: {identical}\nErrores: {errors}",
+    "tools.dataset.cancelled": "Descarga cancelada.\nCopiados: {copied}\nIdénticos ya existentes: {identical}\nErrores: {errors}",
+    "tools.dataset.throughput": "\nDescargado: {mb:.1f} MB en {secs:.1f} s ({rate:.2f} MB/s, {fps:.0f} archivos/s)",
+    "tools.dataset.rejected": "\nRechazados (no coinciden con el sha256/tamaño del MANIFEST): {n}",
+    "tools.dataset.uptodate": "La biblioteca ya está al día: el dataset no ha cambiado desde la última sincronización.",
+    "tools.dataset.check": "Buscar novedades",
+    "tools.dataset.status": "Última comprobación: {checked} · Entradas nuevas desde la última sincronización: {new}",
+    "tools.dataset.never": "El dataset aún no se ha comprobado.",
     "tools.stats.open": "Estadísticas",
     "tools.stats.title": "Estadísticas",
 
@@ -54,6 +86,12 @@ _STRINGS_ES: Dict[str, str] = {
     "zones.col.raw_h.max": "Raw/h Máx",
     "zones.col.balance_h.min": "Bal/h Mín",
     "zones.col.balance_h.max": "Bal/h Máx",
+    "zones.col.xp_h.p10": "XP/h P10",
+    "zones.col.xp_h.p50": "XP/h P50",
+    "zones.col.xp_h.p90": "XP/h P90",
+    "zones.col.balance_h.p10": "Bal/h P10",
+    "zones.col.balance_h.p50": "Bal/h P50",
+    "zones.col.balance_h.p90": "Bal/h P90",
 
     # PendingDialog (cabecera y acciones)
     "pending.title": "Pendientes",
@@ -176,6 +214,29 @@ _STRINGS_EN: Dict[str, str] = {
     "sync.msg.need_source": "Please select the source folder (Tibia) first.",
     "sync.msg.result": "Copied: {copied}",
     "sync.msg.duplicates": " | Duplicates ignored: {ignored}",
+    "sync.msg.methods": " | Method: {methods}",
+    "sync.method.auto": "Automatic",
+    "sync.method.reflink": "reflink",
+    "sync.method.hardlink": "hardlink",
+    "sync.method.copy": "copy",
+    "sync.msg.cancelled": "Sync cancelled.\n",
+    "sync.watch.imported": "Auto-imported from source: {copied}",
+    "sync.watch.failed": "Automatic import from source failed: {err}",
+    "library.read_failed": "Could not read {n} library file(s) (e.g. {name}: {err})",
+
+    # Background jobs (sync / download)
+    "job.stage.start": "Preparing…",
+    "job.stage.index": "Checking library",
+    "job.stage.scan": "Scanning source",
+    "job.stage.hash": "Hashing",
+    "job.stage.copy": "Importing",
+    "job.stage.download": "Downloading",
+    "job.stage.check": "Checking MANIFEST",
+    "job.stage.bundle": "Downloading bundle",
+    "job.progress": "Scanned: {scanned} | Hashed: {hashed} | Copied: {copied} | Downloaded: {downloaded} | {mb:.1f} MB",
+    "job.throughput": " ({rate:.2f} MB/s)",
+    "job.cancel": "Cancel",
+    "job.cancelling": "Cancelling… (finishing current file)",
 
     # Status / counters
     "settings.status": "Status",
@@ -191,8 +252,10 @@ _STRINGS_EN: Dict[str, str] = {
     "settings.title": "Settings",
     "settings.section.language": "Language",
     "settings.section.source": "Tibia JSON source",
+    "settings.section.import": "Import",
     "settings.section.library": "Local library",
     "settings.source.choose": "Choose source folder",
+    "settings.source.watch": "Automatically import new hunts from the source",
     "settings.library.choose": "Choose library folder",
     "settings.save": "Save",
     "settings.saved": "Settings saved.",
@@ -202,6 +265,13 @@ _STRINGS_EN: Dict[str, str] = {
     "tools.dataset.download": "Download dataset (GitHub)",
     "tools.dataset.err": "Download error:",
     "tools.dataset.result": "Download completed.\nCopied: {copied}\nIdentical existing: {identical}\nErrors: {errors}",
+    "tools.dataset.cancelled": "Download cancelled.\nCopied: {copied}\nIdentical existing: {identical}\nErrors: {errors}",
+    "tools.dataset.throughput": "\nDownloaded: {mb:.1f} MB in {secs:.1f} s ({rate:.2f} MB/s, {fps:.0f} files/s)",
+    "tools.dataset.rejected": "\nRejected (sha256/size differ from the MANIFEST): {n}",
+    "tools.dataset.uptodate": "Library is up to date: the dataset has not changed since the last sync.",
+    "tools.dataset.check": "Check for updates",
+    "tools.dataset.status": "Last checked: {checked} · New entries since last sync: {new}",
+    "tools.dataset.never": "The dataset has not been checked yet.",
     "tools.stats.open": "Statistics",
     "tools.stats.title": "Statistics",
 
@@ -212,6 +282,12 @@ _STRINGS_EN: Dict[str, str] = {
     "zones.col.raw_h.max": "Raw/h Max",
     "zones.col.balance_h.min": "Bal/h Min",
     "zones.col.balance_h.max": "Bal/h Max",
+    "zones.col.xp_h.p10": "XP/h P10",
+    "zones.col.xp_h.p50": "XP/h P50",
+    "zones.col.xp_h.p90": "XP/h P90",
+    "zones.col.balance_h.p10": "Bal/h P10",
+    "zones.col.balance_h.p50": "Bal/h P50",
+    "zones.col.balance_h.p90": "Bal/h P90",
 
     # PendingDialog (header & actions)
     "pending.title": "Pending",
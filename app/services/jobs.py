@@ -0,0 +1,79 @@
+# app/services/jobs.py
+"""
+Control de trabajos largos (sync, descarga del dataset) que corren fuera del
+hilo de la UI: contadores de progreso y cancelación cooperativa entre ficheros.
+Los servicios reciben un JobControl opcional; sin él funcionan igual que antes.
+No depende de Qt (el puente con señales está en app/ui/job_runner.py).
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+COUNTERS = ("scanned", "hashed", "copied", "downloaded", "bytes")
+
+ProgressCallback = Callable[[Dict[str, object]], None]
+
+
+class JobControl:
+    """
+    Estado compartido entre el hilo del trabajo (y su pool de hashing) y la UI.
+    - set_stage(): fase actual ("scan", "hash", "copy", "index", "check", "bundle", "download") y su total.
+    - step(): avanza la fase y suma contadores; on_progress recibe una foto
+      (snapshot, con 'elapsed' desde el inicio) como mucho cada 'interval' segundos.
+    - cancel(): lo pide la UI; los servicios lo miran entre fichero y fichero.
+    """
+    def __init__(self, on_progress: Optional[ProgressCallback] = None, interval: float = 0.1):
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._on_progress = on_progress
+        self._interval = interval
+        self._last = 0.0
+        self._started = time.monotonic()
+        self.stage = ""
+        self.done = 0
+        self.total = 0
+        self.counts: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+
+    # ---------- cancelación ----------
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    # ---------- progreso ----------
+    def set_stage(self, stage: str, total: int = 0) -> None:
+        with self._lock:
+            self.stage = stage
+            self.done = 0
+            self.total = total
+        self._emit(force=True)
+
+    def step(self, n: int = 1, **counts: int) -> None:
+        with self._lock:
+            self.done += n
+            for key, value in counts.items():
+                self.counts[key] = self.counts.get(key, 0) + value
+        self._emit()
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            snap: Dict[str, object] = dict(self.counts)
+            snap.update(stage=self.stage, done=self.done, total=self.total,
+                        cancelled=self.cancelled, elapsed=time.monotonic() - self._started)
+            return snap
+
+    def finish(self) -> None:
+        self._emit(force=True)
+
+    def _emit(self, force: bool = False) -> None:
+        if self._on_progress is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last < self._interval:
+            return
+        self._last = now
+        self._on_progress(self.snapshot())
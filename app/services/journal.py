@@ -0,0 +1,206 @@
+# app/services/journal.py
+"""
+Snapshot + diario append-only para diccionarios persistentes grandes
+(índice de la biblioteca, caché stat -> sha1 del origen):
+
+    <path>          snapshot {"version": V, "gen": G, <tabla>: {clave: valor}, ...}  (tmp + os.replace)
+    <path>.journal  una línea JSON por cambio: [G, tabla, clave, valor]  (valor null = borrar)
+
+Guardar solo añade al diario las líneas nuevas, así que el coste es
+proporcional a lo que cambió. Cuando el diario crece más que una fracción del
+snapshot se compacta: snapshot nuevo atómico (generación G+1) y diario vacío.
+
+Cargar = snapshot + replay de las líneas de SU generación. Si la compactación
+cae entre escribir el snapshot y borrar el diario, las líneas viejas (G menor)
+se saltan: reaplicarlas podría resucitar claves borradas, porque un cambio que
+fue directo al snapshot nunca pasó por el diario. Una línea cortada (caída a
+mitad de escritura) detiene el replay y fuerza compactar en el siguiente guardado.
+Las líneas sin generación ([tabla, clave, valor], formato anterior) cuentan como G=0.
+
+Quien no quiere las tablas en memoria (caché de hunts entre refrescos) puede
+anotar cambios y guardarlos con append(); si toca compactar, vuelve a load()
+(que aplica encima lo anotado y aún sin guardar) y llama a save().
+"""
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+# Se compacta cuando el diario supera max(_COMPACT_MIN, _COMPACT_RATIO * entradas)
+_COMPACT_MIN = 1000
+_COMPACT_RATIO = 0.5
+
+Tables = Dict[str, Dict[str, Any]]
+
+
+class Journal:
+    def __init__(self, path: str, version: int, tables: Sequence[str]):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.version = version
+        self.tables = tuple(tables)
+        self._pending: List[list] = []
+        self._journal_lines = 0
+        self._needs_compact = False
+        self._gen = 0   # generación del snapshot cargado/escrito
+
+    # ---------- carga ----------
+    def load(self) -> Optional[Tables]:
+        """
+        Tablas guardadas (snapshot + diario, más lo anotado sin guardar). Sin snapshot
+        válido: solo lo anotado sin guardar, o None si no hay nada (carga en frío).
+        """
+        self._journal_lines = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            # sin snapshot (o ilegible): el siguiente save() escribe uno completo
+            return self._without_snapshot()
+        if not isinstance(data, dict) or data.get("version") != self.version:
+            return self._without_snapshot()
+        try:
+            self._gen = int(data.get("gen") or 0)
+        except (TypeError, ValueError):
+            self._gen = 0
+
+        tables: Tables = {}
+        for name in self.tables:
+            t = data.get(name)
+            tables[name] = dict(t) if isinstance(t, dict) else {}
+        self._replay(tables)
+        return self._apply_pending(tables)
+
+    def _without_snapshot(self) -> Optional[Tables]:
+        self._needs_compact = True
+        self._gen = self._journal_gen()
+        if not self._pending:
+            return None
+        # recarga (p. ej. para compactar) de quien ya anotó cambios: no se pierden
+        return self._apply_pending({name: {} for name in self.tables})
+
+    def _apply_pending(self, tables: Tables) -> Tables:
+        for name, key, value in self._pending:
+            if value is None:
+                tables[name].pop(key, None)
+            else:
+                tables[name][key] = value
+        return tables
+
+    def _replay(self, tables: Tables) -> None:
+        try:
+            f = open(self.journal_path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        except OSError:
+            self._needs_compact = True
+            return
+        with f:
+            for line in f:
+                try:
+                    op = json.loads(line)
+                    gen, name, key, value = op if len(op) == 4 else (0, *op)
+                    table = tables[name]
+                except Exception:
+                    # línea cortada o ajena: lo que venga detrás no es fiable
+                    self._needs_compact = True
+                    break
+                if gen != self._gen:
+                    # de un snapshot anterior (diario que no se llegó a borrar): ya está dentro
+                    self._needs_compact = True
+                    continue
+                if value is None:
+                    table.pop(key, None)
+                else:
+                    table[key] = value
+                self._journal_lines += 1
+
+    def _journal_gen(self) -> int:
+        """Mayor generación de un diario huérfano: el snapshot nuevo debe quedar por encima."""
+        gen = 0
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        op = json.loads(line)
+                        if len(op) == 4:
+                            gen = max(gen, int(op[0]))
+                    except Exception:
+                        break
+        except OSError:
+            pass
+        return gen
+
+    # ---------- escritura ----------
+    def record(self, table: str, key: str, value: Any) -> None:
+        """Anota un cambio (value None = borrar); se escribe en save()."""
+        self._pending.append([table, key, value])   # la generación se pone al escribir
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._pending) or self._needs_compact
+
+    def save(self, tables: Tables) -> bool:
+        """Añade lo pendiente al diario, o compacta si toca. 'tables' es el estado actual."""
+        done = self.append(sum(len(t) for t in tables.values()))
+        return self.compact(tables) if done is None else done
+
+    def append(self, total: int) -> Optional[bool]:
+        """
+        save() sin las tablas: 'total' es cuántas entradas hay (aprox.). None si toca
+        compactar; entonces hay que load() y save() con las tablas completas.
+        """
+        limit = max(_COMPACT_MIN, int(total * _COMPACT_RATIO))
+        if self._needs_compact or self._journal_lines + len(self._pending) > limit:
+            return None
+        if not self._pending:
+            return True
+        try:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write("".join(
+                    json.dumps([self._gen, *op], ensure_ascii=False, separators=(",", ":")) + "\n"
+                    for op in self._pending
+                ))
+        except OSError:
+            return False
+        self._journal_lines += len(self._pending)
+        self._pending.clear()
+        return True
+
+    def compact(self, tables: Tables) -> bool:
+        """
+        Snapshot atómico (tmp + os.replace) con generación nueva y diario vacío.
+        False si algo falla, también si no se puede borrar el diario: se reintenta
+        en el siguiente save() (mientras tanto sus líneas viejas se saltan al cargar).
+        """
+        tmp = f"{self.path}.tmp"
+        gen = self._gen + 1
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            data: Dict[str, Any] = {"version": self.version, "gen": gen}
+            for name in self.tables:
+                data[name] = tables.get(name, {})
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except Exception:
+            try:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            except Exception:
+                pass
+            return False
+        self._gen = gen
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            # el snapshot ya es el estado bueno; lo pendiente sigue dentro de 'tables'
+            self._needs_compact = True
+            return False
+        self._pending.clear()
+        self._journal_lines = 0
+        self._needs_compact = False
+        return True
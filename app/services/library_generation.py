@@ -0,0 +1,24 @@
+# app/services/library_generation.py
+"""
+Contador de generación de la biblioteca: sube cada vez que algo cambia los
+hunts en disco o en memoria (carga incremental, sync, descarga del dataset,
+edición de metadatos). Las cachés de resultados lo usan como parte de la clave.
+"""
+from __future__ import annotations
+
+import threading
+
+_lock = threading.Lock()
+_generation = 0
+
+
+def current() -> int:
+    return _generation
+
+
+def bump() -> int:
+    """Invalida lo calculado con la generación anterior. Devuelve la nueva."""
+    global _generation
+    with _lock:
+        _generation += 1
+        return _generation
@@ -0,0 +1,276 @@
+# app/services/library_index.py
+"""
+Índice único de la biblioteca, direccionado por contenido. Lo comparten la
+sincronización local (library_sync, sha1) y la descarga del dataset
+(dataset_fetch, sha256):
+
+    files:   { nombre: {"sha256", "sha1", "fp", "size", "mtime_ns"} }  (lo que HAY en disco)
+    aliases: { sha1: nombre }   sha1 de origen ya importados cuyo fichero no está
+                                (borrado) o tiene otros bytes pero el mismo JSON
+
+"fp" es la huella del JSON canónico (claves ordenadas, sin espacios): dos
+exportaciones de la misma sesión con distinto formato tienen la misma huella,
+así que los duplicados semánticos se detectan con un lookup, sin volver a
+parsear el fichero con el que colisionan. Es None si el fichero no es JSON.
+
+refresh() solo vuelve a leer los ficheros cuyo (tamaño, mtime) cambió, así
+que comprobar el dataset cuesta cargar el índice y un scandir, no hashear todo.
+Se guarda como snapshot + diario (app/services/journal.py): cada save() escribe
+solo las entradas que cambiaron.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import TYPE_CHECKING, Dict, Optional, Set, Tuple
+
+from app.services import hashing
+from app.services.journal import Journal
+from app.services.paths import library_dir, library_index_path, library_manifest_path
+
+if TYPE_CHECKING:
+    from app.services.jobs import JobControl
+
+_INDEX_VERSION = 1
+
+# Ficheros auxiliares que pueden vivir en la carpeta de la biblioteca
+_SKIP_NAMES = {"_dataset_seen_hashes.json"}
+
+
+Digests = Tuple[str, str, Optional[str]]   # (sha256, sha1, fp)
+
+
+def json_fingerprint(raw: bytes) -> Optional[str]:
+    """sha1 del JSON canónico de 'raw' (None si no se puede parsear)."""
+    try:
+        data = json.loads(raw.decode("utf-8-sig"))
+    except Exception:
+        return None
+    canon = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(canon.encode("utf-8")).hexdigest()
+
+
+def digest_bytes(raw: bytes) -> Digests:
+    """sha256 + sha1 de los bytes y huella del JSON, de una sola lectura."""
+    return hashlib.sha256(raw).hexdigest(), hashlib.sha1(raw).hexdigest(), json_fingerprint(raw)
+
+
+def _digest_path(path: str) -> Digests:
+    with open(path, "rb") as f:
+        return digest_bytes(f.read())
+
+
+class LibraryIndex:
+    def __init__(self, path: str | None = None):
+        self.path = path or library_index_path()
+        self.files: Dict[str, Dict[str, object]] = {}
+        self.aliases: Dict[str, str] = {}
+        # sha256 del MANIFEST remoto -> sha256 local del contenido aceptado para él
+        # (no siempre coinciden: el dataset publicado se sirve con LF y el MANIFEST es de CRLF)
+        self.remote: Dict[str, str] = {}
+        self._by_sha256: Dict[str, str] = {}
+        self._by_sha1: Dict[str, str] = {}
+        self._by_fp: Dict[str, str] = {}
+        # inverso completo: clave -> digest -> nombres con ese contenido (dict como conjunto
+        # ordenado); así _forget() no recorre todos los ficheros para buscar otro igual
+        self._names: Dict[str, Dict[str, Dict[str, None]]] = {"sha256": {}, "sha1": {}, "fp": {}}
+        # snapshot (library_index.json) + diario append-only de cambios
+        self._journal = Journal(self.path, _INDEX_VERSION, ("files", "aliases", "remote"))
+
+    # ---------- carga / guardado ----------
+    @classmethod
+    def load(cls, path: str | None = None) -> "LibraryIndex":
+        idx = cls(path)
+        tables = idx._journal.load()
+        if tables is not None:
+            idx.files = tables["files"]
+            idx.aliases = tables["aliases"]
+            idx.remote = tables["remote"]
+        elif not os.path.exists(idx.path):
+            idx._migrate_manifest()
+        # índice corrupto o de otra versión -> vacío, se reconstruye con refresh()
+        idx._rebuild_lookups()
+        return idx
+
+    def _migrate_manifest(self) -> None:
+        """Primera vez: los sha1 del antiguo library_manifest.json pasan a aliases."""
+        try:
+            with open(library_manifest_path(), "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+            files = legacy.get("files") if isinstance(legacy, dict) else None
+            if isinstance(files, dict):
+                # sin snapshot, el primer save() lo escribe entero (no va al diario)
+                self.aliases = {str(h).lower(): str(name) for h, name in files.items()}
+        except Exception:
+            pass
+
+    def _lookups(self):
+        return ((self._by_sha256, "sha256"), (self._by_sha1, "sha1"), (self._by_fp, "fp"))
+
+    def _rebuild_lookups(self) -> None:
+        self._by_sha256 = {}
+        self._by_sha1 = {}
+        self._by_fp = {}
+        self._names = {"sha256": {}, "sha1": {}, "fp": {}}
+        for name, info in self.files.items():
+            self._by_sha256[str(info.get("sha256", ""))] = name
+            self._by_sha1[str(info.get("sha1", ""))] = name
+            if info.get("fp"):
+                self._by_fp[str(info["fp"])] = name
+            for _lookup, key in self._lookups():
+                digest = info.get(key)
+                if digest:
+                    self._names[key].setdefault(str(digest), {})[name] = None
+
+    def save(self) -> bool:
+        """Añade los cambios al diario (compacta el snapshot cuando toca)."""
+        if not self._journal.dirty:
+            return True
+        return self._journal.save({"files": self.files, "aliases": self.aliases, "remote": self.remote})
+
+    # ---------- sincronización con el disco ----------
+    def refresh(self, workers: int = 0, control: Optional["JobControl"] = None) -> None:
+        """
+        Alinea el índice con la carpeta: quita borrados y hashea nuevos/cambiados.
+        Si se cancela, lo que no llegó a leerse queda pendiente para la próxima vez.
+        """
+        lib = library_dir()
+        listing: Dict[str, tuple] = {}
+        try:
+            for entry in os.scandir(lib):
+                if not entry.is_file() or not entry.name.lower().endswith(".json"):
+                    continue
+                if entry.name in _SKIP_NAMES:
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                listing[entry.name] = (st.st_size, st.st_mtime_ns)
+        except OSError:
+            return
+
+        for name in [n for n in self.files if n not in listing]:
+            self._forget(name)
+
+        # entradas sin "fp" (índices anteriores a la huella) también se releen
+        dirty = [
+            name for name, (size, mtime_ns) in listing.items()
+            if (info := self.files.get(name)) is None
+            or info.get("size") != size or info.get("mtime_ns") != mtime_ns
+            or "fp" not in info
+        ]
+        if not dirty:
+            return
+        paths = {os.path.join(lib, name): name for name in dirty}
+        if control is not None:
+            control.set_stage("index", len(paths))
+        digests, _failed = hashing.map_files(_digest_path, paths, workers=workers, control=control)
+        for path, dg in digests.items():
+            name = paths[path]
+            size, mtime_ns = listing[name]
+            self._put(name, dg, size, mtime_ns)
+
+    def _forget(self, name: str) -> None:
+        info = self.files.pop(name, None)
+        if info is None:
+            return
+        # el sha1 se recuerda como alias: la sync no vuelve a importar lo que se borró
+        self._journal.record("files", name, None)
+        sha1 = str(info.get("sha1", ""))
+        if sha1 and sha1 not in self.aliases:
+            self.aliases[sha1] = name
+            self._journal.record("aliases", sha1, name)
+        for lookup, key in self._lookups():
+            digest = info.get(key)
+            if not digest:
+                continue
+            names = self._names[key].get(digest)
+            if names is not None:
+                names.pop(name, None)
+                if not names:
+                    del self._names[key][digest]
+            if lookup.get(digest) == name:
+                # si otro fichero tiene el mismo contenido, pasa a ser el de referencia
+                if names:
+                    lookup[digest] = next(iter(names))
+                else:
+                    del lookup[digest]
+
+    def _put(self, name: str, digests: Digests, size: int, mtime_ns: int) -> None:
+        if name in self.files:
+            # contenido anterior (p. ej. editado con PendingDialog): su sha1 queda como alias
+            self._forget(name)
+        sha256, sha1, fp = digests
+        info = {"sha256": sha256, "sha1": sha1, "fp": fp, "size": size, "mtime_ns": mtime_ns}
+        self.files[name] = info
+        self._journal.record("files", name, info)
+        self._by_sha256[sha256] = name
+        self._by_sha1[sha1] = name
+        if fp:
+            self._by_fp.setdefault(fp, name)
+        for _lookup, key in self._lookups():
+            digest = info[key]
+            if digest:
+                self._names[key].setdefault(digest, {})[name] = None
+
+    def add_file(self, name: str, raw: bytes | None = None, digests: Digests | None = None) -> None:
+        """
+        Registra un fichero recién escrito en la biblioteca. 'raw' son sus bytes
+        si el llamador ya los tiene en memoria (así no se vuelve a leer), y
+        'digests' los hashes si ya los calculó (p. ej. mientras lo descargaba).
+        """
+        path = os.path.join(library_dir(), name)
+        st = os.stat(path)
+        if digests is None:
+            digests = digest_bytes(raw) if raw is not None else _digest_path(path)
+        self._put(name, digests, st.st_size, st.st_mtime_ns)
+
+    def add_alias(self, sha1: str, name: str) -> None:
+        """sha1 de origen equivalente (mismo JSON) a un fichero que ya está."""
+        sha1 = sha1.lower()
+        if self.aliases.get(sha1) != name and sha1 not in self._by_sha1:
+            self.aliases[sha1] = name
+            self._journal.record("aliases", sha1, name)
+
+    def add_remote(self, remote_sha256: str, name: str) -> None:
+        """El contenido publicado con 'remote_sha256' ya está en la biblioteca como 'name'."""
+        info = self.files.get(name)
+        if info is None:
+            return
+        remote_sha256 = remote_sha256.lower()
+        local = str(info.get("sha256", ""))
+        if remote_sha256 != local and self.remote.get(remote_sha256) != local:
+            self.remote[remote_sha256] = local
+            self._journal.record("remote", remote_sha256, local)
+
+    # ---------- consultas ----------
+    def has_sha256(self, sha256: str) -> bool:
+        return sha256.lower() in self._by_sha256
+
+    def knows_sha1(self, sha1: str) -> bool:
+        """True si ese contenido (sha1 de origen) ya se importó alguna vez."""
+        sha1 = sha1.lower()
+        return sha1 in self._by_sha1 or sha1 in self.aliases
+
+    def has_remote(self, remote_sha256: str) -> bool:
+        """
+        True si el contenido del MANIFEST con ese sha256 está ahora en la biblioteca
+        (mismos bytes, o lo que se aceptó por él y sigue en disco).
+        """
+        remote_sha256 = remote_sha256.lower()
+        if remote_sha256 in self._by_sha256:
+            return True
+        local = self.remote.get(remote_sha256)
+        return local is not None and local in self._by_sha256
+
+    def name_for_sha256(self, sha256: str) -> Optional[str]:
+        return self._by_sha256.get(sha256.lower())
+
+    def name_for_fingerprint(self, fp: Optional[str]) -> Optional[str]:
+        """Fichero de la biblioteca con el mismo JSON canónico (si lo hay)."""
+        return self._by_fp.get(fp) if fp else None
+
+    def sha256_set(self) -> Set[str]:
+        return set(self._by_sha256)
@@ -1,34 +1,16 @@
 # app/services/library_sync.py
 import os
-import json
+import errno
 import shutil
-import hashlib
-from typing import Tuple
-from .paths import library_dir, library_manifest_path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from .paths import library_dir, source_hash_cache_path
+from .library_index import LibraryIndex, json_fingerprint
+from .jobs import JobControl
+from .journal import Journal
+from . import hashing, library_generation
 
 def _hash_file(path: str) -> str:
-    h = hashlib.sha1()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
-    return h.hexdigest()
-
-def _read_json(path: str) -> dict | None:
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return None
-
-def _same_json(a: str, b: str) -> bool:
-    ja = _read_json(a)
-    jb = _read_json(b)
-    if ja is None or jb is None:
-        try:
-            return os.path.getsize(a) == os.path.getsize(b)
-        except Exception:
-            return False
-    return ja == jb
+    return hashing.hash_file(path, "sha1")
 
 def _next_free_name(base_dir: str, filename: str) -> str:
     """
@@ -43,66 +25,249 @@ def _next_free_name(base_dir: str, filename: str) -> str:
             return cand
         i += 1
 
-def _load_manifest() -> dict:
-    path = library_manifest_path()
-    if os.path.exists(path):
+# ---- Estrategia de importación (config "import_strategy") ----
+# reflink: clon copy-on-write (Btrfs/XFS/...): no duplica bloques y es independiente del origen.
+# hardlink: mismo inodo que el origen (solo mismo dispositivo). Es seguro porque la
+#   biblioteca nunca se escribe in situ: writer.write_meta_to_json rompe el enlace.
+# copy: copia de bytes (shutil.copy2). Siempre es el último recurso.
+IMPORT_STRATEGIES = ("auto", "reflink", "hardlink", "copy")
+_STRATEGY_CHAIN = {
+    "auto": ("reflink", "hardlink", "copy"),
+    "reflink": ("reflink", "copy"),
+    "hardlink": ("hardlink", "copy"),
+    "copy": ("copy",),
+}
+_FICLONE = 0x40049409   # ioctl de Linux (linux/fs.h)
+# errores que indican "este método no vale aquí", no un fallo del fichero
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV, errno.EPERM, errno.EINVAL, errno.ENOTTY, errno.EMLINK,
+    getattr(errno, "EOPNOTSUPP", errno.EINVAL), getattr(errno, "ENOTSUP", errno.EINVAL),
+}
+
+def _reflink(src: str, dst: str) -> None:
+    import fcntl  # solo POSIX; en Windows el ImportError desactiva el método
+    try:
+        with open(src, "rb") as fs, open(dst, "wb") as fd:
+            fcntl.ioctl(fd.fileno(), _FICLONE, fs.fileno())
+    except BaseException:
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {"files": {}}
-    return {"files": {}}
-
-def _save_manifest(manifest: dict):
-    path = library_manifest_path()
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(manifest, f, indent=2, ensure_ascii=False)
-
-def import_from_source(source_dir: str) -> Tuple[int, int]:
+            os.remove(dst)
+        except OSError:
+            pass
+        raise
+    shutil.copystat(src, dst)
+
+def _hardlink(src: str, dst: str) -> None:
+    os.link(src, dst)
+
+def _copy(src: str, dst: str) -> None:
+    shutil.copy2(src, dst)
+
+_METHODS = {"reflink": _reflink, "hardlink": _hardlink, "copy": _copy}
+
+class _Importer:
+    """
+    Coloca ficheros en la biblioteca con la primera estrategia que funcione.
+    Si un método no está soportado (otro dispositivo, FS sin reflink...) se
+    descarta para el resto de la ejecución. 'used' cuenta ficheros por método.
+    """
+    def __init__(self, strategy: str, source_dir: str, lib: str):
+        chain = _STRATEGY_CHAIN.get(strategy, _STRATEGY_CHAIN["auto"])
+        if "hardlink" in chain and not _same_device(source_dir, lib):
+            chain = tuple(m for m in chain if m != "hardlink")
+        self.chain = list(chain)
+        self.used: Dict[str, int] = {}
+
+    def place(self, src: str, dst: str) -> str:
+        for method in list(self.chain):
+            try:
+                _METHODS[method](src, dst)
+            except (OSError, ImportError) as e:
+                if method == "copy":
+                    raise
+                if isinstance(e, ImportError) or e.errno in _UNSUPPORTED_ERRNOS:
+                    self.chain.remove(method)
+                continue
+            self.used[method] = self.used.get(method, 0) + 1
+            return method
+        raise OSError(f"no se pudo importar {src}")
+
+def _same_device(a: str, b: str) -> bool:
+    try:
+        return os.stat(a).st_dev == os.stat(b).st_dev
+    except OSError:
+        return False
+
+def _iter_source(source_dir: str, names: Optional[Iterable[str]]):
+    """(nombre, path, stat()) de los .json del origen; con 'names', solo esos (sin scandir)."""
+    if names is None:
+        for entry in os.scandir(source_dir):
+            if entry.is_file() and entry.name.lower().endswith(".json"):
+                yield entry.name, entry.path, entry.stat
+        return
+    for name in names:
+        path = os.path.join(source_dir, os.path.basename(name))
+        if name.lower().endswith(".json") and os.path.isfile(path):
+            yield os.path.basename(name), path, (lambda p=path: os.stat(p))
+
+# ---- Caché stat -> sha1 de la carpeta de origen ----
+# { path: [size, mtime_ns, inode, sha1] }: si la firma stat no cambia, no se relee el fichero.
+# Snapshot + diario (journal.py): una sync solo escribe las entradas que cambiaron.
+_HASH_CACHE_VERSION = 1
+
+def _stat_sig(st: os.stat_result) -> list:
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+def _hash_cache_journal() -> Journal:
+    return Journal(source_hash_cache_path(), _HASH_CACHE_VERSION, ("entries",))
+
+class ImportResult(NamedTuple):
+    copied: int
+    ignored: int
+    methods: Dict[str, int]   # {método: nº de ficheros}
+    imported: List[str]       # paths de la biblioteca escritos en esta ejecución
+
+
+def import_from_source(
+    source_dir: str,
+    workers: int = 0,
+    strategy: str = "auto",
+    control: Optional[JobControl] = None,
+    names: Optional[Iterable[str]] = None,
+) -> ImportResult:
     """
     Copia a la biblioteca interna los JSON nuevos según hash.
-    Devuelve (copiados, ignorados).
     Reglas:
-      - Calcula hash del archivo de origen.
-      - Si hash ya está en el manifest -> ignorar.
-      - Si no, copiar a biblioteca (si existe por nombre pero distinto contenido -> renombrar).
+      - Calcula hash del archivo de origen (o lo toma de la caché stat si
+        tamaño/mtime/inode no han cambiado).
+      - Si el índice de la biblioteca ya conoce ese sha1 -> ignorar.
+      - Si la huella del JSON canónico ya está en la biblioteca (mismo contenido,
+        otro formato o nombre) -> ignorar y recordar el sha1 como alias.
+      - Si no, copiar a biblioteca (si el nombre está ocupado -> renombrar)
+        y registrarlo en el índice.
+    workers: hilos para hashear los ficheros nuevos/cambiados (0 = automático).
+    strategy: una de IMPORT_STRATEGIES; con "auto" se prueba reflink, luego
+      hardlink (si origen y biblioteca están en el mismo dispositivo) y luego copia.
+    control: progreso y cancelación (entre ficheros); lo ya importado se conserva
+      y el índice y la caché se guardan igualmente.
+    names: solo estos ficheros del origen (lo usa el vigilante de la carpeta);
+      None = escanear la carpeta entera.
     """
     lib = library_dir()
-    manifest = _load_manifest()
     copied = 0
     ignored = 0
 
     if not source_dir or not os.path.isdir(source_dir):
-        return (0, 0)
+        return ImportResult(0, 0, {}, [])
+
+    index = LibraryIndex.load()
+    index.refresh(workers, control)
+    if control is not None and control.cancelled:
+        # índice a medias: no se puede deduplicar con él
+        index.save()
+        return ImportResult(0, 0, {}, [])
+
+    hash_journal = _hash_cache_journal()
+    hash_cache: Dict[str, list] = (hash_journal.load() or {"entries": {}})["entries"]
+    # Entradas de otras carpetas se conservan; las de esta se rehacen con lo que hay ahora
+    src_root = os.path.abspath(source_dir)
+    seen: Dict[str, list] = {}
+    importer: Optional[_Importer] = None
+    imported: List[str] = []
 
-    for entry in os.scandir(source_dir):
-        if not entry.is_file() or not entry.name.lower().endswith(".json"):
+    # 1) stat de todo; solo se hashean (en lote, en paralelo) los que cambiaron
+    files: List[Tuple[str, str, str, list]] = []   # (nombre, path, clave, firma)
+    to_hash: List[str] = []
+    if control is not None:
+        control.set_stage("scan")
+    for name, path, st in _iter_source(source_dir, names):
+        key = os.path.abspath(path)
+        try:
+            sig = _stat_sig(st())
+        except OSError:
             continue
+        files.append((name, path, key, sig))
+        cached = hash_cache.get(key)
+        if not (cached and len(cached) == 4 and cached[:3] == sig):
+            to_hash.append(path)
+        if control is not None:
+            control.step(scanned=1)
+
+    if control is not None:
+        control.set_stage("hash", len(to_hash))
+    fresh, _failed = (
+        hashing.hash_files(to_hash, "sha1", workers=workers, control=control)
+        if to_hash else ({}, [])
+    )
+
+    # Firma + sha1 de todo lo legible (la caché queda completa aunque se cancele luego)
+    resolved: List[Tuple[str, str, str]] = []   # (nombre, path, sha1)
+    for name, src, key, sig in files:
+        h = fresh.get(src)
+        if h is None:
+            cached = hash_cache.get(key)
+            if not (cached and len(cached) == 4 and cached[:3] == sig):
+                continue  # no se pudo leer (o se canceló antes de hashearlo)
+            h = cached[3]
+        seen[key] = sig + [h]
+        resolved.append((name, src, h))
+
+    # 2) copiar / deduplicar en el orden del listado
+    if control is not None:
+        control.set_stage("copy", len(resolved))
+    for name, src, h in resolved:
+        if control is not None:
+            if control.cancelled:
+                break
+            control.step()
 
-        src = entry.path
-        h = _hash_file(src)
+        # Ya en el índice (o importado antes) -> ignorar
+        if index.knows_sha1(h):
+            ignored += 1
+            continue
 
-        # Ya registrado en manifest -> ignorar
-        if h in manifest["files"]:
+        # Contenido nuevo: solo ahora se lee y parsea para la huella
+        try:
+            with open(src, "rb") as f:
+                raw = f.read()
+        except OSError:
+            continue
+        same = index.name_for_fingerprint(json_fingerprint(raw))
+        if same is not None:
             ignored += 1
+            index.add_alias(h, same)
             continue
 
-        dst = os.path.join(lib, entry.name)
-
-        if not os.path.exists(dst):
-            shutil.copy2(src, dst)
-            copied += 1
-            manifest["files"][h] = os.path.basename(dst)
-        else:
-            if _same_json(src, dst):
-                ignored += 1
-                manifest["files"][h] = os.path.basename(dst)
-            else:
-                new_name = _next_free_name(lib, entry.name)
-                new_dst = os.path.join(lib, new_name)
-                shutil.copy2(src, new_dst)
-                copied += 1
-                manifest["files"][h] = os.path.basename(new_dst)
-
-    _save_manifest(manifest)
-    return (copied, ignored)
+        if os.path.exists(os.path.join(lib, name)):
+            name = _next_free_name(lib, name)
+        if importer is None:
+            importer = _Importer(strategy, source_dir, lib)
+        try:
+            importer.place(src, os.path.join(lib, name))
+        except OSError:
+            continue
+        copied += 1
+        index.add_file(name, raw)
+        imported.append(os.path.join(lib, name))
+        if control is not None:
+            control.step(0, copied=1, bytes=len(raw))
+
+    index.save()
+
+    # Con 'names' solo se ha visto parte de la carpeta: no se puede podar
+    stale = [] if names is not None else [
+        k for k in hash_cache if os.path.dirname(k) == src_root and k not in seen
+    ]
+    for k in stale:
+        del hash_cache[k]
+        hash_journal.record("entries", k, None)
+    for k, entry in seen.items():
+        if hash_cache.get(k) != entry:
+            hash_cache[k] = entry
+            hash_journal.record("entries", k, entry)
+    if hash_journal.dirty:
+        hash_journal.save({"entries": hash_cache})
+
+    if copied:
+        library_generation.bump()
+    return ImportResult(copied, ignored, dict(importer.used) if importer else {}, imported)
@@ -55,3 +55,34 @@ def library_manifest_path() -> str:
     Ruta absoluta al MANIFEST.json de la biblioteca (dedupe por hash) en AppData.
     """
     return str(_user_data_root() / "library_manifest.json")
+
+def hunt_cache_path() -> str:
+    """
+    Ruta absoluta a la caché de hunts normalizadas (por path/tamaño/mtime) en AppData.
+    """
+    return str(_user_data_root() / "hunt_cache.json")
+
+def source_hash_cache_path() -> str:
+    """
+    Ruta absoluta a la caché stat -> sha1 de la carpeta de origen (junto al manifest).
+    """
+    return str(_user_data_root() / "source_hash_cache.json")
+
+def library_index_path() -> str:
+    """
+    Ruta absoluta al índice de la biblioteca (sha256/sha1/tamaño/mtime por fichero) en AppData.
+    """
+    return str(_user_data_root() / "library_index.json")
+
+def dataset_manifest_cache_path() -> str:
+    """
+    Ruta absoluta a la copia local del MANIFEST del dataset remoto (con ETag/Last-Modified) en AppData.
+    """
+    return str(_user_data_root() / "dataset_manifest.json")
+
+def dataset_staging_dir() -> str:
+    """
+    Carpeta temporal donde se extrae un bundle del dataset antes de verificarlo
+    (mismo volumen que la biblioteca: pasar a ella es un os.replace).
+    """
+    return str(_user_data_root() / "dataset_staging")
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-import json
-import os
-from typing import List, Dict, Any, Tuple, Optional
+from typing import TYPE_CHECKING, Iterable, List, Dict, Any, Tuple
 
 from app.services import i18n
 
+if TYPE_CHECKING:
+    from app.data.library_state import LibraryDiff
+
 # Vocaciones, modos y niveles permitidos
 ALLOWED_VOCS: List[str] = ["Knight", "Paladin", "Sorcerer", "Druid", "Monk"]
 ALLOWED_MODES: List[str] = ["Solo", "Duo"]
@@ -14,40 +15,6 @@ ALLOWED_LEVELS: List[str] = [
     "251-300","301-350","351-400","401-450","451-500"
 ]
 
-# ---------------- Utilidades de lectura directa del JSON ----------------
-
-def _read_json(path: str) -> Optional[Dict[str, Any]]:
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return None
-
-def _read_balance_real_and_ignore(path: str) -> Tuple[Optional[int], bool]:
-    """
-    Lee 'Balance Real' (si existe) y 'Ignore Duo Balance' del JSON.
-    """
-    data = _read_json(path)
-    if not data:
-        return (None, False)
-
-    # Balance Real
-    bal_real_raw = data.get("Balance Real", "")
-    bal_val: Optional[int] = None
-    if str(bal_real_raw).strip() != "":
-        # limpiar separadores
-        digits = "".join(ch for ch in str(bal_real_raw) if ch.isdigit() or ch == "-")
-        try:
-            bal_val = int(digits)
-        except Exception:
-            bal_val = None
-
-    # Ignore flag
-    raw_flag = str(data.get("Ignore Duo Balance", "")).strip().lower()
-    ignore = raw_flag in ("1", "true", "yes", "y", "on")
-
-    return (bal_val, ignore)
-
 # ---------------- Reglas de consistencia ----------------
 
 def coerce_consistency(meta: Dict[str, str]) -> Dict[str, str]:
@@ -69,15 +36,29 @@ def coerce_consistency(meta: Dict[str, str]) -> Dict[str, str]:
             m["Vocation duo"] = ""
     return m
 
-# ---------------- Detección de problemas (localizados) ----------------
-
-def _issues_for_record(record) -> List[str]:
+# ---------------- Detección de problemas ----------------
+
+# Códigos de problema (independientes del idioma); su texto es "pending.issue.<código>"
+ISSUE_MISSING_VOCATION = "missing_vocation"
+ISSUE_INVALID_VOCATION = "invalid_vocation"
+ISSUE_MISSING_MODE = "missing_mode"
+ISSUE_INVALID_MODE = "invalid_mode"
+ISSUE_MISSING_ZONE = "missing_zone"
+ISSUE_MISSING_LEVEL = "missing_level"
+ISSUE_INVALID_LEVEL = "invalid_level"
+ISSUE_DUO_MUST_BE_NONE = "duo_must_be_none"
+ISSUE_DUO_MISSING = "duo_missing"
+ISSUE_DUO_EQUALS_VOCATION = "duo_cannot_equal_vocation"
+ISSUE_BALANCE_DUO_REQUIRED = "balance_duo_required"
+
+def issue_codes(record) -> Tuple[str, ...]:
     """
-    Recibe un HuntRecord (o estructura equivalente con atributos):
-      - path, vocation, mode, vocation_duo, zona, level_bucket
-    Devuelve lista de 'issues' ya traducidos según i18n.get_language().
+    Recibe un HuntRecord o HuntView (o estructura equivalente con atributos):
+      - path, vocation, mode, vocation_duo, zona, level_bucket,
+        balance_real, ignore_duo_balance
+    Devuelve los códigos de problema (vacío = sin pendientes). Solo memoria.
     """
-    issues: List[str] = []
+    codes: List[str] = []
 
     # Campos base
     vocation = (getattr(record, "vocation", None) or "").strip()
@@ -88,49 +69,67 @@ def _issues_for_record(record) -> List[str]:
 
     # Faltantes / inválidos
     if not vocation:
-        issues.append(i18n.tr("pending.issue.missing_vocation"))
+        codes.append(ISSUE_MISSING_VOCATION)
     elif vocation not in ALLOWED_VOCS:
-        issues.append(i18n.tr("pending.issue.invalid_vocation"))
+        codes.append(ISSUE_INVALID_VOCATION)
 
     if not mode:
-        issues.append(i18n.tr("pending.issue.missing_mode"))
+        codes.append(ISSUE_MISSING_MODE)
     elif mode not in ALLOWED_MODES:
-        issues.append(i18n.tr("pending.issue.invalid_mode"))
+        codes.append(ISSUE_INVALID_MODE)
 
     if not zona:
-        issues.append(i18n.tr("pending.issue.missing_zone"))
+        codes.append(ISSUE_MISSING_ZONE)
 
     if not level_bucket:
-        issues.append(i18n.tr("pending.issue.missing_level"))
+        codes.append(ISSUE_MISSING_LEVEL)
     elif level_bucket not in ALLOWED_LEVELS:
-        issues.append(i18n.tr("pending.issue.invalid_level"))
+        codes.append(ISSUE_INVALID_LEVEL)
 
     # Reglas Duo/Solo
     if mode == "Solo":
         if duo != "none":
-            issues.append(i18n.tr("pending.issue.duo_must_be_none"))
+            codes.append(ISSUE_DUO_MUST_BE_NONE)
     elif mode == "Duo":
-        if not duo:
-            issues.append(i18n.tr("pending.issue.duo_missing"))
-        elif duo == "none" or (vocation and duo == vocation):
-            # none o igual a la principal
-            if duo == "none":
-                issues.append(i18n.tr("pending.issue.duo_missing"))
-            else:
-                issues.append(i18n.tr("pending.issue.duo_cannot_equal_vocation"))
+        if not duo or duo == "none":
+            codes.append(ISSUE_DUO_MISSING)
+        elif vocation and duo == vocation:
+            codes.append(ISSUE_DUO_EQUALS_VOCATION)
 
         # Balance Real o ignorado
-        bal_real, ignore_flag = _read_balance_real_and_ignore(getattr(record, "path", ""))
+        bal_real = getattr(record, "balance_real", None)
+        ignore_flag = bool(getattr(record, "ignore_duo_balance", False))
         if bal_real is None and not ignore_flag:
-            issues.append(i18n.tr("pending.issue.balance_duo_required"))
+            codes.append(ISSUE_BALANCE_DUO_REQUIRED)
 
-    return issues
+    return tuple(codes)
+
+def translate_issues(codes: Iterable[str]) -> List[str]:
+    """Textos de los códigos según i18n.get_language() (solo al mostrarlos)."""
+    return [i18n.tr(f"pending.issue.{code}") for code in codes]
+
+def _issues_for_record(record) -> List[str]:
+    """Igual que issue_codes() pero ya traducidos."""
+    return translate_issues(issue_codes(record))
+
+def _pending_row(h, codes: Tuple[str, ...]) -> Dict[str, Any]:
+    return {
+        "path": getattr(h, "path", ""),
+        "vocation": getattr(h, "vocation", "") or "",
+        "mode": getattr(h, "mode", "") or "",
+        "vocation_duo": getattr(h, "vocation_duo", "") or "",
+        "zona": getattr(h, "zona", "") or "",
+        "level": getattr(h, "level_bucket", "") or "",
+        "balance_real": getattr(h, "balance_real", None),
+        "ignore_duo_balance": bool(getattr(h, "ignore_duo_balance", False)),
+        "issue_codes": codes,
+    }
 
 # ---------------- API pública usada por la UI ----------------
 
-def find_pending(hunts: List) -> List[Dict[str, Any]]:
+def find_pending(hunts: Iterable) -> List[Dict[str, Any]]:
     """
-    Dada la lista de hunts (normalizadas), devuelve filas para el panel de pendientes:
+    Dada la lista de hunts (normalizadas) o un HuntStore, devuelve filas para el panel de pendientes:
     [
       {
         "path": str,
@@ -139,6 +138,9 @@ def find_pending(hunts: List) -> List[Dict[str, Any]]:
         "vocation_duo": str,
         "zona": str,
         "level": str,
+        "balance_real": int | None,
+        "ignore_duo_balance": bool,
+        "issue_codes": (str, ...),
         "issues": [str, ...]  # ya traducidos según idioma actual
       },
       ...
@@ -146,16 +148,57 @@ def find_pending(hunts: List) -> List[Dict[str, Any]]:
     """
     rows: List[Dict[str, Any]] = []
     for h in hunts:
-        issues = _issues_for_record(h)
-        if not issues:
+        codes = issue_codes(h)
+        if not codes:
             continue
-        rows.append({
-            "path": getattr(h, "path", ""),
-            "vocation": getattr(h, "vocation", "") or "",
-            "mode": getattr(h, "mode", "") or "",
-            "vocation_duo": getattr(h, "vocation_duo", "") or "",
-            "zona": getattr(h, "zona", "") or "",
-            "level": getattr(h, "level_bucket", "") or "",
-            "issues": issues,
-        })
+        row = _pending_row(h, codes)
+        row["issues"] = translate_issues(codes)
+        rows.append(row)
     return rows
+
+
+class PendingIndex:
+    """
+    Pendientes indexados por path, con códigos de problema (sin traducir).
+    Se construye una vez y se actualiza con cada LibraryDiff; contar es len().
+    """
+    def __init__(self):
+        self._rows: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def build(cls, hunts: Iterable) -> "PendingIndex":
+        idx = cls()
+        for h in hunts:
+            idx.update(h)
+        return idx
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._rows
+
+    def update(self, hunt) -> None:
+        """Recalcula los problemas de un hunt (nuevo o modificado)."""
+        codes = issue_codes(hunt)
+        if codes:
+            self._rows[hunt.path] = _pending_row(hunt, codes)
+        else:
+            self._rows.pop(hunt.path, None)
+
+    def discard(self, path: str) -> None:
+        self._rows.pop(path, None)
+
+    def apply(self, diff: "LibraryDiff") -> None:
+        for old in diff.removed:
+            self.discard(old.path)
+        for old, new in diff.changed:
+            if old.path != new.path:
+                self.discard(old.path)
+            self.update(new)
+        for new in diff.added:
+            self.update(new)
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Filas para PendingDialog (con "issue_codes"; se traducen al mostrarlas)."""
+        return list(self._rows.values())
@@ -0,0 +1,163 @@
+# app/services/quantiles.py
+"""
+Estadísticas en streaming con memoria acotada por zona:
+- KLLSketch: resumen de cuantiles mergeable (Karnin–Lang–Liberty). Es exacto
+  mientras ha visto pocos valores (<= k) y después guarda O(k) elementos
+  con peso, sin importar cuántas hunts tenga la zona.
+- RunningStats: count/min/max en O(1) + sketch opcional para percentiles.
+
+Definición de percentil (igual en todos los motores): el menor valor x tal que
+el peso acumulado hasta x es >= q * total (CDF inversa, sin interpolar).
+"""
+from __future__ import annotations
+
+import math
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+# Percentiles que se publican en AggregatedZone
+PERCENTILES = (0.10, 0.50, 0.90)
+
+_DEFAULT_K = 128
+_C = 2.0 / 3.0
+
+
+def quantile_sorted(values: Sequence[float], q: float) -> float:
+    """Percentil exacto de una secuencia ya ordenada (0.0 si está vacía)."""
+    if not values:
+        return 0.0
+    idx = max(math.ceil(q * len(values)) - 1, 0)
+    return values[min(idx, len(values) - 1)]
+
+
+class KLLSketch:
+    """
+    Sketch KLL: niveles de compactadores donde un elemento del nivel h pesa 2**h.
+    Al llenarse un nivel se ordena y sube la mitad de sus elementos (alternando
+    pares/impares de forma determinista). merge() une sketches de otras zonas/celdas.
+    """
+    __slots__ = ("k", "levels", "size", "max_size", "_flip")
+
+    def __init__(self, k: int = _DEFAULT_K):
+        self.k = k
+        self.levels: List[List[float]] = []
+        self.size = 0
+        self.max_size = 0
+        self._flip = 0
+        self._grow()
+
+    # ---------- estructura ----------
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - h - 1
+        return int(math.ceil(self.k * _C ** depth)) + 1
+
+    def _grow(self) -> None:
+        self.levels.append([])
+        self.max_size = sum(self._capacity(h) for h in range(len(self.levels)))
+
+    def _compress(self) -> None:
+        while self.size >= self.max_size:
+            for h, items in enumerate(self.levels):
+                if len(items) < self._capacity(h):
+                    continue
+                if h + 1 >= len(self.levels):
+                    self._grow()
+                items.sort()
+                keep = [items.pop()] if len(items) % 2 else []
+                self.levels[h + 1].extend(items[self._flip::2])
+                self._flip ^= 1
+                self.levels[h] = keep
+                self.size = sum(len(lv) for lv in self.levels)
+                break
+
+    # ---------- API ----------
+    def update(self, value: float) -> None:
+        self.levels[0].append(value)
+        self.size += 1
+        if self.size >= self.max_size:
+            self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        while len(self.levels) < len(other.levels):
+            self._grow()
+        for h, items in enumerate(other.levels):
+            self.levels[h].extend(items)
+        self.size = sum(len(lv) for lv in self.levels)
+        self._compress()
+
+    @classmethod
+    def from_sorted(cls, values: Sequence[float], k: int = _DEFAULT_K) -> "KLLSketch":
+        """Sketch de una lista ya ordenada en O(k): muestreo por saltos de 2**h."""
+        sk = cls(k)
+        h = 0
+        while math.ceil(len(values) / (1 << h)) > k:
+            h += 1
+        while len(sk.levels) <= h:
+            sk._grow()
+        step = 1 << h
+        sk.levels[h] = list(values[step // 2::step]) if h else list(values)
+        sk.size = len(sk.levels[h])
+        sk._compress()
+        return sk
+
+    def weighted(self) -> List[Tuple[float, int]]:
+        out = [(v, 1 << h) for h, items in enumerate(self.levels) for v in items]
+        out.sort()
+        return out
+
+    def quantiles(self, qs: Iterable[float]) -> List[float]:
+        items = self.weighted()
+        if not items:
+            return [0.0 for _ in qs]
+        total = sum(w for _, w in items)
+        result = []
+        for q in qs:
+            target = q * total
+            acc = 0
+            val = items[-1][0]
+            for v, w in items:
+                acc += w
+                if acc >= target:
+                    val = v
+                    break
+            result.append(val)
+        return result
+
+
+class RunningStats:
+    """count/min/max en O(1) y, si with_sketch, percentiles vía KLLSketch."""
+    __slots__ = ("count", "lo", "hi", "sketch")
+
+    def __init__(self, with_sketch: bool = False):
+        self.count = 0
+        self.lo: Optional[float] = None
+        self.hi: Optional[float] = None
+        self.sketch: Optional[KLLSketch] = KLLSketch() if with_sketch else None
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if self.lo is None or value < self.lo:
+            self.lo = value
+        if self.hi is None or value > self.hi:
+            self.hi = value
+        if self.sketch is not None:
+            self.sketch.update(value)
+
+    def merge(self, other: "RunningStats") -> None:
+        """Suma 'other' (no lo modifica); el sketch solo si los dos tienen."""
+        if not other.count:
+            return
+        self.count += other.count
+        if self.lo is None or other.lo < self.lo:
+            self.lo = other.lo
+        if self.hi is None or other.hi > self.hi:
+            self.hi = other.hi
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+
+    def minmax(self) -> Tuple[float, float]:
+        return (self.lo, self.hi) if self.count else (0.0, 0.0)
+
+    def percentiles(self) -> List[float]:
+        if self.sketch is None or not self.count:
+            return [0.0] * len(PERCENTILES)
+        return self.sketch.quantiles(PERCENTILES)
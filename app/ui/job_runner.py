@@ -0,0 +1,173 @@
+# app/ui/job_runner.py
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Qt, Signal
+from PySide6.QtWidgets import QProgressDialog, QWidget
+
+from app.services import i18n
+from app.services.jobs import JobControl
+
+JobFn = Callable[[JobControl], Any]
+
+
+class _JobSignals(QObject):
+    # Se crean en el hilo de la UI: emitir desde el worker llega en cola (queued)
+    progress = Signal(dict)
+    finished = Signal(object)
+    failed = Signal(str)
+
+
+class _JobRunnable(QRunnable):
+    def __init__(self, fn: JobFn, control: JobControl, signals: _JobSignals):
+        super().__init__()
+        self._fn = fn
+        self._control = control
+        self._signals = signals
+
+    def run(self) -> None:
+        try:
+            result = self._fn(self._control)
+        except Exception as e:
+            self._signals.failed.emit(str(e))
+            return
+        self._control.finish()
+        self._signals.finished.emit(result)
+
+
+def format_progress(snap: Dict[str, object]) -> str:
+    """Texto del diálogo de progreso a partir de JobControl.snapshot()."""
+    stage = str(snap.get("stage") or "")
+    head = i18n.tr(f"job.stage.{stage}") if stage else i18n.tr("job.stage.start")
+    total = int(snap.get("total") or 0)
+    if total:
+        head += f" ({snap.get('done', 0)}/{total})"
+    mb = int(snap.get("bytes") or 0) / 1e6
+    body = i18n.tr(
+        "job.progress",
+        scanned=snap.get("scanned", 0), hashed=snap.get("hashed", 0),
+        copied=snap.get("copied", 0), downloaded=snap.get("downloaded", 0), mb=mb,
+    )
+    elapsed = float(snap.get("elapsed") or 0.0)
+    if mb and elapsed > 0:
+        body += i18n.tr("job.throughput", rate=mb / elapsed)
+    return f"{head}\n{body}"
+
+
+class JobRunner(QObject):
+    """
+    Ejecuta un trabajo (sync, descarga...) en QThreadPool.globalInstance() con un
+    QProgressDialog modal a la ventana (la UI sigue pintando y respondiendo).
+    'Cancelar' pide la cancelación; el trabajo termina el fichero en curso y
+    on_finished recibe lo que devolvió, con control.cancelled a True.
+
+    Hay uno solo por ventana principal y todos los trabajos que tocan la
+    biblioteca (sync, vigilante, descarga del dataset) pasan por él: así nunca
+    hay dos a la vez cargando, modificando y guardando el mismo LibraryIndex.
+    idle se emite al acabar cada trabajo (tras su on_finished/on_failed), para
+    lanzar lo que esperaba turno.
+    """
+    idle = Signal()
+
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+        self._parent = parent
+        self._active: Optional[tuple] = None
+
+    @property
+    def busy(self) -> bool:
+        return self._active is not None
+
+    def start(
+        self,
+        title: str,
+        fn: JobFn,
+        on_finished: Callable[[Any, JobControl], None],
+        on_failed: Optional[Callable[[str], None]] = None,
+        show_progress: bool = True,
+        parent: Optional[QWidget] = None,
+    ) -> Optional[JobControl]:
+        """
+        Lanza fn(control) en el pool. Devuelve None si ya hay un trabajo en marcha.
+        show_progress=False: sin diálogo (importaciones automáticas del vigilante).
+        parent: ventana a la que es modal el diálogo de progreso (por defecto la del
+        runner); desde un diálogo modal (Herramientas) tiene que ser ese diálogo.
+        """
+        if self.busy:
+            return None
+
+        signals = _JobSignals()
+        if not show_progress:
+            control = JobControl()
+
+            def finish_quiet(result: Any) -> None:
+                self._active = None
+                on_finished(result, control)
+                self.idle.emit()
+
+            def fail_quiet(err: str) -> None:
+                self._active = None
+                if on_failed:
+                    on_failed(err)
+                self.idle.emit()
+
+            signals.finished.connect(finish_quiet)
+            signals.failed.connect(fail_quiet)
+            self._active = (signals, None, control)
+            QThreadPool.globalInstance().start(_JobRunnable(fn, control, signals))
+            return control
+
+        control = JobControl(on_progress=signals.progress.emit)
+
+        dlg = QProgressDialog(format_progress({}), i18n.tr("job.cancel"), 0, 0, parent or self._parent)
+        dlg.setWindowTitle(title)
+        dlg.setWindowModality(Qt.WindowModal)
+        dlg.setMinimumDuration(300)
+        dlg.setAutoClose(False)
+        dlg.setAutoReset(False)
+        dlg.setMinimumWidth(420)
+
+        def on_progress(snap: Dict[str, object]) -> None:
+            total = int(snap.get("total") or 0)
+            dlg.setMaximum(total)          # 0 = barra indeterminada
+            if total:
+                dlg.setValue(min(int(snap.get("done") or 0), total))
+            if not control.cancelled:
+                dlg.setLabelText(format_progress(snap))
+
+        def on_cancel() -> None:
+            # QProgressDialog se oculta al cancelar: se vuelve a mostrar hasta que el
+            # trabajo acabe el fichero en curso (sin botón, ya no hay nada que cancelar)
+            control.cancel()
+            dlg.setCancelButton(None)
+            dlg.setLabelText(i18n.tr("job.cancelling"))
+            dlg.show()
+
+        def close_dialog() -> None:
+            # close() de QProgressDialog emite canceled: se desconecta antes
+            self._active = None
+            dlg.canceled.disconnect(on_cancel)
+            dlg.close()
+            dlg.deleteLater()
+
+        def done(result: Any) -> None:
+            close_dialog()
+            on_finished(result, control)
+            self.idle.emit()
+
+        def failed(err: str) -> None:
+            close_dialog()
+            if on_failed:
+                on_failed(err)
+            self.idle.emit()
+
+        signals.progress.connect(on_progress)
+        signals.finished.connect(done)
+        signals.failed.connect(failed)
+        dlg.canceled.connect(on_cancel)
+
+        # Referencias vivas hasta que termine (señales, diálogo)
+        self._active = (signals, dlg, control)
+        QThreadPool.globalInstance().start(_JobRunnable(fn, control, signals))
+        return control
@@ -3,22 +3,25 @@ from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QPushButton,
     QLabel, QHBoxLayout, QSplitter, QMessageBox
 )
-from PySide6.QtCore import Qt, QSize
+from PySide6.QtCore import Qt, QSize, QTimer
 from PySide6.QtGui import QIcon
 
 from app.services.paths import asset_path, library_dir
 from app.services import config, i18n
 from app.services import ui_prefs
 from app.services.library_sync import import_from_source
-from app.data.loader import load_hunts_from_library
-from app.services.pending_service import find_pending
+from app.data.library_state import LibraryState
+from app.services.pending_service import PendingIndex
 from app.ui.pending_panel import PendingDialog
 from app.ui.filters_panel import FiltersPanel
 from app.ui.zones_table import ZonesTable
-from app.services.aggregator import aggregate_by_zone
+from app.services.aggregation_cube import AggregationCube
+from app.services.aggregator import RESULT_CACHE, STATS_BASIC, STATS_HILO
 from app.ui.profiles_dialog import ProfilesDialog
 from app.ui.settings_panel import SettingsDialog
 from app.ui.tools_panel import ToolsDialog
+from app.ui.job_runner import JobRunner
+from app.ui.source_watcher import SourceWatcher
 
 
 class MainWindow(ui_prefs.PersistentSizeMixin, QMainWindow):
@@ -34,11 +37,27 @@ class MainWindow(ui_prefs.PersistentSizeMixin, QMainWindow):
         self._default_voc = "Knight"
         self._default_mode = "Solo"
 
+        # Estado incremental de la biblioteca (solo re-parsea lo que cambia)
+        self.library = LibraryState(workers=config.get_int(cfg, "load_workers"))
+        # Cubo de agregación (se construye una vez y luego se actualiza con cada diff)
+        self.cube: AggregationCube | None = None
+        # Pendientes indexados (códigos sin traducir, actualizados con cada diff)
+        self.pending: PendingIndex | None = None
+        # Sync en segundo plano (QThreadPool + diálogo de progreso cancelable); compartido
+        # con Herramientas: un solo trabajo sobre la biblioteca a la vez
+        self.jobs = JobRunner(self)
+        # lo que vio el vigilante mientras había otro trabajo se importa al quedar libre
+        self.jobs.idle.connect(self._run_watch_queue)
+        # Vigilante opcional de la carpeta de origen (config "watch_source")
+        self.watcher: SourceWatcher | None = None
+        self._watch_queue: set[str] = set()
+
         # Inicializa el mixin (tamaño general recordado)
         self.init_persistent_size(self.config, key="main_window_last", default=(1120, 720))
 
         self._build_ui()
         self.load_data()
+        self._update_watcher()
 
         # cargar tamaño según modo (basic / hilo)
         hilo = self.filters.show_hi_lo()
@@ -151,30 +170,132 @@ class MainWindow(ui_prefs.PersistentSizeMixin, QMainWindow):
         )
         dlg.exec()
 
+        # la carpeta de origen o el ajuste de vigilancia pueden haber cambiado
+        self.source_folder = self.config.get("source_folder", "")
+        self._update_watcher()
+
     def open_tools_dialog(self):
-        dlg = ToolsDialog(self, self.config)
+        dlg = ToolsDialog(
+            self,
+            self.config,
+            hunts=self.library.hunts,
+            on_library_changed=self.load_data,
+            jobs=self.jobs,
+        )
         dlg.exec()
 
     def sync_now(self):
         if not self.source_folder:
             QMessageBox.information(self, i18n.tr("sync.now"), i18n.tr("sync.msg.need_source"))
             return
-        copied, ignored = import_from_source(self.source_folder)
-        msg = i18n.tr("sync.msg.result", copied=copied)
-        if ignored:
-            msg += i18n.tr("sync.msg.duplicates", ignored=ignored)
+        if self.jobs.busy:
+            if not self.btn_sync.isEnabled():
+                return
+            # hay una importación automática en curso: se reintenta al acabar
+            QTimer.singleShot(300, self.sync_now)
+            return
+        source = self.source_folder
+        workers = config.get_int(self.config, "hash_workers")
+        strategy = self.config.get("import_strategy", "auto")
+        self.btn_sync.setEnabled(False)
+        self.jobs.start(
+            i18n.tr("sync.now"),
+            lambda control: import_from_source(
+                source, workers=workers, strategy=strategy, control=control),
+            self._on_sync_finished,
+            self._on_sync_failed,
+        )
+
+    def _on_sync_finished(self, result, control):
+        self.btn_sync.setEnabled(True)
+        msg = i18n.tr("sync.msg.cancelled") if control.cancelled else ""
+        msg += i18n.tr("sync.msg.result", copied=result.copied)
+        if result.ignored:
+            msg += i18n.tr("sync.msg.duplicates", ignored=result.ignored)
+        if result.methods:
+            used = ", ".join(f"{i18n.tr('sync.method.' + m)}: {n}" for m, n in result.methods.items())
+            msg += i18n.tr("sync.msg.methods", methods=used)
+        # Lo importado (aunque se cancelara) entra como diff incremental
+        if result.copied:
+            self.load_data(paths=result.imported)
         QMessageBox.information(self, i18n.tr("sync.now"), msg)
-        self.load_data()
 
-    # ---- Carga / pendientes / filtros ----
-    def load_data(self):
-        self.hunts = load_hunts_from_library()
-        pend = find_pending(self.hunts)
-        self.btn_manage_pending.setText(i18n.tr("pending.manage_with_count", n=len(pend)))
+    def _on_sync_failed(self, err: str):
+        self.btn_sync.setEnabled(True)
+        QMessageBox.critical(self, i18n.tr("sync.now"), err)
 
-        vocs = sorted({h.vocation for h in self.hunts if h.has_all_meta and h.vocation})
-        modes = sorted({h.mode for h in self.hunts if h.has_all_meta and h.mode})
-        lvls = sorted({h.level_bucket for h in self.hunts if h.has_all_meta and h.level_bucket})
+    # ---- Vigilancia de la carpeta de origen ----
+    def _update_watcher(self):
+        enabled = bool(self.config.get("watch_source", False))
+        folder = self.source_folder if enabled else ""
+        if self.watcher is not None and self.watcher.folder == folder:
+            return
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher.deleteLater()
+            self.watcher = None
+        if folder and os.path.isdir(folder):
+            self.watcher = SourceWatcher(folder, self)
+            self.watcher.new_files.connect(self._on_source_files)
+            self.watcher.start()
+
+    def _on_source_files(self, names):
+        self._watch_queue.update(names)
+        self._run_watch_queue()
+
+    def _run_watch_queue(self):
+        """
+        Importa en segundo plano (sin diálogo) lo que ha visto el vigilante. Si hay
+        otro trabajo sobre la biblioteca (sync, descarga del dataset), el lote espera
+        en la cola hasta jobs.idle.
+        """
+        if not self._watch_queue or self.jobs.busy or self.watcher is None:
+            return
+        names = sorted(self._watch_queue)
+        self._watch_queue.clear()
+        source = self.watcher.folder
+        workers = config.get_int(self.config, "hash_workers")
+        strategy = self.config.get("import_strategy", "auto")
+        self.jobs.start(
+            i18n.tr("sync.now"),
+            lambda control: import_from_source(
+                source, workers=workers, strategy=strategy, control=control, names=names),
+            self._on_watch_finished,
+            self._on_watch_failed,
+            show_progress=False,
+        )
+
+    def _on_watch_finished(self, result, _control):
+        if result.imported:
+            diff = self.load_data(paths=result.imported)
+            if not diff.failed:   # si no, se queda el aviso de load_data
+                self.statusBar().showMessage(i18n.tr("sync.watch.imported", copied=result.copied), 10000)
+
+    def _on_watch_failed(self, err: str):
+        # sin diálogo: la importación automática no debe interrumpir (queda hasta el siguiente mensaje)
+        self.statusBar().showMessage(i18n.tr("sync.watch.failed", err=err))
+
+    # ---- Carga / pendientes / filtros ----
+    def load_data(self, paths=None):
+        """Aplica los cambios de la biblioteca; con 'paths', solo de esos ficheros. Devuelve el LibraryDiff."""
+        diff = self.library.refresh() if paths is None else self.library.refresh_paths(paths)
+        if diff.failed:
+            # en la barra de estado, como los errores del vigilante (queda hasta el siguiente mensaje)
+            path, err = diff.failed[0]
+            self.statusBar().showMessage(i18n.tr(
+                "library.read_failed", n=len(diff.failed), name=os.path.basename(path), err=err))
+        self.hunts = self.library.hunts
+        if self.cube is None:
+            self.cube = AggregationCube.build(self.hunts)
+            self.pending = PendingIndex.build(self.hunts)
+        elif diff:
+            self.cube.apply(diff)
+            self.pending.apply(diff)
+        self.btn_manage_pending.setText(i18n.tr("pending.manage_with_count", n=len(self.pending)))
+
+        vocs = sorted(self.cube.values("vocation"))
+        modes = sorted(self.cube.values("mode"))
+        lvls = sorted(self.cube.values("level_bucket"))
 
         if not vocs:
             vocs = ["Knight"]
@@ -188,13 +309,14 @@ class MainWindow(ui_prefs.PersistentSizeMixin, QMainWindow):
         self._refresh_mode_options()
         self._refresh_level_options()
         self.refresh_table()
+        return diff
 
     def open_pending_dialog(self):
-        pend = find_pending(self.hunts)
+        pend = self.pending.rows() if self.pending is not None else []
         if not pend:
             QMessageBox.information(self, i18n.tr("pending.manage"), i18n.tr("pending.none"))
             return
-        existing_zones = sorted({h.zona for h in self.hunts if h.zona})
+        existing_zones = sorted(self.hunts.distinct("zona"))
         dlg = PendingDialog(self, pend, existing_zones)
         if dlg.exec():
             self.load_data()
@@ -228,7 +350,11 @@ class MainWindow(ui_prefs.PersistentSizeMixin, QMainWindow):
         voc = self.filters.current_vocation()
         mode = self.filters.current_mode()
         level = self.filters.current_level()
-        rows = aggregate_by_zone(self.hunts, vocation=voc, mode=mode, level_filter=level)
+        stats = STATS_HILO if self.filters.show_hi_lo() else STATS_BASIC
+        rows = RESULT_CACHE.get_or_compute(
+            voc, mode, level, stats,
+            lambda: self.cube.rows(vocation=voc, mode=mode, level_filter=level, stats=stats),
+        )
         self.table.set_rows(rows)
 
     def retranslate_ui(self):
@@ -239,8 +365,8 @@ class MainWindow(ui_prefs.PersistentSizeMixin, QMainWindow):
         self.btn_sync.setToolTip(i18n.tr("sync.now"))
 
         # Botón "Gestionar pendientes: X"
-        count = len(find_pending(self.hunts)) if hasattr(self, "hunts") else 0
-        self.btn_manage_pending.setText(f"{i18n.tr('pending.manage')}: {count}")
+        count = len(self.pending) if self.pending is not None else 0
+        self.btn_manage_pending.setText(i18n.tr("pending.manage_with_count", n=count))
 
         # Perfiles
         self.btn_profiles.setText(i18n.tr("profiles.open"))
@@ -269,16 +395,7 @@ class MainWindow(ui_prefs.PersistentSizeMixin, QMainWindow):
         sel_voc = self.filters.current_vocation()
         sel_mode = self.filters.current_mode()
 
-        def matches(h):
-            if not h.has_all_meta:
-                return False
-            if sel_voc and sel_voc != "All" and h.vocation != sel_voc:
-                return False
-            if sel_mode and sel_mode != "All" and h.mode != sel_mode:
-                return False
-            return bool(h.level_bucket)
-
-        levels = sorted({h.level_bucket for h in self.hunts if matches(h)})
+        levels = sorted(self.cube.values("level_bucket", vocation=sel_voc, mode=sel_mode))
         self.filters.set_available_levels(levels)
 
     def _refresh_mode_options(self):
@@ -288,14 +405,7 @@ class MainWindow(ui_prefs.PersistentSizeMixin, QMainWindow):
 
         sel_voc = self.filters.current_vocation()
 
-        def matches(h):
-            if not h.has_all_meta:
-                return False
-            if sel_voc and sel_voc != "All" and h.vocation != sel_voc:
-                return False
-            return bool(h.mode)
-
-        modes = sorted({h.mode for h in self.hunts if matches(h)})
+        modes = sorted(self.cube.values("mode", vocation=sel_voc))
         self.filters.set_available_modes(modes)
 
     @staticmethod
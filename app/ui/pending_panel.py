@@ -14,7 +14,7 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, Slot
 
 from app.services.pending_service import (
-    ALLOWED_VOCS, ALLOWED_MODES, ALLOWED_LEVELS
+    ALLOWED_VOCS, ALLOWED_MODES, ALLOWED_LEVELS, translate_issues
 )
 from app.data.writer import write_meta_to_json
 from app.services import profiles as profiles_service
@@ -276,22 +276,24 @@ class PendingDialog(ui_prefs.PersistentSizeMixin, QDialog):
             self.table.setCellWidget(r, 5, _center_widget(cb_level))
 
             # Balance Real — centrado
-            bal_real_txt, bal_real_raw = self._read_balance_real(full_path)
-            it_bal_real = QTableWidgetItem(bal_real_txt)
+            # (ya viene en la fila de pendientes: no se relee el JSON)
+            bal_real_raw = row.get("balance_real")
+            it_bal_real = QTableWidgetItem(self._fmt_balance_real(bal_real_raw))
             it_bal_real.setTextAlignment(Qt.AlignCenter)
             it_bal_real.setData(Qt.UserRole, bal_real_raw)
             self.table.setItem(r, 6, it_bal_real)
 
             # Ignorar Balance (Duo) — checkbox centrado
             chk_ignore = QCheckBox()
-            ignore_default = self._read_ignore_flag(full_path)
-            chk_ignore.setChecked(ignore_default)
+            chk_ignore.setChecked(bool(row.get("ignore_duo_balance", False)))
             mode_now = row.get("mode", "")
             chk_ignore.setEnabled(mode_now == "Duo" and bal_real_raw is None)
             self.table.setCellWidget(r, 7, _center_widget(chk_ignore))
 
             # Problemas: izquierda
-            it_issues = QTableWidgetItem("; ".join(row.get("issues", [])))
+            # traducción solo aquí, al mostrar la fila
+            issues = translate_issues(row["issue_codes"]) if "issue_codes" in row else row.get("issues", [])
+            it_issues = QTableWidgetItem("; ".join(issues))
             it_issues.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
             it_issues.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
             self.table.setItem(r, 8, it_issues)
@@ -332,25 +334,9 @@ class PendingDialog(ui_prefs.PersistentSizeMixin, QDialog):
     def _w_ignore(self, row: int) -> QCheckBox:
         return _extract_centered_child(self.table.cellWidget(row, 7))  # type: ignore
 
-    def _read_balance_real(self, path: str) -> tuple[str, int | None]:
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                d = json.load(f)
-            if "Balance Real" in d and str(d.get("Balance Real", "")).strip() != "":
-                val = int(re.sub(r"[^\d-]", "", str(d["Balance Real"])))
-                return f"{val:,}".replace(",", "."), val
-        except Exception:
-            pass
-        return "", None
-
-    def _read_ignore_flag(self, path: str) -> bool:
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                d = json.load(f)
-            raw = str(d.get("Ignore Duo Balance", "")).strip().lower()
-            return raw in ("1", "true", "yes", "y", "on")
-        except Exception:
-            return False
+    @staticmethod
+    def _fmt_balance_real(val: int | None) -> str:
+        return f"{val:,}".replace(",", ".") if val is not None else ""
 
     def _refresh_duo_choices(self, row_index: int, preset_value: str | None = None):
         cb_mode = self._w_mode(row_index)
@@ -424,7 +410,7 @@ class PendingDialog(ui_prefs.PersistentSizeMixin, QDialog):
         if dlg.exec():
             val = dlg.result_value
             it: QTableWidgetItem = self.table.item(r, 6)
-            it.setText(f"{val:,}".replace(",", "."))
+            it.setText(self._fmt_balance_real(int(val)))
             it.setData(Qt.UserRole, int(val))
             self._w_ignore(r).setChecked(False)
             self._w_ignore(r).setEnabled(False)
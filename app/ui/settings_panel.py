@@ -4,12 +4,14 @@ import os
 from typing import Callable, Optional
 
 from PySide6.QtWidgets import (
-    QDialog, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton, QFileDialog
+    QDialog, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton, QFileDialog,
+    QCheckBox
 )
 from PySide6.QtCore import Qt
 
 from app.services import i18n, config
 from app.services import ui_prefs
+from app.services.library_sync import IMPORT_STRATEGIES
 
 
 class SettingsDialog(ui_prefs.PersistentSizeMixin, QDialog):
@@ -48,6 +50,19 @@ class SettingsDialog(ui_prefs.PersistentSizeMixin, QDialog):
         row_lang.addWidget(self.cb_language, 1)
         root.addLayout(row_lang)
 
+        # Estrategia de importación (sync)
+        row_import = QHBoxLayout()
+        self.lbl_import = QLabel(i18n.tr("settings.section.import"))
+        self.cb_import = QComboBox()
+        for strategy in IMPORT_STRATEGIES:
+            self.cb_import.addItem(i18n.tr(f"sync.method.{strategy}"), userData=strategy)
+        idx = self.cb_import.findData(self.cfg.get("import_strategy", "auto"))
+        self.cb_import.setCurrentIndex(max(idx, 0))
+        self.cb_import.currentIndexChanged.connect(self._on_import_combo_changed)
+        row_import.addWidget(self.lbl_import)
+        row_import.addWidget(self.cb_import, 1)
+        root.addLayout(row_import)
+
         # Origen JSON
         self.lbl_src_title = QLabel(i18n.tr("settings.section.source"))
         self.lbl_src_title.setStyleSheet("font-weight: 600;")
@@ -60,6 +75,12 @@ class SettingsDialog(ui_prefs.PersistentSizeMixin, QDialog):
         self.btn_choose_src.clicked.connect(self._choose_source_folder)
         root.addWidget(self.btn_choose_src)
 
+        # Vigilar el origen e importar automáticamente
+        self.chk_watch = QCheckBox(i18n.tr("settings.source.watch"))
+        self.chk_watch.setChecked(bool(self.cfg.get("watch_source", False)))
+        self.chk_watch.toggled.connect(self._on_watch_toggled)
+        root.addWidget(self.chk_watch)
+
         # Cerrar
         btn_row = QHBoxLayout()
         btn_row.addStretch(1)
@@ -80,6 +101,14 @@ class SettingsDialog(ui_prefs.PersistentSizeMixin, QDialog):
             self._on_language_changed()
         self._refresh_source_status()
 
+    def _on_import_combo_changed(self, _idx: int):
+        self.cfg["import_strategy"] = self.cb_import.currentData() or "auto"
+        config.save_config(self.cfg)
+
+    def _on_watch_toggled(self, checked: bool):
+        self.cfg["watch_source"] = bool(checked)
+        config.save_config(self.cfg)
+
     def _choose_source_folder(self):
         base = self.cfg.get("source_folder") or os.path.expanduser("~")
         folder = QFileDialog.getExistingDirectory(self, i18n.tr("source.choose"), base)
@@ -0,0 +1,120 @@
+# app/ui/source_watcher.py
+from __future__ import annotations
+
+import os
+import time
+from typing import List, Optional, Set
+
+from PySide6.QtCore import QFileSystemWatcher, QObject, QTimer, Signal
+
+# Espera tras el último evento antes de importar (ráfagas de escritura)
+_DEBOUNCE_MS = 800
+# Sondeo: sin vigilancia nativa, y como red de seguridad con ella (p. ej. unidades de red)
+_POLL_MS = 2000
+_SAFETY_POLL_MS = 15000
+# Un fichero modificado hace menos de esto puede estar escribiéndose todavía
+_SETTLE_NS = 1_000_000_000
+
+
+class SourceWatcher(QObject):
+    """
+    Vigila la carpeta de origen y emite new_files([nombres]) con los .json
+    que aparecen. QFileSystemWatcher usa inotify (Linux), FSEvents/kqueue (macOS)
+    o ReadDirectoryChangesW (Windows); si no puede vigilar la carpeta, se sondea.
+
+    El sondeo es barato: un stat de la carpeta y comparar su mtime con la marca
+    de agua (high-water mark); solo si cambia se lista la carpeta (nombres, sin
+    stat de cada fichero) y se compara con los nombres ya conocidos.
+    """
+    new_files = Signal(list)
+
+    def __init__(self, folder: str, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.folder = folder
+        self._known: Set[str] = set()
+        self._pending: Set[str] = set()
+        self._dir_mtime_ns = -1
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(_DEBOUNCE_MS)
+        self._debounce.timeout.connect(self._collect)
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_event)
+
+        self._poll = QTimer(self)
+        self._poll.timeout.connect(self._on_poll)
+
+    @property
+    def native(self) -> bool:
+        return bool(self._watcher.directories())
+
+    def start(self) -> bool:
+        """Toma la foto inicial (lo que ya hay no se emite). False si la carpeta no existe."""
+        self.stop()
+        if not self.folder or not os.path.isdir(self.folder):
+            return False
+        self._known = set(self._list_names())
+        self._dir_mtime_ns = self._stat_dir()
+        self._watcher.addPath(self.folder)
+        self._poll.start(_SAFETY_POLL_MS if self.native else _POLL_MS)
+        return True
+
+    def stop(self) -> None:
+        self._debounce.stop()
+        self._poll.stop()
+        dirs = self._watcher.directories()
+        if dirs:
+            self._watcher.removePaths(dirs)
+        self._pending.clear()
+
+    # ---------- eventos ----------
+    def _on_event(self, _path: str = "") -> None:
+        self._debounce.start()   # reinicia la espera con cada evento
+
+    def _on_poll(self) -> None:
+        # sin reiniciar una espera ya en marcha (si no, un sondeo rápido la aplazaría siempre)
+        if self._debounce.isActive():
+            return
+        if self._stat_dir() != self._dir_mtime_ns or self._pending:
+            self._on_event()
+
+    def _collect(self) -> None:
+        self._dir_mtime_ns = self._stat_dir()
+        names = self._list_names()
+        if names is None:
+            return
+        current = set(names)
+        fresh = (current - self._known) | (self._pending & current)
+        self._known = current
+
+        now = time.time_ns()
+        ready: List[str] = []
+        self._pending = set()
+        for name in sorted(fresh):
+            try:
+                mtime = os.stat(os.path.join(self.folder, name)).st_mtime_ns
+            except OSError:
+                continue
+            if now - mtime < _SETTLE_NS:
+                self._pending.add(name)   # aún escribiéndose: se reintenta
+            else:
+                ready.append(name)
+        if self._pending:
+            self._debounce.start()
+        if ready:
+            self.new_files.emit(ready)
+
+    # ---------- helpers ----------
+    def _stat_dir(self) -> int:
+        try:
+            return os.stat(self.folder).st_mtime_ns
+        except OSError:
+            return -1
+
+    def _list_names(self) -> Optional[List[str]]:
+        try:
+            return [n for n in os.listdir(self.folder) if n.lower().endswith(".json")]
+        except OSError:
+            return None
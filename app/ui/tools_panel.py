@@ -5,18 +5,38 @@ from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
     QLabel, QWidget, QMessageBox
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QThreadPool, QTimer
+from datetime import datetime
+from typing import Callable, Optional
 
-from app.services import i18n
+from app.services import config, i18n
 from app.services import ui_prefs
-from app.services.dataset_fetch import download_dataset_to_library
+from app.services.dataset_fetch import check_manifest, dataset_status, download_dataset_to_library
+from app.data.hunt_store import HuntStore
 from app.ui.tools_stats_dialog import ToolsStatsDialog
+from app.ui.job_runner import JobRunner
 
 
 class ToolsDialog(ui_prefs.PersistentSizeMixin, QDialog):
-    def __init__(self, parent: QWidget | None, cfg: dict):
+    def __init__(
+        self,
+        parent: QWidget | None,
+        cfg: dict,
+        hunts: Optional[HuntStore] = None,
+        on_library_changed: Optional[Callable[[], None]] = None,
+        jobs: Optional[JobRunner] = None,
+    ):
         super().__init__(parent)
         self.cfg = cfg
+        self._hunts = hunts
+        self._on_library_changed = on_library_changed
+        # Descarga en segundo plano: el runner de la ventana principal (un solo trabajo
+        # sobre la biblioteca a la vez); el diálogo de progreso es modal a este diálogo.
+        # Un trabajo lanzado aquí puede acabar con el diálogo ya cerrado (_closed)
+        self._jobs = jobs or JobRunner(self)
+        self._owns_jobs = jobs is None
+        self._control = None
+        self._closed = False
 
         # Persistencia de tamaño con ui_prefs (Mixin)
         self.init_persistent_size(self.cfg, key="tools_dialog", default=(560, 260))
@@ -40,6 +60,11 @@ class ToolsDialog(ui_prefs.PersistentSizeMixin, QDialog):
         self.btn_download.clicked.connect(self.on_download_dataset)
         row.addWidget(self.btn_download)
 
+        # Comprobar el MANIFEST (una petición condicional; 304 si no hay nada nuevo)
+        self.btn_check = QPushButton(i18n.tr("tools.dataset.check"))
+        self.btn_check.clicked.connect(self.on_check_dataset)
+        row.addWidget(self.btn_check)
+
         # Estadísticas
         self.btn_stats = QPushButton(i18n.tr("tools.stats.open", default="Estadísticas…"))
         self.btn_stats.clicked.connect(self.on_open_stats)
@@ -48,10 +73,11 @@ class ToolsDialog(ui_prefs.PersistentSizeMixin, QDialog):
         row.addStretch(1)
         root.addLayout(row)
 
-        # Pie / hint
-        hint = QLabel("")
-        hint.setStyleSheet("color: #aaaaaa;")
-        root.addWidget(hint)
+        # Pie / hint: estado del dataset (última comprobación, entradas nuevas)
+        self.lbl_status = QLabel("")
+        self.lbl_status.setStyleSheet("color: #aaaaaa;")
+        root.addWidget(self.lbl_status)
+        self._refresh_status()
 
         # Botonera inferior (Cerrar)
         btn_row = QHBoxLayout()
@@ -61,29 +87,127 @@ class ToolsDialog(ui_prefs.PersistentSizeMixin, QDialog):
         btn_row.addWidget(btn_close)
         root.addLayout(btn_row)
 
+    def done(self, r: int):
+        self._closed = True
+        if self._owns_jobs and self._jobs.busy:
+            # Runner propio: sus señales mueren con el diálogo, así que el trabajo
+            # se cancela y se espera aquí a que el hilo deje de emitir
+            if self._control is not None:
+                self._control.cancel()
+            QThreadPool.globalInstance().waitForDone()
+        super().done(r)
+
+    def _message_parent(self) -> QWidget | None:
+        # Con el diálogo cerrado el aviso sale sobre la ventana principal
+        return self.parentWidget() if self._closed else self
+
+    def _refresh_status(self):
+        st = dataset_status()
+        if not st.get("checked_at"):
+            self.lbl_status.setText(i18n.tr("tools.dataset.never"))
+            return
+        checked = datetime.fromtimestamp(float(st["checked_at"])).strftime("%Y-%m-%d %H:%M")
+        self.lbl_status.setText(i18n.tr("tools.dataset.status", checked=checked,
+                                        new=int(st.get("new_entries") or 0)))
+
+    def _set_busy(self, busy: bool):
+        self.btn_download.setEnabled(not busy)
+        self.btn_check.setEnabled(not busy)
+
     # Acciones
+    def _wait_turn(self, action: Callable[[], None]) -> bool:
+        """
+        True si hay otro trabajo en marcha (p. ej. una importación del vigilante):
+        'action' se reintenta cuando acabe, con los botones desactivados mientras.
+        """
+        if self._closed or not self._jobs.busy:
+            return False
+        self._set_busy(True)
+        QTimer.singleShot(300, action)
+        return True
+
+    def on_check_dataset(self):
+        if self._closed:
+            return  # reintento de _wait_turn con el diálogo ya cerrado
+        if self._wait_turn(self.on_check_dataset):
+            return
+        self._set_busy(True)
+        self._control = self._jobs.start(
+            i18n.tr("tools.dataset.check"),
+            lambda control: check_manifest(),
+            self._on_check_finished,
+            self._on_download_failed,
+            show_progress=False,
+            parent=self,
+        )
+
+    def _on_check_finished(self, _result, _control):
+        self._control = None
+        if self._closed:
+            return
+        self._set_busy(False)
+        self._refresh_status()
+
     def on_download_dataset(self):
-        try:
-            copied, identical, errors = download_dataset_to_library()
-        except Exception as e:
-            QMessageBox.critical(
-                self,
-                i18n.tr("tools.dataset.download", default="Descargar biblioteca"),
-                f"{i18n.tr('tools.dataset.err', default='Error al descargar:')} {e}",
-            )
+        if self._closed:
+            return  # reintento de _wait_turn con el diálogo ya cerrado
+        if self._wait_turn(self.on_download_dataset):
             return
+        workers = config.get_int(self.cfg, "hash_workers")
+        download_workers = config.get_int(self.cfg, "download_workers")
+        use_bundle = bool(self.cfg.get("dataset_bundle", True))
+        self._set_busy(True)
+        self._control = self._jobs.start(
+            i18n.tr("tools.dataset.download", default="Descargar biblioteca"),
+            lambda control: download_dataset_to_library(
+                workers=workers, control=control, download_workers=download_workers,
+                use_bundle=use_bundle),
+            self._on_download_finished,
+            self._on_download_failed,
+            parent=self,
+        )
 
-        msg = i18n.tr(
-            "tools.dataset.result",
-            default="Copiados: {copied} | Idénticos: {identical} | Errores: {errors}",
-            copied=copied, identical=identical, errors=errors
+    def _on_download_failed(self, err: str):
+        self._control = None
+        if not self._closed:
+            self._set_busy(False)
+            self._refresh_status()
+        QMessageBox.critical(
+            self._message_parent(),
+            i18n.tr("tools.dataset.download", default="Descargar biblioteca"),
+            f"{i18n.tr('tools.dataset.err', default='Error al descargar:')} {err}",
         )
+
+    def _on_download_finished(self, result, control):
+        self._control = None
+        if not self._closed:
+            self._set_busy(False)
+            self._refresh_status()
+        copied = result.copied
+        if result.up_to_date:
+            msg = i18n.tr("tools.dataset.uptodate")
+        else:
+            msg = i18n.tr(
+                "tools.dataset.cancelled" if control.cancelled else "tools.dataset.result",
+                default="Copiados: {copied} | Idénticos: {identical} | Errores: {errors}",
+                copied=copied, identical=result.identical, errors=result.errors
+            )
+            if result.rejected:
+                msg += i18n.tr("tools.dataset.rejected", n=result.rejected)
+        snap = control.snapshot()
+        secs = float(snap.get("elapsed") or 0.0)
+        mb = int(snap.get("bytes") or 0) / 1e6
+        if copied and secs > 0:
+            msg += i18n.tr("tools.dataset.throughput", mb=mb, secs=secs,
+                           rate=mb / secs, fps=copied / secs)
         QMessageBox.information(
-            self,
+            self._message_parent(),
             i18n.tr("tools.dataset.download", default="Descargar biblioteca"),
             msg
         )
+        if copied and self._on_library_changed:
+            self._on_library_changed()
 
     def on_open_stats(self):
-        dlg = ToolsStatsDialog(self, self.cfg)
+        dlg = ToolsStatsDialog(self, self.cfg, hunts=self._hunts)
         dlg.exec()
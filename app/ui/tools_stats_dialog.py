@@ -1,18 +1,19 @@
 from __future__ import annotations
 
-from collections import Counter
+from typing import Optional
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QGridLayout, QLabel, QPushButton, QHBoxLayout, QFrame
 )
 from PySide6.QtCore import Qt
 
-from app.services import i18n, ui_prefs
-from app.data.loader import load_hunts_from_library
+from app.services import i18n, ui_prefs, config
+from app.data.hunt_store import HuntStore
+from app.data.library_state import LibraryState
 
 
 class ToolsStatsDialog(ui_prefs.PersistentSizeMixin, QDialog):
     """Estadísticas básicas de hunts. Recuerda tamaño con ui_prefs."""
-    def __init__(self, parent, cfg: dict):
+    def __init__(self, parent, cfg: dict, hunts: Optional[HuntStore] = None):
         super().__init__(parent)
         self.cfg = cfg
 
@@ -21,10 +22,15 @@ class ToolsStatsDialog(ui_prefs.PersistentSizeMixin, QDialog):
 
         root = QVBoxLayout(self)
 
-        hunts = load_hunts_from_library()
+        if hunts is None:
+            # sin biblioteca cargada (p. ej. abierto fuera de MainWindow): cargarla aquí
+            state = LibraryState(workers=config.get_int(self.cfg, "load_workers"))
+            state.refresh()
+            hunts = state.hunts
         total = len(hunts)
-        voc_counter = Counter([h.vocation for h in hunts if getattr(h, "vocation", None)])
-        mode_counter = Counter([h.mode for h in hunts if getattr(h, "mode", None)])
+        # conteos por valor = popcount de cada bitset del índice
+        voc_counter = hunts.index.counts("vocation")
+        mode_counter = hunts.index.counts("mode")
 
         # Totales
         box_total = QFrame()
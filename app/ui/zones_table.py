@@ -50,19 +50,25 @@ class ZonesTable(QWidget):
         self.table.resizeColumnsToContents()
 
     def _set_headers_hilo(self):
-        self.table.setColumnCount(12)
+        self.table.setColumnCount(18)
         self.table.setHorizontalHeaderLabels([
             i18n.tr("zones.col.zone"),
             i18n.tr("zones.col.hunts"),
             i18n.tr("zones.col.hours"),
             i18n.tr("zones.col.xp_h.min"),
+            i18n.tr("zones.col.xp_h.p10"),
+            i18n.tr("zones.col.xp_h.p50"),
             i18n.tr("zones.col.xp_h"),
+            i18n.tr("zones.col.xp_h.p90"),
             i18n.tr("zones.col.xp_h.max"),
             i18n.tr("zones.col.raw_h.min"),
             i18n.tr("zones.col.raw_h"),
             i18n.tr("zones.col.raw_h.max"),
             i18n.tr("zones.col.balance_h.min"),
+            i18n.tr("zones.col.balance_h.p10"),
+            i18n.tr("zones.col.balance_h.p50"),
             i18n.tr("zones.col.balance_h"),
+            i18n.tr("zones.col.balance_h.p90"),
             i18n.tr("zones.col.balance_h.max"),
         ])
         self.table.resizeColumnsToContents()
@@ -103,16 +109,22 @@ class ZonesTable(QWidget):
                 self._set_hours(r, 2, row.hours_total)
 
                 self._set_float0(r, 3, row.xp_gain_per_h_min)
-                self._set_float0(r, 4, row.xp_gain_per_h)
-                self._set_float0(r, 5, row.xp_gain_per_h_max)
-
-                self._set_float0(r, 6, row.raw_xp_gain_per_h_min)
-                self._set_float0(r, 7, row.raw_xp_gain_per_h)
-                self._set_float0(r, 8, row.raw_xp_gain_per_h_max)
-
-                self._set_float0(r, 9, row.balance_per_h_min)
-                self._set_float0(r, 10, row.balance_per_h)
-                self._set_float0(r, 11, row.balance_per_h_max)
+                self._set_float0(r, 4, row.xp_gain_per_h_p10)
+                self._set_float0(r, 5, row.xp_gain_per_h_p50)
+                self._set_float0(r, 6, row.xp_gain_per_h)
+                self._set_float0(r, 7, row.xp_gain_per_h_p90)
+                self._set_float0(r, 8, row.xp_gain_per_h_max)
+
+                self._set_float0(r, 9, row.raw_xp_gain_per_h_min)
+                self._set_float0(r, 10, row.raw_xp_gain_per_h)
+                self._set_float0(r, 11, row.raw_xp_gain_per_h_max)
+
+                self._set_float0(r, 12, row.balance_per_h_min)
+                self._set_float0(r, 13, row.balance_per_h_p10)
+                self._set_float0(r, 14, row.balance_per_h_p50)
+                self._set_float0(r, 15, row.balance_per_h)
+                self._set_float0(r, 16, row.balance_per_h_p90)
+                self._set_float0(r, 17, row.balance_per_h_max)
 
         self.table.setSortingEnabled(sort_enabled)
         self.table.resizeColumnsToContents()
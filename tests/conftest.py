@@ -0,0 +1,48 @@
+# tests/conftest.py
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from app.services import http_pool, paths
+
+DATASET_FILES = 60  # >= _BUNDLE_MIN_FILES: una instalación nueva usa el bundle
+
+
+@pytest.fixture
+def user_data(tmp_path, monkeypatch) -> str:
+    """Datos de usuario (biblioteca, índice, cachés) en un directorio temporal; devuelve la biblioteca."""
+    home = tmp_path / "userdata"
+    for var in ("XDG_DATA_HOME", "LOCALAPPDATA", "APPDATA"):
+        monkeypatch.setenv(var, str(home))
+    monkeypatch.setattr(paths, "_LIB_DIR_CACHE", None)
+    return paths.library_dir()
+
+
+@pytest.fixture
+def dataset_tree(tmp_path):
+    """
+    Réplica local de datasets/json (MANIFEST + by-hash) con DATASET_FILES ficheros.
+    Devuelve (directorio servido, paths del MANIFEST).
+    """
+    root = tmp_path / "remote"
+    return str(root), http_pool.make_dataset_tree(str(root), DATASET_FILES)
+
+
+@pytest.fixture
+def dataset_server(dataset_tree):
+    """Servidor HTTP local sobre dataset_tree; devuelve (server, base_url de datasets/json)."""
+    root, _paths = dataset_tree
+    server, base = http_pool.serve_directory(root)
+    try:
+        yield server, base + "/datasets/json"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def dataset_dir(dataset_tree) -> str:
+    """datasets/json dentro de dataset_tree (donde está el MANIFEST)."""
+    return os.path.join(dataset_tree[0], "datasets", "json")
@@ -0,0 +1,173 @@
+# tests/test_aggregator_engines.py
+"""
+Los motores de agregación (python, numpy y AggregationCube) tienen que dar
+las mismas filas por zona, incluida la regla de balance Duo / Balance Real /
+Ignorar Balance. Las zonas tienen pocas hunts (< 128), así que el sketch KLL
+es exacto y los percentiles también deben coincidir.
+"""
+from __future__ import annotations
+
+import random
+from dataclasses import asdict, fields
+from datetime import datetime, timedelta
+from typing import List
+
+import pytest
+
+from app.data.hunt_store import HuntStore
+from app.data.schema import AggregatedZone, HuntRecord
+from app.services.aggregation_cube import AggregationCube
+from app.services.aggregator import STATS_BASIC, STATS_HILO, aggregate_by_zone
+from app.services.aggregator_numpy import HAS_NUMPY
+
+ZONES = ("Asura Palace", "Cobra Bastion", "Falcon Bastion", "Library")
+VOCATIONS = ("Knight", "Paladin", "Druid")
+LEVELS = ("301-350", "351-400", "401-450")
+
+# (vocation, mode, level_filter): sin filtro, Duo (regla de Balance Real), Solo, nivel "All"...
+FILTERS = [
+    (None, None, None),
+    (None, "Duo", None),
+    (None, "Solo", None),
+    ("Knight", None, "All"),
+    ("Paladin", "Duo", None),
+    ("Druid", "Solo", "351-400"),
+    (None, "Duo", "401-450"),
+    ("Sorcerer", None, None),      # vocación sin hunts
+]
+
+
+def _hunt(rng: random.Random, i: int) -> HuntRecord:
+    mode = rng.choice(("Solo", "Duo"))
+    duo = mode == "Duo"
+    start = datetime(2025, 1, 1) + timedelta(hours=i)
+    duration = 0 if i % 17 == 0 else rng.randrange(600, 4 * 3600, 60)
+    return HuntRecord(
+        path=f"/hunts/{i:04d}.json",
+        session_start=start,
+        session_end=start + timedelta(seconds=duration),
+        duration_sec=duration,
+        xp_gain=rng.randrange(0, 8_000_000),
+        raw_xp_gain=rng.randrange(0, 6_000_000) if i % 3 else None,
+        supplies=rng.randrange(0, 400_000),
+        loot=rng.randrange(0, 600_000),
+        balance=rng.randrange(-300_000, 500_000),
+        vocation=rng.choice(VOCATIONS),
+        mode=mode,
+        vocation_duo=rng.choice(VOCATIONS) if duo else None,
+        zona=rng.choice(ZONES),
+        level_bucket=rng.choice(LEVELS),
+        has_all_meta=i % 11 != 0,  # algunas incompletas: ningún motor las cuenta
+        # Duo con y sin Balance Real, y con "Ignorar Balance" en ambos casos
+        ignore_duo_balance=duo and i % 4 == 0,
+        balance_real=rng.randrange(-100_000, 300_000) if duo and i % 5 else None,
+    )
+
+
+@pytest.fixture
+def records() -> List[HuntRecord]:
+    rng = random.Random(1234)
+    return [_hunt(rng, i) for i in range(160)]
+
+
+@pytest.fixture
+def store(records) -> HuntStore:
+    return HuntStore(records)
+
+
+def _assert_same(got: List[AggregatedZone], expected: List[AggregatedZone], ordered: bool = True) -> None:
+    if not ordered:
+        got = sorted(got, key=lambda r: r.zona)
+        expected = sorted(expected, key=lambda r: r.zona)
+    assert [r.zona for r in got] == [r.zona for r in expected]
+    for a, b in zip(got, expected):
+        assert a.hunts == b.hunts, a.zona
+        da, db = asdict(a), asdict(b)
+        for f in fields(AggregatedZone):
+            if f.name in ("zona", "hunts"):
+                continue
+            assert da[f.name] == pytest.approx(db[f.name], rel=1e-12, abs=1e-9), (a.zona, f.name)
+
+
+def test_store_and_records_match(records, store):
+    for vocation, mode, level in FILTERS:
+        _assert_same(aggregate_by_zone(store, vocation, mode, level),
+                     aggregate_by_zone(records, vocation, mode, level))
+
+
+@pytest.mark.skipif(not HAS_NUMPY, reason="numpy no está instalado")
+@pytest.mark.parametrize("stats", [STATS_HILO, STATS_BASIC])
+@pytest.mark.parametrize("vocation,mode,level", FILTERS)
+def test_numpy_matches_python(store, vocation, mode, level, stats):
+    expected = aggregate_by_zone(store, vocation, mode, level, engine="python", stats=stats)
+    got = aggregate_by_zone(store, vocation, mode, level, engine="numpy", stats=stats)
+    _assert_same(got, expected)
+
+
+@pytest.mark.parametrize("stats", [STATS_HILO, STATS_BASIC])
+@pytest.mark.parametrize("vocation,mode,level", FILTERS)
+def test_cube_matches_python(store, vocation, mode, level, stats):
+    cube = AggregationCube.build(store)
+    expected = aggregate_by_zone(store, vocation, mode, level, stats=stats)
+    _assert_same(cube.rows(vocation, mode, level, stats=stats), expected)
+
+
+def test_duo_rule_changes_balance(store):
+    # Con filtro Duo solo cuentan las hunts con Balance Real y sin "Ignorar Balance"
+    duo = {r.zona: r for r in aggregate_by_zone(store, None, "Duo", None)}
+    naive = {}
+    for h in store:
+        if h.has_all_meta and h.mode == "Duo" and h.balance_real is not None and not h.ignore_duo_balance:
+            secs, bal = naive.get(h.zona, (0, 0))
+            naive[h.zona] = (secs + h.duration_sec, bal + h.balance)
+    for zona, (secs, bal) in naive.items():
+        assert duo[zona].balance_per_h == pytest.approx(bal / (secs / 3600.0))
+
+
+def test_cube_incremental_matches_rebuild(records, store):
+    cube = AggregationCube.build(store)
+    rng = random.Random(99)
+    removed = rng.sample(records, 40)
+    for h in removed:
+        cube.remove(h)
+        store.remove(h.path)
+    # cambios: misma ruta, otra zona/modo (pasa por replace)
+    for h in rng.sample([r for r in records if r not in removed], 20):
+        new = HuntRecord(**{**asdict(h), "zona": rng.choice(ZONES), "mode": "Duo",
+                            "balance_real": h.balance, "ignore_duo_balance": False})
+        cube.replace(h, new)
+        store.append(new)
+    engines = ["python"] + (["numpy"] if HAS_NUMPY else [])
+    for vocation, mode, level in FILTERS:
+        got = cube.rows(vocation, mode, level)
+        for engine in engines:
+            # el store cambia el orden de las filas al borrar: el desempate por
+            # primera aparición puede no coincidir, así que se compara por zona
+            _assert_same(got, aggregate_by_zone(store, vocation, mode, level, engine=engine),
+                         ordered=False)
+
+
+def test_cube_memory_is_bounded_per_zone():
+    # Una sola celda y zona con muchas hunts: el resumen no crece con ellas y una
+    # celda sola coincide con el motor python (mismo sketch, mismo orden de llegada)
+    rng = random.Random(7)
+    records = []
+    for i in range(3000):
+        h = _hunt(rng, i)
+        records.append(HuntRecord(**{**asdict(h), "vocation": "Knight", "mode": "Solo", "zona": "Library",
+                                     "level_bucket": "301-350", "has_all_meta": True}))
+    store = HuntStore(records)
+    cube = AggregationCube.build(store)
+    acc = cube.cells[("Knight", "Solo", "301-350")]["Library"]
+    assert acc.rates["xp"].sketch.size < 512
+    _assert_same(cube.rows("Knight", "Solo", "301-350"), aggregate_by_zone(store, "Knight", "Solo", "301-350"))
+
+    # Quitar hunts deja la zona 'stale': se recalcula desde el store al consultarla
+    for h in records[:1000]:
+        store.remove(h.path)
+        cube.remove(h)
+    assert acc.stale
+    _assert_same(cube.rows("Knight", "Solo", "301-350"), aggregate_by_zone(store, "Knight", "Solo", "301-350"),
+                 ordered=False)
+    assert not acc.stale and acc.rates["xp"].count == acc.hunts - sum(
+        1 for h in records[1000:] if not h.duration_sec)
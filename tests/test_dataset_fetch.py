@@ -0,0 +1,182 @@
+# tests/test_dataset_fetch.py
+"""
+Descarga del dataset contra un servidor http.server local (fixtures de conftest):
+fetch_many, recuentos de download_dataset_to_library, segunda pasada sin
+descargas y cancelación a mitad del pool.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from app.services import http_pool
+from app.services.dataset_bundle import build_bundle
+from app.services.dataset_fetch import download_dataset_to_library
+from app.services.jobs import JobControl
+
+from conftest import DATASET_FILES
+
+_MISSING = "by-hash/" + "0" * 64 + ".json"
+
+
+def _file_requests(server) -> list:
+    return [p for p in server.requests if "/by-hash/" in p]
+
+
+class _CancelAfter(JobControl):
+    """Cancela cuando la fase 'download' lleva 'n' ficheros (como el botón Cancelar)."""
+    def __init__(self, n: int):
+        super().__init__()
+        self._n = n
+
+    def step(self, n: int = 1, **counts: int) -> None:
+        super().step(n, **counts)
+        if self.stage == "download" and self.done >= self._n:
+            self.cancel()
+
+
+# ---------------------------------------------------------------------------
+# fetch_many
+# ---------------------------------------------------------------------------
+def test_fetch_many_returns_every_url(dataset_server, dataset_tree, dataset_dir):
+    server, base = dataset_server
+    _root, paths = dataset_tree
+    urls = [f"{base}/{p}" for p in paths] + [f"{base}/{_MISSING}"]
+
+    results = {url: (body, err) for url, body, err in http_pool.fetch_many(urls, workers=4)}
+
+    assert set(results) == set(urls)
+    for p in paths:
+        body, err = results[f"{base}/{p}"]
+        assert err is None
+        with open(os.path.join(dataset_dir, p), "rb") as f:
+            assert body == f.read()
+    body, err = results[f"{base}/{_MISSING}"]
+    assert body is None
+    assert isinstance(err, http_pool.HttpStatusError) and err.status == 404
+    assert len(server.requests) == len(urls)
+
+
+def test_fetch_many_stops_launching_on_cancel(dataset_server, dataset_tree):
+    server, base = dataset_server
+    _root, paths = dataset_tree
+    control = JobControl()
+    workers = 2
+
+    got = []
+    for url, body, err in http_pool.fetch_many([f"{base}/{p}" for p in paths],
+                                               workers=workers, control=control):
+        got.append(url)
+        if len(got) == 3:
+            control.cancel()
+
+    # Tras cancelar solo terminan las que ya estaban en vuelo (ventana de 4 * workers)
+    assert 3 <= len(got) <= 3 + 4 * workers < len(paths)
+    # Todo lo pedido se entrega: nada queda a medias
+    assert len(server.requests) == len(got)
+
+
+# ---------------------------------------------------------------------------
+# download_dataset_to_library
+# ---------------------------------------------------------------------------
+def test_download_counts_and_second_pass_is_free(user_data, dataset_server, dataset_tree, dataset_dir):
+    server, base = dataset_server
+    _root, paths = dataset_tree
+    # Uno ya está en la biblioteca (con otro nombre): identical, sin pedirlo
+    shutil.copy(os.path.join(dataset_dir, paths[0]), os.path.join(user_data, "mine.json"))
+
+    res = download_dataset_to_library(base_url=base, use_bundle=False)
+    assert (res.copied, res.identical, res.errors, res.up_to_date) == (DATASET_FILES - 1, 1, 0, False)
+    assert len(_file_requests(server)) == DATASET_FILES - 1
+    assert len(os.listdir(user_data)) == DATASET_FILES
+
+    # Segunda pasada: GET condicional del MANIFEST (304) y ninguna descarga
+    server.requests.clear()
+    res = download_dataset_to_library(base_url=base, use_bundle=False)
+    assert res.up_to_date
+    assert (res.copied, res.identical, res.errors) == (0, 0, 0)
+    assert server.requests == ["/datasets/json/MANIFEST.json"]
+
+    # force recorre el MANIFEST, pero todo está ya en el índice: cero ficheros pedidos
+    server.requests.clear()
+    res = download_dataset_to_library(base_url=base, use_bundle=False, force=True)
+    assert (res.copied, res.identical, res.errors) == (0, DATASET_FILES, 0)
+    assert _file_requests(server) == []
+
+
+def test_download_replaced_entry_with_same_count(user_data, dataset_server, dataset_dir):
+    server, base = dataset_server
+    assert download_dataset_to_library(base_url=base, use_bundle=False).copied == DATASET_FILES
+
+    # Una entrada sustituida por otro blob: el MANIFEST cambia pero no crece
+    blob = json.dumps({"Session start": "2024-02-02, 10:00:00", "pad": "y" * 200}).encode()
+    sha = hashlib.sha256(blob).hexdigest()
+    with open(os.path.join(dataset_dir, "by-hash", f"{sha}.json"), "wb") as f:
+        f.write(blob)
+    manifest_path = os.path.join(dataset_dir, "MANIFEST.json")
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest["entries"][0] = {"path": f"by-hash/{sha}.json", "original_name": "Replaced.json"}
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    # Last-Modified tiene resolución de segundos: que no responda 304 por caer en el mismo
+    future = time.time() + 10
+    os.utime(manifest_path, (future, future))
+
+    server.requests.clear()
+    res = download_dataset_to_library(base_url=base, use_bundle=False)
+    assert not res.up_to_date
+    assert (res.copied, res.identical, res.errors) == (1, DATASET_FILES - 1, 0)
+    assert _file_requests(server) == [f"/datasets/json/by-hash/{sha}.json"]
+    assert os.path.exists(os.path.join(user_data, "Replaced.json"))
+
+
+def test_download_counts_missing_file_as_error(user_data, dataset_server, dataset_dir):
+    server, base = dataset_server
+    manifest_path = os.path.join(dataset_dir, "MANIFEST.json")
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest["entries"].append({"path": _MISSING, "original_name": "Gone.json"})
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    res = download_dataset_to_library(base_url=base, use_bundle=False)
+    assert (res.copied, res.identical, res.errors) == (DATASET_FILES, 0, 1)
+
+    # Con errores la pasada no cuenta como sincronizada: la siguiente solo repite el 404
+    server.requests.clear()
+    res = download_dataset_to_library(base_url=base, use_bundle=False)
+    assert (res.copied, res.identical, res.errors, res.up_to_date) == (0, DATASET_FILES, 1, False)
+    assert _file_requests(server) == [f"/datasets/json/{_MISSING}"]
+
+
+def test_download_cancel_mid_pool_keeps_what_arrived(user_data, dataset_server):
+    server, base = dataset_server
+    control = _CancelAfter(5)
+
+    res = download_dataset_to_library(base_url=base, use_bundle=False, download_workers=1,
+                                      control=control)
+    assert control.cancelled
+    assert 5 <= res.copied < DATASET_FILES
+    assert res.errors == 0
+    assert len(os.listdir(user_data)) == res.copied
+    assert not any(name.endswith(".part") for name in os.listdir(user_data))
+
+    # Cancelada no cuenta como sincronizada: la siguiente baja exactamente lo que faltaba
+    server.requests.clear()
+    again = download_dataset_to_library(base_url=base, use_bundle=False)
+    assert (again.copied, again.identical) == (DATASET_FILES - res.copied, res.copied)
+    assert len(_file_requests(server)) == DATASET_FILES - res.copied
+
+
+def test_download_fresh_install_uses_bundle(user_data, dataset_server, dataset_dir):
+    server, base = dataset_server
+    build_bundle(dataset_dir)
+
+    res = download_dataset_to_library(base_url=base)
+    assert (res.copied, res.identical, res.errors) == (DATASET_FILES, 0, 0)
+    assert _file_requests(server) == []
+    assert len([p for p in server.requests if "/bundles/" in p]) == 1
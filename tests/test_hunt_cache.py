@@ -0,0 +1,63 @@
+# tests/test_hunt_cache.py
+"""HuntCache sobre snapshot + diario: solo se escribe lo que cambia, también descargada."""
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime
+
+from app.data.hunt_cache import HuntCache
+from app.data.schema import HuntRecord
+
+
+def _record(i: int) -> HuntRecord:
+    return HuntRecord(
+        path=f"/lib/Hunt_{i:04d}.json", session_start=datetime(2025, 1, 1, 10, 0), session_end=None,
+        duration_sec=3600, xp_gain=i, raw_xp_gain=None, supplies=10, loot=20, balance=10,
+        vocation="Knight", mode="Solo", vocation_duo="none", zona="Library",
+        level_bucket="301-350", has_all_meta=True,
+    )
+
+
+def _journal_lines(path: str) -> int:
+    with open(f"{path}.journal", "r", encoding="utf-8") as f:
+        return sum(1 for _ in f)
+
+
+def test_released_cache_only_appends_changes(tmp_path):
+    path = str(tmp_path / "hunt_cache.json")
+    cache = HuntCache.load(path)
+    for i in range(50):
+        cache.put(_record(i), 100 + i, 1000 + i)
+    assert cache.save()
+    assert not os.path.exists(f"{path}.journal")   # sin snapshot previo: se escribe entero
+
+    cache.release()
+    snapshot_mtime = os.stat(path).st_mtime_ns
+    cache.put(_record(50), 150, 1050)
+    cache.forget(_record(3).path)
+    assert cache.get(_record(50).path, 150, 1050) is None   # descargada: sin aciertos
+    assert cache.save()
+    assert os.stat(path).st_mtime_ns == snapshot_mtime
+    assert _journal_lines(path) == 2
+
+    again = HuntCache.load(path)
+    assert again.get(_record(50).path, 150, 1050) == _record(50)
+    assert again.get(_record(3).path, 103, 1003) is None
+    assert again.get(_record(4).path, 104, 1004) == _record(4)
+    assert again.get(_record(4).path, 104, 9999) is None    # otra firma
+
+
+def test_released_cache_compacts_by_reloading(tmp_path):
+    path = str(tmp_path / "hunt_cache.json")
+    cache = HuntCache.load(path)
+    cache.put(_record(0), 100, 1000)
+    cache.save()
+    cache.release()
+    for i in range(1, 1200):   # más que el mínimo del diario: toca compactar
+        cache.put(_record(i), 100 + i, 1000 + i)
+    assert cache.save()
+    assert not os.path.exists(f"{path}.journal")
+    with open(path, "r", encoding="utf-8") as f:
+        assert len(json.load(f)["entries"]) == 1200
+    assert cache.get(_record(5).path, 105, 1005) is None    # sigue descargada
@@ -0,0 +1,40 @@
+# tests/test_journal.py
+"""Snapshot + diario: lo anotado sin guardar sobrevive a una recarga, haya o no snapshot."""
+from __future__ import annotations
+
+import os
+
+from app.services.journal import Journal
+
+
+def test_reload_keeps_pending_without_snapshot(tmp_path):
+    path = str(tmp_path / "data.json")
+    j = Journal(path, 1, ("entries",))
+    assert j.load() is None          # carga en frío: nada guardado ni anotado
+    j.record("entries", "a", 1)
+    j.record("entries", "b", 2)
+    j.record("entries", "a", None)
+
+    tables = j.load()                # recarga (como HuntCache antes de compactar)
+    assert tables == {"entries": {"b": 2}}
+    assert j.save(tables)
+
+    assert Journal(path, 1, ("entries",)).load() == {"entries": {"b": 2}}
+
+
+def test_reload_applies_pending_over_snapshot(tmp_path):
+    path = str(tmp_path / "data.json")
+    j = Journal(path, 1, ("entries",))
+    j.load()
+    j.record("entries", "a", 1)
+    assert j.save({"entries": {"a": 1}})
+    j.record("entries", "b", 2)
+
+    # snapshot de otra versión: se descarta, pero lo anotado no
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"version": 0}')
+    tables = j.load()
+    assert tables == {"entries": {"b": 2}}
+    assert j.save(tables)
+    assert not os.path.exists(f"{path}.journal")
+    assert Journal(path, 1, ("entries",)).load() == {"entries": {"b": 2}}